@@ -5,10 +5,11 @@ OFS-MORE-CCN3: Apply to be a Childminder Beta
 @author: Informed Solutions
 """
 
-import requests
 import json
 from django.conf import settings
 
+from .services import http_client
+
 
 class AddressHelper:
 
@@ -20,8 +21,8 @@ class AddressHelper:
         :return: list of indexed one-line addresses formatted for a ChoiceField
         """
         headers = {"content-type": "application/json"}
-        response = requests.get(settings.ADDRESSING_URL + '/api/v1/addresses/' + postcode + '/', headers=headers,
-                                verify=False)
+        response = http_client.request('addressing', 'get', settings.ADDRESSING_URL + '/api/v1/addresses/' + postcode + '/',
+                                       headers=headers, verify=False)
         if response.status_code == 200:
             address_matches = json.loads(response.text)
             results = address_matches['results']
@@ -45,8 +46,8 @@ class AddressHelper:
         :return: list of one-addresses and JavaScript objects containing address elements
         """
         headers = {"content-type": "application/json"}
-        response = requests.get(settings.ADDRESSING_URL + '/api/v1/addresses/' + postcode + '/', headers=headers,
-                                verify=False)
+        response = http_client.request('addressing', 'get', settings.ADDRESSING_URL + '/api/v1/addresses/' + postcode + '/',
+                                       headers=headers, verify=False)
         if response.status_code == 200:
             address_matches = json.loads(response.text)
             results = address_matches['results']
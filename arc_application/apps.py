@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class ApplicationConfig(AppConfig):
     name = 'arc_application'
+
+    def ready(self):
+        from . import signals
@@ -0,0 +1,348 @@
+"""
+OFS-MORE-CCN3: Apply to be a Childminder Beta
+-- fake_gateway.py --
+
+@author: Informed Solutions
+
+Local stand-in for the Nanny, Household Member and Identity gateways, serving the endpoints in each gateway client's
+_endpoint_pk_dict over real HTTP from seeded synthetic data, with configurable latency.
+
+Reads, lists (filtering on any field, "<field>__in", count_only, fields and page/page_size) and writes are supported,
+so pages and exports can be driven end to end without the real services, see benchmarks.load.
+
+Usage: PROJECT_SETTINGS=arc_service.settings.dev python -m arc_application.benchmarks.fake_gateway \
+    [--applications 500] [--latency 0.02] [--jitter 0.01] [--seed 1]
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from urllib.parse import parse_qsl, urlsplit
+
+import django
+from faker import Faker
+
+from .stub_gateway import StubGatewayRequestHandler, StubGatewayServer
+
+NANNY_STATUSES = ['DRAFTING', 'SUBMITTED', 'ARC_REVIEW', 'FURTHER_INFORMATION', 'ACCEPTED']
+ADULT_STATUSES = ['DRAFTING', 'WAITING', 'SUBMITTED', 'ARC_REVIEW', 'FURTHER_INFORMATION', 'ACCEPTED']
+TIMELINE_ACTIONS = [('created by', 'applicant'), ('submitted by', 'applicant'), ('assigned to', 'reviewer'),
+                    ('returned by', 'reviewer'), ('resubmitted by', 'applicant'), ('accepted by', 'reviewer')]
+ARC_FLAGGED_FIELDS = ['login_details_arc_flagged', 'personal_details_arc_flagged', 'dbs_arc_flagged']
+LIST_OPTIONS = ('count_only', 'fields', 'page', 'page_size')
+
+
+class FakeGatewayRequestHandler(StubGatewayRequestHandler):
+    """
+    Serves /api/v1/<endpoint>/ (list and create) and /api/v1/<endpoint>/<pk>/ (read, patch, put and delete) from the
+    server's tables. Empty listings and missing records are answered with 404, as the real gateways do, except for
+    searches, which answer with no results.
+    """
+
+    def do_GET(self):
+        endpoint, pk, query = self._parse_path()
+        # Reads send their params as a body too
+        self._read_form()
+
+        if pk is not None:
+            record = self.server.find(endpoint, pk)
+            self._respond(200 if record else 404, record or {})
+        else:
+            self._list(endpoint, dict(parse_qsl(query)))
+
+    def do_POST(self):
+        endpoint, _, _ = self._parse_path()
+        self._respond(201, self.server.create(endpoint, self._read_form()))
+
+    def do_PUT(self):
+        self.do_PATCH()
+
+    def do_PATCH(self):
+        endpoint, pk, _ = self._parse_path()
+        record = self.server.update(endpoint, pk, self._read_form())
+        self._respond(200 if record else 404, record or {})
+
+    def do_DELETE(self):
+        endpoint, pk, _ = self._parse_path()
+        self._read_form()
+        self._respond(204 if self.server.delete(endpoint, pk) else 404, None)
+
+    def _list(self, endpoint, query):
+        options = {option: query.pop(option) for option in LIST_OPTIONS if option in query}
+        records = self.server.filter(endpoint, query)
+
+        if options.get('count_only') == 'true':
+            self._respond(200, {'count': len(records)})
+            return
+
+        if not records and endpoint != 'arc-search':
+            self._respond(404, [])
+            return
+
+        if 'fields' in options:
+            fields = options['fields'].split(',')
+            records = [{field: record.get(field) for field in fields} for record in records]
+
+        if 'page' in options:
+            page, page_size = int(options['page']), int(options.get('page_size', 100))
+            next_page = page * page_size < len(records)
+            self._respond(200, {'count': len(records),
+                                'next': '?page={0}'.format(page + 1) if next_page else None,
+                                'results': records[(page - 1) * page_size:page * page_size]})
+            return
+
+        self._respond(200, records)
+
+    def _parse_path(self):
+        split_path = urlsplit(self.path)
+        segments = split_path.path.strip('/').split('/')[2:]
+        return segments[0], segments[1] if len(segments) > 1 else None, split_path.query
+
+    def _read_form(self):
+        content_length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(content_length).decode() if content_length else ''
+        return dict(parse_qsl(body, keep_blank_values=True))
+
+    def _respond(self, status_code, record):
+        # Unlike the stub, every verb has already read its request body
+        time.sleep(self.server.latency + random.uniform(0, self.server.jitter))
+
+        body = json.dumps(record).encode() if record is not None else b''
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeGatewayServer(StubGatewayServer):
+    """
+    Threaded fake gateway bound to a localhost port, holding one table (list of records) per endpoint.
+    """
+
+    def __init__(self, tables, pk_fields, latency=0.0, jitter=0.0, port=0):
+        super().__init__(FakeGatewayRequestHandler, latency=latency, port=port)
+        self.tables = {endpoint: tables.get(endpoint, []) for endpoint in pk_fields}
+        self.pk_fields = pk_fields
+        self.jitter = jitter
+        self.__lock = threading.Lock()
+
+    def find(self, endpoint, pk):
+        pk_field = self.pk_fields[endpoint]
+        return next((record for record in self.tables.get(endpoint, []) if str(record.get(pk_field)) == pk), None)
+
+    def filter(self, endpoint, query):
+        records = self.tables.get(endpoint, [])
+
+        for field, value in query.items():
+            if field.endswith('__in'):
+                values = set(value.split(','))
+                records = [record for record in records if str(record.get(field[:-4])) in values]
+            elif field.endswith('__gte'):
+                records = [record for record in records if str(record.get(field[:-5])) >= value]
+            elif field.endswith('__lt'):
+                records = [record for record in records if str(record.get(field[:-4])) < value]
+            elif endpoint == 'arc-search':
+                # Search matches on part of a value, and ignores criteria its results do not carry
+                search_field = 'applicant_name' if field == 'name' else field
+                records = [record for record in records if search_field not in record
+                           or value.lower() in str(record[search_field]).lower()]
+            else:
+                records = [record for record in records if str(record.get(field)) == value]
+
+        return records
+
+    def create(self, endpoint, record):
+        record.setdefault(self.pk_fields.get(endpoint, 'id'), str(uuid.uuid4()))
+
+        if endpoint == 'timeline-log':
+            record.update(id=str(uuid.uuid4()), extra_data=json.loads(record.get('extra_data') or '{}'),
+                          timestamp=datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S.%f+00:00'))
+
+        with self.__lock:
+            self.tables.setdefault(endpoint, []).append(record)
+
+        return record
+
+    def update(self, endpoint, pk, changes):
+        with self.__lock:
+            record = self.find(endpoint, pk)
+
+            if record is not None:
+                record.update(changes)
+
+        return record
+
+    def delete(self, endpoint, pk):
+        with self.__lock:
+            record = self.find(endpoint, pk)
+
+            if record is not None:
+                self.tables[endpoint].remove(record)
+
+        return record is not None
+
+
+def build_nanny_tables(fake, applications):
+    tables = {endpoint: [] for endpoint in ('application', 'applicant-personal-details', 'applicant-home-address',
+                                            'childcare-training', 'dbs-check', 'first-aid', 'insurance-cover',
+                                            'declaration', 'payment', 'timeline-log', 'arc-search')}
+
+    for index in range(applications):
+        application_id = _uuid(fake)
+        reference = 'NA{0:06d}'.format(index + 1)
+        status = fake.random_element(NANNY_STATUSES)
+        first_name, last_name = fake.first_name(), fake.last_name()
+        submitted = fake.date_time_between('-1y', '-1d')
+        updated = submitted + timedelta(hours=fake.random_int(1, 72))
+
+        tables['application'].append(dict(
+            {flagged_field: False for flagged_field in ARC_FLAGGED_FIELDS},
+            application_id=application_id, application_reference=reference, application_status=status,
+            date_submitted=_gateway_datetime(submitted), date_updated=_gateway_datetime(updated)))
+        tables['applicant-personal-details'].append({
+            'application_id': application_id, 'personal_detail_id': _uuid(fake), 'title': fake.prefix(),
+            'first_name': first_name, 'middle_names': '', 'last_name': last_name,
+            'date_of_birth': fake.date_time_between('-70y', '-18y').date().isoformat()})
+        tables['applicant-home-address'].append({
+            'application_id': application_id, 'home_address_id': _uuid(fake), 'street_line1': fake.street_address(),
+            'street_line2': '', 'town': fake.city(), 'county': '', 'postcode': fake.postcode()})
+
+        for endpoint in ('childcare-training', 'dbs-check', 'first-aid', 'insurance-cover', 'declaration', 'payment'):
+            tables[endpoint].append({'application_id': application_id})
+
+        tables['timeline-log'] += _build_timeline(fake, application_id, submitted)
+        tables['arc-search'].append(_build_search_result(application_id, reference, 'Nanny',
+                                                         first_name, last_name, status, submitted, updated))
+
+    return tables
+
+
+def build_hm_tables(fake, adults):
+    tables = {endpoint: [] for endpoint in ('adult', 'dpa-auth', 'setting-address', 'adult-in-home-address',
+                                            'timeline-log', 'arc-search')}
+
+    for index in range(adults):
+        adult_id, token_id = _uuid(fake), _uuid(fake)
+        reference = 'EY{0:06d}'.format(index + 1)
+        status = fake.random_element(ADULT_STATUSES)
+        first_name, last_name = fake.first_name(), fake.last_name()
+        submitted = fake.date_time_between('-1y', '-1d')
+        updated = submitted + timedelta(hours=fake.random_int(1, 72))
+
+        tables['adult'].append(dict(
+            {flagged_field: False for flagged_field in ARC_FLAGGED_FIELDS},
+            adult_id=adult_id, token_id=token_id, adult_status=status, order=1, title=fake.prefix(),
+            first_name=first_name, middle_names='', last_name=last_name,
+            get_full_name='{0} {1}'.format(first_name, last_name),
+            date_of_birth=fake.date_time_between('-80y', '-16y').date().isoformat(),
+            date_submitted=_gateway_datetime(submitted), date_updated=_gateway_datetime(updated),
+            date_resubmitted=None, date_accepted=None, currently_being_treated=False, illness_details='',
+            has_serious_illness=False, has_hospital_admissions=False))
+        tables['dpa-auth'].append({'token_id': token_id, 'URN': reference, 'registration_id': str(index + 1),
+                                   'first_name': fake.first_name(), 'last_name': fake.last_name()})
+        tables['setting-address'].append({'token_id': token_id, 'street_line1': fake.street_address(),
+                                          'town': fake.city(), 'postcode': fake.postcode()})
+        tables['adult-in-home-address'].append({'adult_id': adult_id, 'adult_in_home_address_id': _uuid(fake),
+                                                'street_line1': fake.street_address(), 'town': fake.city(),
+                                                'postcode': fake.postcode()})
+        tables['timeline-log'] += _build_timeline(fake, adult_id, submitted)
+        tables['arc-search'].append(_build_search_result(adult_id, reference, 'Association',
+                                                         first_name, last_name, status, submitted, updated))
+
+    return tables
+
+
+def build_identity_tables(fake, nanny_tables):
+    return {'user': [{'application_id': application['application_id'], 'email': fake.email(),
+                      'mobile_number': '07700900{0:03d}'.format(fake.random_int(0, 999))}
+                     for application in nanny_tables['application']]}
+
+
+def _build_timeline(fake, object_id, submitted):
+    timeline = []
+
+    for offset, (action, user_type) in enumerate(TIMELINE_ACTIONS[:fake.random_int(1, len(TIMELINE_ACTIONS))]):
+        timeline.append({'id': _uuid(fake), 'object_id': object_id, 'user': fake.user_name(),
+                         'template': 'timeline_logger/application_action.txt',
+                         'extra_data': {'action': action, 'user_type': user_type, 'entity': 'application'},
+                         'timestamp': (submitted + timedelta(hours=offset)).strftime('%Y-%m-%dT%H:%M:%S.%f+00:00')})
+
+    return timeline
+
+
+def _build_search_result(application_id, reference, application_type, first_name, last_name, status, submitted,
+                         updated):
+    return {'application_id': application_id, 'application_reference': reference,
+            'application_type': application_type, 'applicant_name': '{0} {1}'.format(first_name, last_name),
+            'date_submitted': submitted.strftime('%d/%m/%Y'), 'date_accessed': updated.strftime('%d/%m/%Y'),
+            'submission_type': status}
+
+
+def _uuid(fake):
+    return str(uuid.UUID(int=fake.random.getrandbits(128)))
+
+
+def _gateway_datetime(value):
+    return value.strftime('%Y-%m-%d %H:%M:%S.%f+00')
+
+
+def build_fake_gateways(applications=500, latency=0.0, jitter=0.0, seed=1, ports=(0, 0, 0)):
+    """
+    Builds (but does not start) seeded fake Nanny, Household Member and Identity gateways.
+    :param applications: Number of Nanny applications, and of adults, to generate.
+    :return: dict of {gateway client class: FakeGatewayServer}
+    """
+    from arc_application.services.db_gateways import NannyGatewayActions, HMGatewayActions, IdentityGatewayActions
+
+    fake = Faker('en_GB')
+    fake.seed(seed)
+    nanny_tables = build_nanny_tables(fake, applications)
+    hm_tables = build_hm_tables(fake, applications)
+    identity_tables = build_identity_tables(fake, nanny_tables)
+
+    return {
+        NannyGatewayActions: FakeGatewayServer(nanny_tables, NannyGatewayActions._endpoint_pk_dict,
+                                               latency=latency, jitter=jitter, port=ports[0]),
+        HMGatewayActions: FakeGatewayServer(hm_tables, HMGatewayActions._endpoint_pk_dict,
+                                            latency=latency, jitter=jitter, port=ports[1]),
+        IdentityGatewayActions: FakeGatewayServer(identity_tables, IdentityGatewayActions._endpoint_pk_dict,
+                                                  latency=latency, jitter=jitter, port=ports[2]),
+    }
+
+
+def run():
+    parser = argparse.ArgumentParser(description='Serve fake Nanny, HM and Identity gateways until interrupted.')
+    parser.add_argument('--applications', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Up to this many more seconds, at random')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--ports', type=int, nargs=3, default=(8011, 8012, 8013),
+                        metavar=('NANNY', 'HM', 'IDENTITY'))
+    options = parser.parse_args()
+
+    servers = build_fake_gateways(options.applications, options.latency, options.jitter, options.seed, options.ports)
+
+    for gateway, server in servers.items():
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print('{0:<24} {1}'.format(gateway.__name__, server.url))
+
+    print(json.dumps({'applications': options.applications, 'latency': options.latency, 'jitter': options.jitter}))
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', os.environ.get('PROJECT_SETTINGS'))
+
+    django.setup()
+
+    run()
@@ -0,0 +1,103 @@
+"""
+OFS-MORE-CCN3: Apply to be a Childminder Beta
+-- gateway_construction.py --
+
+@author: Informed Solutions
+
+Micro-benchmark of gateway client construction cost and per-call wrapper overhead. The network is replaced by a
+canned response so only the client's own work is measured.
+
+Usage: PROJECT_SETTINGS=arc_service.settings.dev python -m arc_application.benchmarks.gateway_construction
+"""
+import os
+import timeit
+from unittest.mock import MagicMock
+
+import django
+
+ITERATIONS = 100000
+APPLICATION_ID = '998fd8ec-b96b-4a71-a1a1-a7a3ae186729'
+
+
+class CannedSession:
+    """
+    Stands in for a requests.Session, returning the same pre-built response for every call.
+    """
+
+    def __init__(self):
+        self.response = MagicMock(status_code=200, text='{"application_id": "%s"}' % APPLICATION_ID)
+
+    def get(self, *args, **kwargs):
+        return self.response
+
+
+def report(label, seconds, iterations=ITERATIONS):
+    print('{0:<48} {1:8.3f}us per call'.format(label, seconds / iterations * 1000000))
+
+
+def run():
+    from arc_application.services.db_gateways import NannyGatewayActions
+
+    session = CannedSession()
+
+    class PerInstanceWrappingNannyGatewayActions(NannyGatewayActions):
+        """
+        Reproduces the previous construction path, which walked dir(self) and re-wrapped every public method each
+        time a client was built.
+        """
+
+        def __new__(cls):
+            return object.__new__(cls)
+
+        def __init__(self):
+            exempt_funcs = ['get_endpoint_dict', 'get_endpoint_pk']
+            event_list = [getattr(self, func) for func in dir(self) if
+                          callable(getattr(self, func)) and func[0] != '_' and func not in exempt_funcs]
+
+            if any([isinstance(event, MagicMock) for event in event_list]):
+                return None
+
+            for event in event_list:
+                setattr(self, event.__name__, self.__wrap(event))
+
+        def __wrap(self, func):
+            def log_wrapper(*args, **kwargs):
+                return func(*args, **kwargs)
+            return log_wrapper
+
+        def _request(self, method, url, **kwargs):
+            return getattr(session, method)(url, **kwargs)
+
+    class CannedNannyGatewayActions(NannyGatewayActions):
+
+        def _request(self, method, url, **kwargs):
+            return getattr(session, method)(url, **kwargs)
+
+    params = {'application_id': APPLICATION_ID}
+
+    report('Construction, per-instance wrapping (previous)',
+           timeit.timeit(PerInstanceWrappingNannyGatewayActions, number=ITERATIONS))
+    report('Construction, class-level wrapping singleton',
+           timeit.timeit(CannedNannyGatewayActions, number=ITERATIONS))
+
+    report('Construct + read, per-instance wrapping (previous)',
+           timeit.timeit(lambda: PerInstanceWrappingNannyGatewayActions().read('application', params=params),
+                         number=ITERATIONS))
+    report('Construct + read, class-level wrapping singleton',
+           timeit.timeit(lambda: CannedNannyGatewayActions().read('application', params=params),
+                         number=ITERATIONS))
+
+    unwrapped_read = CannedNannyGatewayActions.read.__wrapped__
+    gateway = CannedNannyGatewayActions()
+    report('read, no dispatch wrapper',
+           timeit.timeit(lambda: unwrapped_read(gateway, 'application', params=params), number=ITERATIONS))
+    report('read, class-level dispatch wrapper',
+           timeit.timeit(lambda: gateway.read('application', params=params), number=ITERATIONS))
+
+
+if __name__ == "__main__":
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', os.environ.get('PROJECT_SETTINGS'))
+
+    django.setup()
+
+    run()
@@ -0,0 +1,49 @@
+"""
+OFS-MORE-CCN3: Apply to be a Childminder Beta
+-- gateway_gather.py --
+
+@author: Informed Solutions
+
+Benchmark of the nanny export's gateway reads issued one after another against the same reads issued through
+DBGatewayActions.gather, with a fixed per-call latency on the stub gateway.
+
+Usage: PROJECT_SETTINGS=arc_service.settings.dev python -m arc_application.benchmarks.gateway_gather
+"""
+import os
+
+import django
+
+from .gateway_pool import report, time_calls
+
+BATCHES = 20
+LATENCY = 0.02
+ENDPOINTS = ['application', 'applicant-personal-details', 'applicant-home-address', 'childcare-training',
+             'dbs-check', 'first-aid', 'insurance-cover', 'previous-registration-details']
+APPLICATION_ID = '998fd8ec-b96b-4a71-a1a1-a7a3ae186729'
+
+
+def run():
+    from arc_application.services.db_gateways import NannyGatewayActions
+    from .stub_gateway import StubGatewayServer
+
+    with StubGatewayServer(latency=LATENCY) as stub:
+        stub_gateway = type('StubNannyGatewayActions', (NannyGatewayActions,),
+                            {'target_url_prefix': stub.url + '/api/v1/'})()
+        params = {'application_id': APPLICATION_ID}
+        calls = [('read', endpoint, params) for endpoint in ENDPOINTS]
+
+        sequential = time_calls(lambda: [stub_gateway.read(endpoint, params=params) for endpoint in ENDPOINTS],
+                                count=BATCHES)
+        gathered = time_calls(lambda: stub_gateway.gather(calls), count=BATCHES)
+
+    print('{0} batches of {1} "read" calls, {2:.0f}ms gateway latency'.format(BATCHES, len(ENDPOINTS), LATENCY * 1000))
+    report('Sequential', sequential)
+    report('gather', gathered)
+
+
+if __name__ == "__main__":
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', os.environ.get('PROJECT_SETTINGS'))
+
+    django.setup()
+
+    run()
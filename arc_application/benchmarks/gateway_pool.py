@@ -0,0 +1,69 @@
+"""
+OFS-MORE-CCN3: Apply to be a Childminder Beta
+-- gateway_pool.py --
+
+@author: Informed Solutions
+
+Benchmark of per-call gateway latency with a fresh connection per call (the previous module-level requests.get
+behaviour) against the pooled keep-alive sessions now used by DBGatewayActions.
+
+Usage: PROJECT_SETTINGS=arc_service.settings.dev python -m arc_application.benchmarks.gateway_pool
+"""
+import os
+import statistics
+import time
+
+import django
+import requests
+
+CALLS = 500
+APPLICATION_ID = '998fd8ec-b96b-4a71-a1a1-a7a3ae186729'
+
+
+def time_calls(call, count=CALLS):
+    """
+    Times count invocations of call.
+    :return: list of per-call latencies in milliseconds
+    """
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(label, timings):
+    timings = sorted(timings)
+    print('{0:<28} mean {1:7.3f}ms  p50 {2:7.3f}ms  p95 {3:7.3f}ms'.format(
+        label, statistics.mean(timings), timings[len(timings) // 2], timings[int(len(timings) * 0.95)]))
+
+
+def run():
+    from arc_application.services.db_gateways import NannyGatewayActions
+    from arc_application.services.http_client import close_sessions
+    from .stub_gateway import StubGatewayServer
+
+    with StubGatewayServer() as stub:
+        target_url_prefix = stub.url + '/api/v1/'
+        stub_gateway = type('StubNannyGatewayActions', (NannyGatewayActions,),
+                            {'target_url_prefix': target_url_prefix})()
+        read_url = target_url_prefix + 'application/' + APPLICATION_ID + '/'
+        params = {'application_id': APPLICATION_ID}
+
+        unpooled = time_calls(lambda: requests.get(read_url, data=params))
+
+        close_sessions()
+        pooled = time_calls(lambda: stub_gateway.read('application', params=params))
+
+    print('{0} sequential "read" calls against {1}'.format(CALLS, stub.url))
+    report('New connection per call', unpooled)
+    report('Pooled keep-alive session', pooled)
+
+
+if __name__ == "__main__":
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', os.environ.get('PROJECT_SETTINGS'))
+
+    django.setup()
+
+    run()
@@ -0,0 +1,155 @@
+"""
+OFS-MORE-CCN3: Apply to be a Childminder Beta
+-- load.py --
+
+@author: Informed Solutions
+
+Load benchmark driving the ARC summary, search, reporting and export flows against the fake gateways in
+benchmarks.fake_gateway, reporting p50/p95 latency and gateway calls per flow. Runs against a throwaway test database.
+
+Usage: PROJECT_SETTINGS=arc_service.settings.dev python -m arc_application.benchmarks.load \
+    [--applications 500] [--latency 0.01] [--jitter 0.005] [--repeat 20] [--assigned 5]
+"""
+import argparse
+import os
+import time
+import traceback
+from unittest import mock
+
+import django
+
+from .gateway_pool import report
+
+
+def build_flows(client, assigned_adult_ids):
+    """
+    Gets the flows to time, as (name, callable) pairs. Streamed responses are consumed in full.
+    """
+    from django.urls import reverse
+    from arc_application.messaging.application_exporter import ApplicationExporter
+
+    def get(url_name):
+        def flow():
+            response = client.get(reverse(url_name))
+            return b''.join(response.streaming_content) if response.streaming else response.content
+        return flow
+
+    return [
+        ('ARC user summary', get('summary')),
+        ('Search', lambda: client.post(reverse('search'), data={
+            'name_search_field': 'an', 'dob_search_field': '', 'home_postcode_search_field': '',
+            'care_location_postcode_search_field': '', 'reference_search_field': '',
+            'application_type_dropdown_search_field': 'All'})),
+        ('Applications summary', get('applications-summary')),
+        ('Applications in queue', get('applications-in-queue')),
+        ('Applications assigned', get('applications-assigned')),
+        ('Adult update export', lambda: ApplicationExporter.export_adult_update_application(assigned_adult_ids[0])),
+    ]
+
+
+def assign_applications(user, servers, count):
+    """
+    Assigns count submitted Nanny applications and adults to user, as the ARC user summary's "add" buttons would.
+    :return: ids of the assigned adults
+    """
+    from arc_application.models import Arc
+    from arc_application.services.db_gateways import NannyGatewayActions, HMGatewayActions
+
+    assigned_adult_ids = []
+
+    for gateway, status_field, id_field, app_type in ((NannyGatewayActions, 'application_status', 'application_id',
+                                                       'Nanny'),
+                                                      (HMGatewayActions, 'adult_status', 'adult_id', 'Adult update')):
+        table = servers[gateway].tables['application' if app_type == 'Nanny' else 'adult']
+
+        for record in [record for record in table if record[status_field] == 'SUBMITTED'][:count]:
+            record[status_field] = 'ARC_REVIEW'
+            Arc.objects.create(application_id=record[id_field], app_type=app_type, user_id=user.id,
+                               last_accessed=record['date_updated'][:10])
+
+            if app_type == 'Adult update':
+                assigned_adult_ids.append(record[id_field])
+
+    return assigned_adult_ids
+
+
+def run():
+    parser = argparse.ArgumentParser(description='Time ARC flows against fake gateways.')
+    parser.add_argument('--applications', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.01)
+    parser.add_argument('--jitter', type=float, default=0.005)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--assigned', type=int, default=5)
+    options = parser.parse_args()
+
+    from django.conf import settings
+    from django.contrib.auth.models import Group, User
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+    from arc_application.services import gateway_metrics
+    from arc_application.services.http_client import close_sessions
+    from .fake_gateway import build_fake_gateways
+
+    setup_test_environment()
+    old_database_name = connection.creation.create_test_db(verbosity=0)
+    servers = build_fake_gateways(options.applications, options.latency, options.jitter)
+    patchers = [mock.patch.object(gateway, 'target_url_prefix', server.url + '/api/v1/')
+                for gateway, server in servers.items()]
+    # Exports are timed up to, but not including, the queue they are published to
+    patchers.append(mock.patch('arc_application.messaging.application_exporter.'
+                               'adult_update_application_sqs_handler'))
+
+    try:
+        for server in servers.values():
+            server.__enter__()
+
+        for patcher in patchers:
+            patcher.start()
+
+        close_sessions()
+
+        user = User.objects.create_user('load-benchmark', password='load-benchmark')
+        user.groups.add(Group.objects.get_or_create(name=settings.ARC_GROUP)[0])
+        client = Client()
+        client.force_login(user)
+        assigned_adult_ids = assign_applications(user, servers, options.assigned)
+
+        print('{0} applications per gateway, {1:.0f}ms (+ up to {2:.0f}ms) gateway latency, {3} runs per flow'.format(
+            options.applications, options.latency * 1000, options.jitter * 1000, options.repeat))
+
+        for name, flow in build_flows(client, assigned_adult_ids):
+            gateway_metrics.reset()
+            timings = []
+
+            try:
+                for _ in range(options.repeat):
+                    started = time.perf_counter()
+                    flow()
+                    timings.append((time.perf_counter() - started) * 1000)
+            except Exception:
+                print('{0:<28} failed:'.format(name))
+                traceback.print_exc()
+                continue
+
+            gateway_calls = sum(call['calls'] for call in gateway_metrics.snapshot()['gateway_calls'])
+            report(name, timings)
+            print('{0:<28} {1:.1f} gateway calls per run'.format('', gateway_calls / options.repeat))
+
+    finally:
+        for patcher in reversed(patchers):
+            patcher.stop()
+
+        for server in servers.values():
+            server.__exit__(None, None, None)
+
+        close_sessions()
+        connection.creation.destroy_test_db(old_database_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', os.environ.get('PROJECT_SETTINGS'))
+
+    django.setup()
+
+    run()
@@ -0,0 +1,63 @@
+"""
+OFS-MORE-CCN3: Apply to be a Childminder Beta
+-- queue_depth.py --
+
+@author: Informed Solutions
+
+Benchmark of the daily counts in the applications in queue report, ApplicationsInQueueView.count_by_day, as the
+number of days reported on and the number of applications in the queue grow. Uses synthetic submission dates, so needs
+no database or gateways.
+
+Usage: PROJECT_SETTINGS=arc_service.settings.dev python -m arc_application.benchmarks.queue_depth \
+    [--days 365 1825 3650] [--applications 1000 10000] [--repeat 20] [--seed 1]
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+import django
+
+from .gateway_pool import report
+
+INITIAL_DATE = datetime(2020, 2, 19, 0, 0)
+
+
+def run():
+    parser = argparse.ArgumentParser(description='Time the daily counts of the applications in queue report.')
+    parser.add_argument('--days', type=int, nargs='+', default=[365, 1825, 3650])
+    parser.add_argument('--applications', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    options = parser.parse_args()
+
+    from arc_application.views.daily_reporting import ApplicationsInQueueView
+
+    view = ApplicationsInQueueView()
+    randomiser = random.Random(options.seed)
+
+    for applications in sorted(options.applications):
+        for days in sorted(options.days):
+            end_date = INITIAL_DATE + timedelta(days=days - 1)
+            # One list per service, with a few applications never submitted
+            services = [[INITIAL_DATE + timedelta(seconds=randomiser.randrange(days * 86400))
+                         if randomiser.random() > 0.01 else False for _ in range(applications)]
+                        for _ in range(3)]
+            timings = []
+
+            for _ in range(options.repeat):
+                started = time.perf_counter()
+                for dates in services:
+                    view.count_by_day(dates, INITIAL_DATE, end_date)
+                timings.append((time.perf_counter() - started) * 1000)
+
+            report('{0} apps, {1} days'.format(applications, days), timings)
+
+
+if __name__ == "__main__":
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', os.environ.get('PROJECT_SETTINGS'))
+
+    django.setup()
+
+    run()
@@ -0,0 +1,195 @@
+"""
+OFS-MORE-CCN3: Apply to be a Childminder Beta
+-- search.py --
+
+@author: Informed Solutions
+
+Benchmark of Childminder search at increasing volumes. Seeds synthetic applications, each with a personal details
+record, a current and sometimes a previous name, and one to three addresses, then times every search permutation
+handled by SearchService._search_childminders. Reports latency, queries per search, and the split between time spent
+in SQL and in Python. Runs against a throwaway test database.
+
+Usage: PROJECT_SETTINGS=arc_service.settings.dev python -m arc_application.benchmarks.search \
+    [--sizes 1000 10000 100000] [--repeat 20] [--seed 1] [--json results.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from datetime import timedelta
+
+import django
+from faker import Faker
+
+from .fake_gateway import _uuid
+from .gateway_pool import report
+
+APPLICATION_STATUSES = ('DRAFTING', 'SUBMITTED', 'ARC_REVIEW', 'FURTHER_INFORMATION', 'ACCEPTED')
+BATCH_SIZE = 2000
+
+
+def seed_applications(fake, start, count):
+    """
+    Adds count synthetic Childminder applications, numbered from start, with their names, personal details and
+    addresses. Rows are bulk created, so the search index is rebuilt separately.
+    :return: list of (first name, last name, birth day, birth month, birth year, postcode, reference), one per
+     application
+    """
+    from django.utils import timezone
+    from arc_application.models import Application, ApplicantHomeAddress, ApplicantName, ApplicantPersonalDetails
+
+    seeded = []
+
+    for batch_start in range(start, start + count, BATCH_SIZE):
+        applications, personal_details, names, addresses = [], [], [], []
+
+        for index in range(batch_start, min(batch_start + BATCH_SIZE, start + count)):
+            submitted = fake.date_time_between('-2y', '-1d', tzinfo=timezone.utc)
+            application = Application(application_id=_uuid(fake), application_reference='CM{0:07d}'.format(index),
+                                       application_status=fake.random_element(APPLICATION_STATUSES),
+                                       date_submitted=submitted,
+                                       date_updated=submitted + timedelta(hours=fake.random_int(1, 72)))
+            date_of_birth = fake.date_time_between('-70y', '-18y').date()
+            details = ApplicantPersonalDetails(personal_detail_id=_uuid(fake), application_id=application,
+                                               birth_day=date_of_birth.day, birth_month=date_of_birth.month,
+                                               birth_year=date_of_birth.year)
+            first_name, last_name = fake.first_name(), fake.last_name()
+            names.append(ApplicantName(name_id=_uuid(fake), application_id=application, personal_detail_id=details,
+                                       current_name=True, first_name=first_name, last_name=last_name))
+
+            if fake.boolean(chance_of_getting_true=20):
+                names.append(ApplicantName(name_id=_uuid(fake), application_id=application,
+                                           personal_detail_id=details, current_name=False, first_name=first_name,
+                                           last_name=fake.last_name()))
+
+            postcode = fake.postcode()
+            separate_childcare_address = fake.boolean(chance_of_getting_true=30)
+            addresses.append(ApplicantHomeAddress(home_address_id=_uuid(fake), application_id=application,
+                                                  personal_detail_id=details, postcode=postcode,
+                                                  current_address=True,
+                                                  childcare_address=not separate_childcare_address))
+
+            if separate_childcare_address:
+                addresses.append(ApplicantHomeAddress(home_address_id=_uuid(fake), application_id=application,
+                                                      personal_detail_id=details, postcode=fake.postcode(),
+                                                      current_address=False, childcare_address=True))
+
+            if fake.boolean(chance_of_getting_true=40):
+                addresses.append(ApplicantHomeAddress(home_address_id=_uuid(fake), application_id=application,
+                                                      personal_detail_id=details, postcode=fake.postcode(),
+                                                      current_address=False, childcare_address=False))
+
+            applications.append(application)
+            personal_details.append(details)
+            seeded.append((first_name, last_name, date_of_birth.day, date_of_birth.month, date_of_birth.year,
+                           postcode, application.application_reference))
+
+        Application.objects.bulk_create(applications)
+        ApplicantPersonalDetails.objects.bulk_create(personal_details)
+        ApplicantName.objects.bulk_create(names)
+        ApplicantHomeAddress.objects.bulk_create(addresses)
+
+    return seeded
+
+
+def build_permutations(fake, seeded):
+    """
+    Gets the searches to time, as (name, search arguments) pairs, with terms taken from a seeded application so every
+    search has at least one result.
+    """
+    first_name, last_name, birth_day, birth_month, birth_year, postcode, reference = fake.random_element(seeded)
+
+    return [
+        ('Name', (first_name, '', '', '', '')),
+        ('Partial name', (last_name[:3], '', '', '', '')),
+        ('DOB, 1 part', ('', str(birth_year), '', '', '')),
+        ('DOB, 2 parts', ('', '{0:02d}/{1:02d}'.format(birth_day, birth_month), '', '', '')),
+        ('DOB, 3 parts', ('', '{0:02d}/{1:02d}/{2}'.format(birth_day, birth_month, birth_year), '', '', '')),
+        ('Home postcode', ('', '', postcode, '', '')),
+        ('Home postcode district', ('', '', postcode.split()[0], '', '')),
+        ('Reference', ('', '', '', '', reference)),
+        ('Partial reference', ('', '', '', '', reference[:6])),
+        ('Name and DOB', (first_name, '{0:02d}/{1:02d}/{2}'.format(birth_day, birth_month, birth_year), '', '', '')),
+    ]
+
+
+def time_search(search_args, repeat):
+    """
+    Times repeat runs of a Childminder search.
+    :return: dict of wall-clock timings in milliseconds, with the queries, SQL time and Python time per search
+    """
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from arc_application.services.search_service import SearchService
+
+    timings, sql_ms = [], []
+
+    with CaptureQueriesContext(connection) as captured:
+        for _ in range(repeat):
+            first_query = len(captured)
+            started = time.perf_counter()
+            results = SearchService._search_childminders(*search_args)
+            timings.append((time.perf_counter() - started) * 1000)
+            sql_ms.append(sum(float(query['time']) for query in captured.captured_queries[first_query:]) * 1000)
+
+    return {
+        'timings_ms': timings,
+        'results': len(results),
+        'queries': len(captured) / repeat,
+        'sql_ms': statistics.mean(sql_ms),
+        'python_ms': statistics.mean(timings) - statistics.mean(sql_ms),
+    }
+
+
+def run():
+    parser = argparse.ArgumentParser(description='Time Childminder search permutations at increasing volumes.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help='Also write the results to this file, e.g. to compare against a later run')
+    options = parser.parse_args()
+
+    from django.db import connection
+    from django.test.utils import override_settings, setup_test_environment
+    from arc_application.services.search_index import rebuild_search_index
+
+    setup_test_environment()
+    old_database_name = connection.creation.create_test_db(verbosity=0)
+    fake = Faker('en_GB')
+    fake.seed(options.seed)
+    seeded = []
+    results = []
+
+    try:
+        # The index is rebuilt after seeding, so searches need not look for stale rows
+        with override_settings(SEARCH_INDEX_REFRESH_ON_SEARCH=False):
+            for size in sorted(options.sizes):
+                seeded += seed_applications(fake, len(seeded), size - len(seeded))
+
+                started = time.perf_counter()
+                rebuild_search_index()
+                print('{0} applications, search index rebuilt in {1:.0f}ms'.format(
+                    size, (time.perf_counter() - started) * 1000))
+
+                for name, search_args in build_permutations(fake, seeded):
+                    result = time_search(search_args, options.repeat)
+                    report(name, result['timings_ms'])
+                    print('{0:<28} {1} results, {2:.1f} queries, {3:.3f}ms SQL, {4:.3f}ms Python per search'.format(
+                        '', result['results'], result['queries'], result['sql_ms'], result['python_ms']))
+                    results.append(dict(result, applications=size, permutation=name))
+
+    finally:
+        connection.creation.destroy_test_db(old_database_name, verbosity=0)
+
+    if options.json:
+        with open(options.json, 'w') as json_file:
+            json.dump(results, json_file, indent=2)
+
+
+if __name__ == "__main__":
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', os.environ.get('PROJECT_SETTINGS'))
+
+    django.setup()
+
+    run()
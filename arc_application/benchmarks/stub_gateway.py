@@ -0,0 +1,82 @@
+"""
+OFS-MORE-CCN3: Apply to be a Childminder Beta
+-- stub_gateway.py --
+
+@author: Informed Solutions
+
+Minimal HTTP/1.1 gateway stand-in for benchmarking the gateway client without the real services.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+
+class StubGatewayRequestHandler(BaseHTTPRequestHandler):
+    """
+    Answers every verb with a small JSON body, keeping the connection open between requests.
+    """
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; without this Nagle's algorithm stalls keep-alive responses.
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._respond(200, {'application_id': self.path.rstrip('/').split('/')[-1]})
+
+    def do_POST(self):
+        self._respond(201, {})
+
+    def do_PUT(self):
+        self._respond(200, {})
+
+    def do_PATCH(self):
+        self._respond(200, {})
+
+    def do_DELETE(self):
+        self._respond(204, None)
+
+    def log_message(self, format, *args):
+        # Keep benchmark output readable.
+        pass
+
+    def _respond(self, status_code, record):
+        # Drain any request body so the connection can be re-used.
+        content_length = int(self.headers.get('Content-Length') or 0)
+        if content_length:
+            self.rfile.read(content_length)
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        body = json.dumps(record).encode() if record is not None else b''
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubGatewayServer(ThreadingMixIn, HTTPServer):
+    """
+    Threaded stub server bound to a localhost port, ephemeral unless given. Use as a context manager to run it in the background.
+    """
+    daemon_threads = True
+
+    def __init__(self, handler_class=StubGatewayRequestHandler, latency=0.0, port=0):
+        super().__init__(('127.0.0.1', port), handler_class)
+        self.latency = latency
+        self.__thread = None
+
+    @property
+    def url(self):
+        return 'http://{0}:{1}'.format(*self.server_address)
+
+    def __enter__(self):
+        self.__thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.__thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+        self.server_close()
@@ -1,9 +1,15 @@
+import csv
+import itertools
+from collections import OrderedDict
+from datetime import datetime
+
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponseRedirect
+from django.http import HttpResponseRedirect, StreamingHttpResponse
 from django.shortcuts import render
 
 from .services.search_service import SearchService
+from .utils import Echo
 from .views.base import has_group
 from .forms.childminder_forms.form import SearchForm
 from .models import ApplicantName, ApplicantPersonalDetails, Application
@@ -57,12 +63,27 @@ def search(request):
                     context['error_text'] = 'Please use at least one filter'
                     return render(request, SEARCH_TEMPLATE_PATH, context)
 
+                if request.POST.get('export') == 'csv':
+                    return export_search_results(name, dob, home_postcode, care_location_postcode, reference,
+                                                 application_type)
+
+                try:
+                    page = max(int(request.POST.get('page', 1)), 1)
+                except ValueError:
+                    page = 1
+
                 search_results = SearchService.search(name, dob, home_postcode, care_location_postcode, reference,
-                                                      application_type)
+                                                      application_type, page=page,
+                                                      cache_scope='arc' if arc_user else 'contact-centre')
+                context['failed_sources'] = getattr(search_results, 'failed_sources', [])
 
                 if search_results is not None and len(search_results) > 0:
                     context['empty'] = False
                     context['app'] = search_results
+                    context['more_results_available'] = getattr(search_results, 'more_results_available', False)
+                    context['page'] = page
+                    context['previous_page'] = page - 1 if page > 1 else None
+                    context['next_page'] = page + 1 if getattr(search_results, 'has_next_page', False) else None
 
                 else:
                     context['empty_error'] = True
@@ -74,6 +95,43 @@ def search(request):
         return HttpResponseRedirect(settings.URL_PREFIX + '/login/')
 
 
+def export_search_results(name, dob, home_postcode, care_location_postcode, reference, application_type):
+    """
+    Streams every result of a search as a CSV download, writing each row as its source yields it.
+    :return: StreamingHttpResponse of the CSV
+    """
+    csv_columns = OrderedDict([('application_reference', 'Application Reference'),
+                               ('application_type', 'Application Type'),
+                               ('applicant_name', 'Name'),
+                               ('date_submitted', 'Date Submitted'),
+                               ('date_accessed', 'Date Accessed'),
+                               ('submission_type', 'Submission Type')])
+    writer = csv.DictWriter(Echo(), fieldnames=list(csv_columns), extrasaction='ignore')
+    failed_sources = []
+    search_results = SearchService.iter_search(name, dob, home_postcode, care_location_postcode, reference,
+                                               application_type, failed_sources=failed_sources)
+
+    response = StreamingHttpResponse(itertools.chain([writer.writerow(csv_columns)],
+                                                     (writer.writerow(result) for result in search_results),
+                                                     _export_failure_rows(writer, failed_sources)),
+                                     content_type="text/csv")
+    response['Content-Disposition'] = 'attachment; filename="Search_Results_{}.csv"'.format(
+        datetime.now().strftime("%Y%m%dT%H%M"))
+
+    return response
+
+
+def _export_failure_rows(writer, failed_sources):
+    """
+    Generator writing, once every result has been exported, a final row naming the sources that could not be searched,
+    the export having been streamed before their failure was known.
+    """
+    if failed_sources:
+        yield writer.writerow({'application_reference': '{0} applications could not be searched at the moment, so '
+                                                        'are missing from this export'.format(
+                                                            ', '.join(failed_sources))})
+
+
 def format_data(results):
     """
     This adds the missing data from the objects returned from the search
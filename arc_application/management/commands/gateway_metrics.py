@@ -0,0 +1,62 @@
+"""
+OFS-MORE-CCN3: Apply to be a Childminder Beta
+-- gateway_metrics.py --
+
+@author: Informed Solutions
+
+Management command requesting ARC pages in-process and reporting the gateway calls each one makes. Only the requests
+the command makes itself are measured: the metrics of a running server are held in that server's processes, and are
+read from the staff-only /gateway-metrics/ view (see views/gateway_metrics.py).
+"""
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from ...services import gateway_metrics
+
+
+class Command(BaseCommand):
+    help = ('Requests each of the given ARC page paths as the given user, within this process, and reports the '
+            'gateway calls, latency and payload per page and per (gateway, verb, endpoint) of those requests only. '
+            'The gateways configured in settings are called. This does not read the metrics of a running server; '
+            'for live numbers, see the staff-only /gateway-metrics/ JSON view.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='Page paths to request, e.g. /arc/summary/')
+        parser.add_argument('--username', required=True, help='ARC user to request the pages as')
+        parser.add_argument('--repeat', type=int, default=1, help='Number of times to request each page')
+        parser.add_argument('--json', action='store_true', help='Output the raw metrics snapshot as JSON')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError('User "{}" does not exist'.format(options['username']))
+
+        client = Client()
+        client.force_login(user)
+        gateway_metrics.reset()
+
+        for path in options['paths']:
+            for _ in range(options['repeat']):
+                client.get(path)
+
+        snapshot = gateway_metrics.snapshot()
+
+        if options['json']:
+            self.stdout.write(json.dumps(snapshot, indent=2))
+            return
+
+        self.stdout.write('{:<48} {:>8} {:>14} {:>14}'.format('Page', 'Requests', 'Calls/request', 'ms/request'))
+        for page in snapshot['pages']:
+            self.stdout.write('{page:<48} {requests:>8} {gateway_calls_per_request:>14} '
+                              '{gateway_ms_per_request:>14}'.format(**page))
+
+        self.stdout.write('')
+        self.stdout.write('{:<24} {:<10} {:<32} {:>6} {:>6} {:>10} {:>10} {:>12}'.format(
+            'Gateway', 'Verb', 'Endpoint', 'Calls', 'Errors', 'Mean ms', 'Max ms', 'Bytes'))
+        for call in snapshot['gateway_calls']:
+            self.stdout.write('{gateway:<24} {verb:<10} {endpoint:<32} {calls:>6} {errors:>6} {mean_ms:>10} '
+                              '{max_ms:>10} {payload_bytes:>12}'.format(**call))
@@ -0,0 +1,40 @@
+"""
+OFS-MORE-CCN3: Apply to be a Childminder Beta
+-- rebuild_search_index.py --
+
+@author: Informed Solutions
+
+Management command rebuilding the Childminder search index from the Childminder tables.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...services.search_index import rebuild_search_index, refresh_stale_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the Childminder search index searched by the contact centre and ARC search page.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Number of applications indexed at a time')
+        parser.add_argument('--stale-only', action='store_true',
+                            help='Only index applications not yet indexed or updated since they were last indexed')
+        parser.add_argument('--interval', type=float,
+                            help='With --stale-only, keep refreshing the index, waiting this many seconds between '
+                                 'refreshes, until stopped')
+
+    def handle(self, *args, **options):
+        if not options['stale_only']:
+            indexed = rebuild_search_index(batch_size=options['batch_size'])
+            self.stdout.write('Indexed {0} applications'.format(indexed))
+            return
+
+        while True:
+            refresh_stale_search_index()
+            self.stdout.write('Refreshed stale search index rows')
+
+            if not options['interval']:
+                return
+
+            time.sleep(options['interval'])
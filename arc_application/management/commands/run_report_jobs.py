@@ -0,0 +1,43 @@
+"""
+OFS-MORE-CCN3: Apply to be a Childminder Beta
+-- run_report_jobs.py --
+
+@author: Informed Solutions
+
+Management command generating the daily reports requested through the reporting views, see
+arc_application.services.report_jobs.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...services.report_jobs import claim_report_job, generate_report_job, purge_report_jobs, \
+    requeue_stale_report_jobs
+from ...views.daily_reporting import REPORT_VIEWS
+
+
+class Command(BaseCommand):
+    help = 'Generates queued daily reports, polling for new requests until stopped.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Generate the reports queued now, then stop')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds between polls for new requests')
+
+    def handle(self, *args, **options):
+        while True:
+            purge_report_jobs()
+            requeue_stale_report_jobs()
+            job = claim_report_job()
+
+            while job is not None:
+                view = REPORT_VIEWS[job.report]()
+                view.set_report_filters(start_date=job.start_date, end_date=job.end_date,
+                                        services=job.services.split(','))
+                generate_report_job(job, view.csv_columns, view.get_report_rows(), view.get_report_file_name())
+                self.stdout.write('Report job {0} ({1}): {2}'.format(job.job_id, job.report, job.status))
+                job = claim_report_job()
+
+            if options['once']:
+                return
+
+            time.sleep(options['interval'])
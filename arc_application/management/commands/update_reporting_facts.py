@@ -0,0 +1,43 @@
+"""
+OFS-MORE-CCN3: Apply to be a Childminder Beta
+-- update_reporting_facts.py --
+
+@author: Informed Solutions
+
+Management command updating the daily totals read by the daily reporting views.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...services.reporting_facts import REPORTING_SERVICES, rebuild_reporting_facts, update_reporting_facts
+
+
+class Command(BaseCommand):
+    help = 'Counts the timeline events logged since the daily reporting totals were last updated.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--service', action='append', choices=REPORTING_SERVICES,
+                            help='Only update the totals of this service, may be given more than once')
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Discard the stored totals and recount every timeline event')
+        parser.add_argument('--interval', type=float,
+                            help='Keep updating the totals, waiting this many seconds between updates, until stopped')
+
+    def handle(self, *args, **options):
+        services = options['service'] or REPORTING_SERVICES
+
+        if options['rebuild']:
+            rebuild_reporting_facts(services)
+            self.stdout.write('Rebuilt reporting totals of {0}'.format(', '.join(services)))
+            if not options['interval']:
+                return
+
+        while True:
+            update_reporting_facts(services)
+            self.stdout.write('Updated reporting totals of {0}'.format(', '.join(services)))
+
+            if not options['interval']:
+                return
+
+            time.sleep(options['interval'])
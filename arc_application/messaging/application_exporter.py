@@ -167,72 +167,67 @@ class ApplicationExporter:
 
         export = {}
 
-        application = NannyGatewayActions().read('application', params={'application_id': application_id}).record
-
-        export['application'] = json.dumps(application)
+        application_params = {'application_id': application_id}
+
+        # The records below are independent of one another, so are fetched from the gateways concurrently.
+        (application, childcare_addresses, applicant_personal_details, applicant_home_address, childcare_training,
+         criminal_record_check, first_aid_training, insurance_declaration, previous_registration_details,
+         previous_names, previous_addresses, user_details) = NannyGatewayActions().gather([
+            ('read', 'application', application_params),
+            ('list', 'childcare-address', application_params),
+            ('read', 'applicant-personal-details', application_params),
+            ('read', 'applicant-home-address', application_params),
+            ('read', 'childcare-training', application_params),
+            ('read', 'dbs-check', application_params),
+            ('read', 'first-aid', application_params),
+            ('read', 'insurance-cover', application_params),
+            ('read', 'previous-registration-details', application_params),
+            ('list', 'previous-name', application_params),
+            ('list', 'previous-address', {'person_id': application_id, 'person_type': 'APPLICANT'}),
+            (IdentityGatewayActions(), 'read', 'user', application_params),
+        ], raise_errors=True)
+
+        export['application'] = json.dumps(application.record)
 
         # Try fetch childcare address if it exists
-        childcare_addresses = NannyGatewayActions().list('childcare-address',
-                                                         params={'application_id': application_id})
-
         if childcare_addresses.status_code == 404:
             export['childcare_addresses'] = json.dumps({})
         else:
             export['childcare_addresses'] = json.dumps(childcare_addresses.record)
 
-        applicant_personal_details = NannyGatewayActions().read('applicant-personal-details',
-                                                                params={'application_id': application_id}).record
-        applicant_personal_details  = get_title_data(applicant_personal_details)
+        applicant_personal_details = get_title_data(applicant_personal_details.record)
         export['applicant_personal_details'] = json.dumps(applicant_personal_details)
 
-        applicant_home_address = NannyGatewayActions().read('applicant-home-address',
-                                                            params={'application_id': application_id}).record
-        export['applicant_home_address'] = json.dumps(applicant_home_address)
+        export['applicant_home_address'] = json.dumps(applicant_home_address.record)
 
-        childcare_training = NannyGatewayActions().read('childcare-training',
-                                                        params={'application_id': application_id}).record
-        export['childcare_training'] = json.dumps(childcare_training)
+        export['childcare_training'] = json.dumps(childcare_training.record)
 
-        criminal_record_check = NannyGatewayActions().read('dbs-check',
-                                                           params={'application_id': application_id}).record
-        export['criminal_record_check'] = json.dumps(criminal_record_check)
+        export['criminal_record_check'] = json.dumps(criminal_record_check.record)
 
-        first_aid_training = NannyGatewayActions().read('first-aid', params={'application_id': application_id}).record
-        export['first_aid_training'] = json.dumps(first_aid_training)
+        export['first_aid_training'] = json.dumps(first_aid_training.record)
 
-        insurance_declaration = NannyGatewayActions().read('insurance-cover',
-                                                           params={'application_id': application_id}).record
-        export['insurance_declaration'] = json.dumps(insurance_declaration)
+        export['insurance_declaration'] = json.dumps(insurance_declaration.record)
 
         # In the event no previous registrations, names or addresses have been listed, the below methods will 404.
         # Explicit case handling is included for this. Other errors (500 etc.) will cause exception to be raised
         # as the record property will be absent.
 
-        previous_registration_details = NannyGatewayActions().read('previous-registration-details',
-                                                                       params={'application_id': application_id})
-
         if previous_registration_details.status_code == 404:
             export['previous_registration'] = json.dumps({})
         else:
             export['previous_registration'] = json.dumps(previous_registration_details.record)
 
-        previous_names = NannyGatewayActions().list('previous-name', params={'application_id': application_id})
-
         if previous_names.status_code == 404:
             export['applicant_previous_names'] = json.dumps({})
         else:
             export['applicant_previous_names'] = json.dumps(previous_names.record)
 
-        previous_addresses = NannyGatewayActions().list('previous-address',
-                                   params={'person_id': application_id, 'person_type': 'APPLICANT'})
-
         if previous_addresses.status_code == 404:
             export['applicant_previous_addresses'] = json.dumps({})
         else:
             export['applicant_previous_addresses'] = json.dumps(previous_addresses.record)
 
-        user_details = IdentityGatewayActions().read('user', params={'application_id': application_id}).record
-        export['user_details'] = json.dumps(user_details)
+        export['user_details'] = json.dumps(user_details.record)
 
         documents = {
             'CR': DocumentGenerator.get_full_nanny_application_summary(application_id, application_reference)
@@ -255,9 +250,30 @@ class ApplicationExporter:
         adult_record = HMGatewayActions().read('adult', params={'adult_id': adult_id}).record
 
         dpa_auth_id = adult_record['token_id']
-        dpa_record = HMGatewayActions().read('dpa-auth', params={'token_id': dpa_auth_id}).record
+        adult_params = {'adult_id': adult_id}
+        dpa_params = {'token_id': dpa_auth_id}
+
+        # The remaining records depend only on the adult record, so are fetched from the gateway concurrently.
+        calls = {
+            'dpa-auth': ('read', 'dpa-auth', dpa_params),
+            'setting-address': ('read', 'setting-address', dpa_params),
+            'adult-in-home-address': ('list', 'adult-in-home-address', adult_params),
+            'previous-name': ('list', 'previous-name', adult_params),
+            'previous-address': ('list', 'previous-address', adult_params),
+            'previous-registration': ('list', 'previous-registration', adult_params),
+        }
+
+        if adult_record['has_serious_illness']:
+            calls['serious-illness'] = ('list', 'serious-illness', adult_params)
+
+        if adult_record['has_hospital_admissions']:
+            calls['hospital-admissions'] = ('list', 'hospital-admissions', adult_params)
+
+        responses = dict(zip(calls, HMGatewayActions().gather(calls.values(), raise_errors=True)))
+
+        dpa_record = responses['dpa-auth'].record
 
-        setting_address_record = HMGatewayActions().read('setting-address', params={'token_id': dpa_auth_id}).record
+        setting_address_record = responses['setting-address'].record
 
         urn = dpa_record['URN']
         registration_id = dpa_record['registration_id']
@@ -277,7 +293,7 @@ class ApplicationExporter:
         additional_adult_details_export['current_treatments'] = current_illnesses
 
         if adult_record['has_serious_illness']:
-            serious_illnesses_record = HMGatewayActions().list('serious-illness', params={'adult_id': adult_id}).record
+            serious_illnesses_record = responses['serious-illness'].record
             serious_illnesses = json.dumps([{'fields': r} for r in serious_illnesses_record])
         else:
             serious_illnesses = json.dumps([])
@@ -285,7 +301,7 @@ class ApplicationExporter:
         adult_details_export['fields']['serious_illness'] = adult_record['has_serious_illness']
         additional_adult_details_export['serious_illness'] = serious_illnesses
 
-        home_address_response = HMGatewayActions().list('adult-in-home-address', params={'adult_id': adult_id})
+        home_address_response = responses['adult-in-home-address']
 
         if home_address_response.status_code == 200:
             additional_adult_details_export['current_address'] = json.dumps(
@@ -294,7 +310,7 @@ class ApplicationExporter:
             additional_adult_details_export['current_address'] = json.dumps([])
 
         if adult_record['has_hospital_admissions']:
-            hospital_admissions_record = HMGatewayActions().list("hospital-admissions", params={'adult_id': adult_id}).record
+            hospital_admissions_record = responses['hospital-admissions'].record
             hospital_admissions = json.dumps([{'fields': r} for r in hospital_admissions_record])
         else:
             hospital_admissions = json.dumps([])
@@ -302,21 +318,21 @@ class ApplicationExporter:
         adult_details_export['fields']['hospital_admission'] = adult_record['has_hospital_admissions']
         additional_adult_details_export['hospital_admissions'] = hospital_admissions
 
-        previous_names_response = HMGatewayActions().list('previous-name', params={'adult_id': adult_id})
+        previous_names_response = responses['previous-name']
 
         if previous_names_response.status_code == 200:
             additional_adult_details_export['previous_names'] = json.dumps([{'fields': r} for r in previous_names_response.record])
         else:
             additional_adult_details_export['previous_names'] = json.dumps([])
 
-        previous_address_response = HMGatewayActions().list('previous-address', params={'adult_id': adult_id})
+        previous_address_response = responses['previous-address']
 
         if previous_address_response.status_code == 200:
             additional_adult_details_export['previous_address'] = json.dumps([{'fields': r} for r in previous_address_response.record])
         else:
             additional_adult_details_export['previous_address'] = json.dumps([])
 
-        previous_reg_response = HMGatewayActions().list('previous-registration', params={'adult_id': adult_id})
+        previous_reg_response = responses['previous-registration']
 
         if previous_reg_response.status_code == 200:
             additional_adult_details_export['previous_registrations'] = json.dumps([{'fields': r} for r in previous_reg_response.record])
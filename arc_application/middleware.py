@@ -5,6 +5,11 @@ OFS-MORE-CCN3: Apply to be a Childminder Beta
 @author: Informed Solutions
 """
 from django.conf import settings
+from django.shortcuts import render
+
+from .services import gateway_metrics
+from .services.db_gateways import activate_request_cache, deactivate_request_cache
+from .services.http_client import CircuitOpenError
 
 
 def globalise_url_prefix(request):
@@ -38,3 +43,69 @@ def set_tab_visibility(request):
     """
     is_arc_reviewer = request.user.groups.filter(name=settings.ARC_GROUP).exists()
     return {'SHOW_REVIEW_TAB': is_arc_reviewer, 'SHOW_DBS_UPLOAD_TAB': is_arc_reviewer}
+
+
+class GatewayRequestCacheMiddleware:
+    """
+    Middleware class binding a gateway read-through identity map to the lifecycle of each request, so repeat reads of
+    the same Nanny/HM/Identity gateway record within one request are served from memory.
+    Opt-in via the ENABLE_GATEWAY_REQUEST_CACHE setting.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.ENABLE_GATEWAY_REQUEST_CACHE:
+            return self.get_response(request)
+
+        activate_request_cache()
+
+        try:
+            return self.get_response(request)
+        finally:
+            deactivate_request_cache()
+
+
+# Page the gateway calls of requests to unnamed or unresolved urls are attributed to
+UNRESOLVED_PAGE = '<unresolved>'
+
+
+class GatewayMetricsMiddleware:
+    """
+    Middleware class attributing the gateway calls made while serving each request to its page (the resolved url
+    name), see services.gateway_metrics. Requests to unnamed or unresolved urls, e.g. 404s, share one page so that
+    arbitrary paths do not each add a page.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        gateway_metrics.start_page()
+
+        try:
+            return self.get_response(request)
+        finally:
+            resolver_match = getattr(request, 'resolver_match', None)
+            gateway_metrics.end_page(resolver_match.url_name if resolver_match and resolver_match.url_name
+                                     else UNRESOLVED_PAGE)
+
+
+class GatewayUnavailableMiddleware:
+    """
+    Middleware class serving a service unavailable page, rather than an error, for requests that needed a backing
+    service whose circuit breaker is open, see services.http_client.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, CircuitOpenError):
+            return render(request, '503.html', {}, status=503)
+
+        return None
@@ -26,4 +26,7 @@ from .previous_name import *
 from .child import *
 from .child_address import *
 from .childbase import *
-from .capita_dbs_file import *
\ No newline at end of file
+from .capita_dbs_file import *
+from .childminder_search_index import *
+from .reporting_fact import *
+from .report_job import *
@@ -0,0 +1,52 @@
+from django.db import models
+from .application import Application
+
+
+class ChildminderSearchIndex(models.Model):
+    """
+    Model for CHILDMINDER_SEARCH_INDEX table: one denormalised row per Childminder application, holding the normalised
+    values searched by SearchService so a search reads this table alone. Kept current by
+    arc_application.services.search_index.
+    """
+    application_id = models.OneToOneField(Application, on_delete=models.CASCADE, primary_key=True,
+                                          related_name='search_index', db_column='application_id')
+    application_reference = models.CharField(max_length=9, blank=True, null=True, db_index=True)
+    application_status = models.CharField(max_length=50, blank=True)
+    date_submitted = models.DateTimeField(blank=True, null=True, db_index=True)
+    date_updated = models.DateTimeField(blank=True, null=True)
+    applicant_name = models.CharField(max_length=201, blank=True)
+    # Whether the applicant has any name and any childcare address, only such applications being searchable. Names and
+    # postcodes are matched against the application's ChildminderSearchToken rows.
+    has_name = models.BooleanField(default=False)
+    has_childcare_address = models.BooleanField(default=False)
+
+    birth_day = models.IntegerField(blank=True, null=True, db_index=True)
+    birth_month = models.IntegerField(blank=True, null=True, db_index=True)
+    birth_year = models.IntegerField(blank=True, null=True, db_index=True)
+
+    class Meta:
+        db_table = 'CHILDMINDER_SEARCH_INDEX'
+
+
+class ChildminderSearchToken(models.Model):
+    """
+    Model for CHILDMINDER_SEARCH_TOKEN table: one row per name word or postcode of a Childminder application, so that
+    SearchService matches each search term against the start of an indexed token rather than scanning every row.
+    """
+    NAME = 'name'
+    HOME_POSTCODE = 'home_postcode'
+    CARE_POSTCODE = 'care_postcode'
+    FIELD_CHOICES = (
+        (NAME, 'Name'),
+        (HOME_POSTCODE, 'Home postcode'),
+        (CARE_POSTCODE, 'Childcare postcode'),
+    )
+
+    search_index = models.ForeignKey(ChildminderSearchIndex, on_delete=models.CASCADE, related_name='tokens',
+                                     db_column='application_id')
+    field = models.CharField(max_length=20, choices=FIELD_CHOICES)
+    # Lower case word of a first or last name, or upper case postcode without spaces
+    token = models.CharField(max_length=100, db_index=True)
+
+    class Meta:
+        db_table = 'CHILDMINDER_SEARCH_TOKEN'
@@ -0,0 +1,38 @@
+from uuid import uuid4
+
+from django.conf import settings
+from django.db import models
+
+
+class ReportJob(models.Model):
+    """
+    Model for REPORT_JOB table: a request for a daily reporting CSV, generated in the background by the
+    run_report_jobs management command. See arc_application.services.report_jobs.
+    """
+    QUEUED = 'QUEUED'
+    RUNNING = 'RUNNING'
+    COMPLETE = 'COMPLETE'
+    FAILED = 'FAILED'
+    STATUSES = (
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (COMPLETE, 'Complete'),
+        (FAILED, 'Failed'),
+    )
+
+    job_id = models.UUIDField(primary_key=True, default=uuid4)
+    report = models.CharField(max_length=50)
+    # Days and services reported on, as the reporting views' start, end and service query parameters
+    start_date = models.DateField(blank=True, null=True)
+    end_date = models.DateField(blank=True, null=True)
+    services = models.CharField(max_length=100, blank=True)
+    status = models.CharField(choices=STATUSES, max_length=20, default=QUEUED)
+    requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, blank=True, null=True)
+    date_requested = models.DateTimeField(auto_now_add=True, db_index=True)
+    date_started = models.DateTimeField(blank=True, null=True)
+    date_completed = models.DateTimeField(blank=True, null=True)
+    # Name of the generated CSV, as downloaded by the user
+    file_name = models.CharField(max_length=100, blank=True)
+
+    class Meta:
+        db_table = 'REPORT_JOB'
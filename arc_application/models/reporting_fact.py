@@ -0,0 +1,28 @@
+from django.db import models
+
+
+class ReportingFact(models.Model):
+    """
+    Model for REPORTING_FACT table: the number of timeline events of one kind, e.g. applications returned, logged for
+    one service on one day. Kept current by arc_application.services.reporting_facts.
+    """
+    date = models.DateField()
+    service = models.CharField(max_length=50)
+    metric = models.CharField(max_length=50)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'REPORTING_FACT'
+        unique_together = ('date', 'service', 'metric')
+
+
+class ReportingWatermark(models.Model):
+    """
+    Model for REPORTING_WATERMARK table: the day, for each service, from which REPORTING_FACT rows are next recounted,
+    or null to count every timeline event. Locked while the service's rows are recounted.
+    """
+    service = models.CharField(max_length=50, primary_key=True)
+    aggregated_to = models.DateField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'REPORTING_WATERMARK'
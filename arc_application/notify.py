@@ -9,9 +9,10 @@ Handler for dispatching email notifications via the GOV.UK notify gateway api.
 
 import json
 
-import requests
 from django.conf import settings
 
+from .services import http_client
+
 
 def send_email(email, personalisation, template_id, nanny_email=False, hm_email=False):
     """
@@ -42,9 +43,9 @@ def send_email(email, personalisation, template_id, nanny_email=False, hm_email=
     elif hm_email:
         notification_request['service_name'] = 'New adults in the home'
 
-    r = requests.post(base_request_url + '/api/v1/notifications/email/',
-                      json.dumps(notification_request),
-                      headers=header)
+    r = http_client.request('notify', 'post', base_request_url + '/api/v1/notifications/email/',
+                            data=json.dumps(notification_request),
+                            headers=header)
 
     return r
 
@@ -70,6 +71,6 @@ def send_text(phone, personalisation, template_id):
         'personalisation': personalisation,
         'templateId': template_id
     }
-    r = requests.post(base_request_url + '/api/v1/notifications/sms/', json.dumps(notification_request),
-                      headers=header)
+    r = http_client.request('notify', 'post', base_request_url + '/api/v1/notifications/sms/',
+                            data=json.dumps(notification_request), headers=header)
     return r
@@ -33,16 +33,40 @@ class GenericApplicationHandler:
         if not assigned_applications.exists():
             return table_data
 
+        assigned_applications = list(assigned_applications)
+
+        # Fetch the gateway records for every assigned application up front, rather than a few reads per row
+        adult_records, dpa_auth_records = {}, {}
+        nanny_records, personal_details_records = {}, {}
+
+        if settings.ENABLE_HM:
+            adult_ids = [assigned_application.application_id for assigned_application in assigned_applications
+                         if assigned_application.app_type == 'Adult update']
+            adult_records = HMGatewayActions().read_many('adult', adult_ids)
+            dpa_auth_records = HMGatewayActions().read_many(
+                'dpa-auth', [adult_record['token_id'] for adult_record in adult_records.values()])
+
+        if settings.ENABLE_NANNIES:
+            nanny_ids = [assigned_application.application_id for assigned_application in assigned_applications
+                         if assigned_application.app_type == 'Nanny']
+            nanny_records = NannyGatewayActions().read_many('application', nanny_ids)
+            personal_details_records = NannyGatewayActions().read_many('applicant-personal-details', nanny_ids)
+
         for assigned_application in assigned_applications:
+            application_id = str(assigned_application.application_id)
+
             if assigned_application.app_type == 'Childminder':
                 table_data.append(self.__get_childminder_table_data(assigned_application.application_id))
 
             if settings.ENABLE_HM  and assigned_application.app_type == 'Adult update':
-                table_data.append(self.__get_adult_update_table_data(assigned_application.application_id))
+                adult_record = adult_records[application_id]
+                table_data.append(self.__get_adult_update_table_data(
+                    adult_record, dpa_auth_records[str(adult_record['token_id'])]))
                 
             if settings.ENABLE_NANNIES:
                 if assigned_application.app_type == 'Nanny':
-                    table_data.append(self.__get_nanny_table_data(assigned_application.application_id))
+                    table_data.append(self.__get_nanny_table_data(
+                        nanny_records[application_id], personal_details_records[application_id]))
 
         return table_data
 
@@ -55,18 +79,14 @@ class GenericApplicationHandler:
     def _list_tasks_for_review(self):
         raise NotImplementedError
 
-    def __get_nanny_table_data(self, application_id):
+    def __get_nanny_table_data(self, application_record, personal_details_record):
         row_data = dict()
 
-        application_record = NannyGatewayActions().read('application', params={'application_id': str(application_id)}).record
         row_data['application_id'] = application_record['application_id']
         row_data['date_submitted'] = datetime.strptime(application_record['date_submitted'][:10], '%Y-%m-%d').strftime('%d/%m/%Y')
         row_data['last_accessed'] = datetime.strptime(application_record['date_updated'][:10], '%Y-%m-%d').strftime('%d/%m/%Y')
         row_data['app_type'] = 'Nanny'
 
-        personal_details_record = NannyGatewayActions().read(
-            'applicant-personal-details', params={'application_id': str(application_id)}).record
-
         row_data['applicant_name'] = personal_details_record['first_name'] + ' ' + personal_details_record['last_name']
 
         return row_data
@@ -86,11 +106,9 @@ class GenericApplicationHandler:
 
         return row_data
 
-    def __get_adult_update_table_data(self, application_id):
+    def __get_adult_update_table_data(self, adult_record, dpa_auth_record):
         row_data = dict()
 
-        adult_record = HMGatewayActions().read('adult',
-                                                        params={'adult_id': str(application_id)}).record
         row_data['application_id'] = adult_record['adult_id']
         row_data['date_submitted'] = datetime.strptime(adult_record['date_submitted'][:10], '%Y-%m-%d').strftime(
             '%d/%m/%Y')
@@ -102,7 +120,6 @@ class GenericApplicationHandler:
                 '%d/%m/%Y')
         row_data['app_type'] = 'Adult update'
 
-        dpa_auth_record = HMGatewayActions().read('dpa-auth', params={'token_id': adult_record['token_id']}).record
         applicant_name = dpa_auth_record['first_name'] + " " + dpa_auth_record['last_name']
 
         row_data['applicant_name'] = applicant_name
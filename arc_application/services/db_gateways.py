@@ -1,134 +1,592 @@
+import contextlib
+import copy
+import functools
+import hashlib
 import json
 import logging
 import os
-from unittest.mock import MagicMock
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 from django.conf import settings
+from django.core.cache import caches
+
+from . import gateway_metrics
+from .http_client import request
 
 logger = logging.getLogger()
 
 
+def _dispatch(func):
+    """
+    Decorator function for wrapping REST methods.
+    This will wrap the function, record its latency, payload size and outcome in gateway_metrics, and create a log
+    entry if the database API returns an unexpected status code.
+    Applied once, when DBGatewayActions is defined, rather than to every new instance, and beneath the cache
+    decorators, so only calls actually made to the gateway are recorded.
+    :param func: Function to be decorated.
+    :return: log_wrapper: Decorated function.
+    """
+
+    @functools.wraps(func)
+    def log_wrapper(self, endpoint, *args, **kwargs):
+        expected_db_api_responses = (200, 201, 204, 404)
+        started = time.perf_counter()
+
+        try:
+            response = func(self, endpoint, *args, **kwargs)
+        except Exception:
+            gateway_metrics.record_call(type(self).__name__, func.__name__, endpoint,
+                                        (time.perf_counter() - started) * 1000, error=True)
+            raise
+
+        content = getattr(response, 'content', None)
+        gateway_metrics.record_call(type(self).__name__, func.__name__, endpoint,
+                                    (time.perf_counter() - started) * 1000,
+                                    payload_bytes=len(content) if isinstance(content, bytes) else 0,
+                                    error=response.status_code not in expected_db_api_responses)
+
+        # If unexpected response, enter a WARNING log.
+        if response.status_code not in expected_db_api_responses:
+            verb_name = func.__name__
+            params = kwargs['params'] if 'params' in kwargs else args[0]
+            endpoint_lookup_field = self._endpoint_pk_dict[endpoint]
+
+            if verb_name in ('list', '_list_page'):
+                logger.error(
+                    ('!GATEWAY ERROR! "{}" request to API endpoint "{}" with {}: {} returned {} status code '
+                     '- see the Gateway logs for traceback').format(
+                        verb_name, endpoint, list(params.keys()), list(params.values()),
+                        response.status_code)
+                )
+
+            else:
+                logger.error(
+                    ('!GATEWAY ERROR! "{}" request to API endpoint "{}" with {}: {} returned {} status code '
+                     '- see the Gateway logs for traceback').format(
+                        verb_name, endpoint, endpoint_lookup_field, params[endpoint_lookup_field],
+                        response.status_code)
+                )
+
+            logger.info('!GATEWAY ERROR! Targeted url: {}'.format(response.url))
+
+        return response
+
+    return log_wrapper
+
+
+_request_cache = threading.local()
+
+
+def activate_request_cache():
+    """
+    Starts a request-scoped identity map for gateway reads on the current thread.
+    Until deactivate_request_cache is called, repeat read/list calls with the same endpoint and params are answered
+    from memory instead of making another round trip.
+    """
+    _request_cache.records = {}
+
+
+def deactivate_request_cache():
+    """
+    Discards the current thread's identity map, e.g. at the end of the request it was activated for.
+    """
+    _request_cache.records = None
+
+
+@contextlib.contextmanager
+def request_cache_scope():
+    """
+    Context manager activating the identity map for the duration of the block, unless one is already active (e.g.
+    for the surrounding request), in which case that map is used and left in place.
+    """
+    if _get_request_cache() is not None:
+        yield
+        return
+
+    activate_request_cache()
+
+    try:
+        yield
+    finally:
+        deactivate_request_cache()
+
+
+def _get_request_cache():
+    return getattr(_request_cache, 'records', None)
+
+
+def _get_params_key(params):
+    return tuple(sorted((field, str(value)) for field, value in params.items()))
+
+
+def _copy_response(response):
+    """
+    Callers routinely edit response.record in place before writing it back, so each hit gets its own copy.
+    """
+    response_copy = copy.copy(response)
+
+    if hasattr(response, 'record'):
+        response_copy.record = copy.deepcopy(response.record)
+
+    return response_copy
+
+
+def _read_through(func):
+    """
+    Decorator for read verbs, answering from the request-scoped identity map when one is active.
+    Only successful (200) responses are kept.
+    """
+
+    @functools.wraps(func)
+    def cache_wrapper(self, endpoint, params, **kwargs):
+        records = _get_request_cache()
+
+        if records is None:
+            return func(self, endpoint, params, **kwargs)
+
+        endpoint_records = records.setdefault((self.target_url_prefix, endpoint), {})
+        key = (func.__name__, _get_params_key(params), _get_params_key(kwargs))
+
+        if key in endpoint_records:
+            return _copy_response(endpoint_records[key])
+
+        response = func(self, endpoint, params, **kwargs)
+
+        if response.status_code == 200:
+            endpoint_records[key] = _copy_response(response)
+
+        return response
+
+    return cache_wrapper
+
+
+def _invalidates(func):
+    """
+    Decorator for write verbs, dropping every identity map entry held for the endpoint written to and evicting the
+    endpoint's shared cache entries once the write has been made.
+    """
+
+    @functools.wraps(func)
+    def invalidate_wrapper(self, endpoint, params):
+        records = _get_request_cache()
+
+        if records is not None:
+            records.pop((self.target_url_prefix, endpoint), None)
+
+        try:
+            return func(self, endpoint, params)
+        finally:
+            if _shared_cache_enabled(self, endpoint):
+                _get_shared_cache().set(_get_generation_key(self, endpoint), uuid.uuid4().hex, None)
+
+    return invalidate_wrapper
+
+
+_shared_cache_stats = Counter()
+_shared_cache_stats_lock = threading.Lock()
+
+
+def get_shared_cache_stats():
+    """
+    Gets this process' shared gateway cache hit and miss counts, for tuning the per-endpoint TTLs.
+    :return: dict of {(gateway class name, endpoint): {'hits': int, 'misses': int}}
+    """
+    with _shared_cache_stats_lock:
+        stats = dict(_shared_cache_stats)
+
+    return {
+        (gateway_name, endpoint): {'hits': stats.get((gateway_name, endpoint, 'hits'), 0),
+                                   'misses': stats.get((gateway_name, endpoint, 'misses'), 0)}
+        for gateway_name, endpoint, _ in stats
+    }
+
+
+def reset_shared_cache_stats():
+    with _shared_cache_stats_lock:
+        _shared_cache_stats.clear()
+
+
+def _count_shared_cache_lookup(gateway, endpoint, outcome):
+    with _shared_cache_stats_lock:
+        _shared_cache_stats[(type(gateway).__name__, endpoint, outcome)] += 1
+
+
+def _get_shared_cache():
+    return caches[settings.GATEWAY_SHARED_CACHE_ALIAS]
+
+
+def _shared_cache_enabled(gateway, endpoint):
+    return settings.ENABLE_GATEWAY_SHARED_CACHE and endpoint in gateway._endpoint_cache_ttl_dict
+
+
+def _get_generation_key(gateway, endpoint):
+    return 'gateway:{0}:{1}:generation'.format(gateway.target_url_prefix, endpoint)
+
+
+def _get_generation(gateway, endpoint):
+    """
+    Gets the token identifying the endpoint's current cache entries. Writes replace the token, which evicts every
+    entry stored under the old one (in every process sharing the cache) without having to know their keys.
+    """
+    shared_cache = _get_shared_cache()
+    generation_key = _get_generation_key(gateway, endpoint)
+    generation = shared_cache.get(generation_key)
+
+    if generation is None:
+        shared_cache.add(generation_key, uuid.uuid4().hex, None)
+        generation = shared_cache.get(generation_key)
+
+    return generation
+
+
+def _shared_read_through(func):
+    """
+    Decorator for read verbs, answering from Django's cache framework for endpoints listed in the gateway's
+    _endpoint_cache_ttl_dict. Entries are shared across requests and processes, and kept for the endpoint's TTL or
+    until a write to the endpoint is made through any gateway client. Only successful (200) responses are kept.
+    """
+
+    @functools.wraps(func)
+    def shared_cache_wrapper(self, endpoint, params, **kwargs):
+        if not _shared_cache_enabled(self, endpoint):
+            return func(self, endpoint, params, **kwargs)
+
+        shared_cache = _get_shared_cache()
+        key = 'gateway:{0}:{1}:{2}:{3}:{4}'.format(
+            self.target_url_prefix, endpoint, _get_generation(self, endpoint), func.__name__,
+            hashlib.md5(json.dumps([_get_params_key(params), _get_params_key(kwargs)]).encode()).hexdigest())
+        cached = shared_cache.get(key)
+
+        if cached is not None:
+            _count_shared_cache_lookup(self, endpoint, 'hits')
+            return _rebuild_response(cached, **kwargs)
+
+        _count_shared_cache_lookup(self, endpoint, 'misses')
+        response = func(self, endpoint, params, **kwargs)
+
+        if response.status_code == 200:
+            shared_cache.set(key, {'url': response.url, 'text': response.text, 'list': func.__name__ == 'list'},
+                             self._endpoint_cache_ttl_dict[endpoint])
+
+        return response
+
+    return shared_cache_wrapper
+
+
+def _rebuild_response(cached, fields=None, count_only=False):
+    response = requests.Response()
+    response.status_code = 200
+    response.url = cached['url']
+    response.encoding = 'utf-8'
+    response._content = cached['text'].encode('utf-8')
+
+    if cached['list']:
+        _decode_list_response(response, fields, count_only)
+    else:
+        _decode_response(response)
+
+    return response
+
+
+def _decode_response(response):
+    response.record = json.loads(response.text)
+
+
+def _decode_list_response(response, fields, count_only):
+    """
+    Sets response.record (or response.count, in count-only mode) from a successful list response, and
+    response.has_next_page, which is only True for a page of a paginated listing with pages after it.
+    Gateways that ignore the count_only/fields query parameters return the full rows, in which case they are counted
+    or projected here instead, so callers get the same result either way.
+    """
+    record = json.loads(response.text)
+    response.has_next_page = False
+
+    if count_only and isinstance(record, dict) and 'count' in record:
+        # The gateway's count, also given by paginated listings for every page, not just the rows of this one
+        response.count = record['count']
+        return
+
+    if isinstance(record, dict) and 'results' in record:
+        # A page of a paginated listing, see DBGatewayActions.iter_list
+        response.has_next_page = bool(record.get('next'))
+        record = record['results']
+
+    if count_only:
+        response.count = len(record)
+    elif fields is not None:
+        response.record = [{field: row.get(field) for field in fields} for row in record]
+    else:
+        response.record = record
+
+
+_gather_executor = None
+_gather_executor_lock = threading.Lock()
+
+
+def _get_gather_executor():
+    global _gather_executor
+
+    if _gather_executor is None:
+        with _gather_executor_lock:
+            if _gather_executor is None:
+                _gather_executor = ThreadPoolExecutor(max_workers=settings.GATEWAY_GATHER_MAX_WORKERS,
+                                                      thread_name_prefix='gateway-gather')
+
+    return _gather_executor
+
+
+def submit(func, *args, **kwargs):
+    """
+    Runs func(*args, **kwargs) on the process-wide gateway thread pool, e.g. to overlap gateway calls with other work.
+    The caller's identity map (see activate_request_cache) and gateway_metrics page are carried over to the worker.
+    :return: concurrent.futures.Future of func's result
+    """
+    records = _get_request_cache()
+    page = gateway_metrics.get_page_context()
+
+    def run():
+        _request_cache.records = records
+        gateway_metrics.set_page_context(page)
+
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _request_cache.records = None
+            gateway_metrics.set_page_context(None)
+
+    return _get_gather_executor().submit(run)
+
+
 class DBGatewayActions:
     """
     Base class for handling all requests to Database gateway services at specified target_url_prefix.
+    Clients hold no per-call state, so each subclass is a process-wide singleton: every NannyGatewayActions()
+    returns the same instance.
     """
     target_url_prefix = None
-    event_list = None
+
+    # Name the gateway's outbound call policy (timeouts, retry budget and circuit breaker) is kept under
+    service_name = None
 
     _endpoint_pk_dict = {}
 
-    def __init__(self):
-        # Register each of the REST verbs in DBGatewayActions as an event to be logged.
-        exempt_funcs = [
-            'get_endpoint_dict',
-            'get_endpoint_pk'
-        ]
-        self.event_list = [getattr(self, func) for func in dir(self) if
-                           callable(getattr(self, func)) and func[0] != '_' and func not in exempt_funcs]
-        self.__register_events()
-
-    def __register_events(self):
-        # If the functions are being mocked, skip decorating the methods with the dispatch function.
-        if any([isinstance(event, MagicMock) for event in self.event_list]):
-            return None
-
-        # else, wrap each function with the __dispatch decorator.
-        for event in self.event_list:
-            setattr(self, event.__name__, self.__dispatch(event))
-
-    def __dispatch(self, func):
+    # Seconds for which reads of near-static endpoints may be served from the shared cache, see _shared_read_through
+    _endpoint_cache_ttl_dict = {}
+
+    # Endpoints whose list accepts a comma-separated "<primary key>__in" filter, read in bulk by read_many
+    _bulk_read_endpoints = set()
+
+    # Most ids read_many filters one list call on, bounding the length of its url
+    _bulk_read_batch_size = 100
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __new__(cls):
+        instance = cls._instances.get(cls)
+
+        if instance is None:
+            with cls._instances_lock:
+                instance = cls._instances.setdefault(cls, super().__new__(cls))
+
+        return instance
+
+    @_read_through
+    @_shared_read_through
+    @_dispatch
+    def list(self, endpoint, params, fields=None, count_only=False):
+        """
+        Lists the records at endpoint matching params.
+        :param fields: Optional iterable of field names. If given, each row in response.record holds only these fields.
+        :param count_only: If True, only the number of matching records is fetched, as response.count, and
+         response.record is not set.
+        """
+        return self._get_list(endpoint, params, fields, count_only)
+
+    def iter_list(self, endpoint, params, fields=None, page_size=None):
         """
-        Decorator function for wrapping REST methods.
-        This will wrap the function and create a log entry if the database API returns an unexpected status code.
-        :param func: Function to be decorated.
-        :return: log_wrapper: Decorated function.
+        Generator yielding the records at endpoint matching params one page at a time, so only a single page is ever
+        held in memory. Pages are never cached. A gateway that does not paginate returns every record as one page.
+        The listing ends at the last page, or at a page that is empty or not found (404).
+        :param fields: Optional iterable of field names, as for list.
+        :param page_size: Records fetched per call, defaulting to the GATEWAY_LIST_PAGE_SIZE setting.
+        :raises requests.HTTPError: If a page is answered with any other status code, rather than yielding a
+         truncated listing.
         """
+        page_size = str(page_size or settings.GATEWAY_LIST_PAGE_SIZE)
+        page = 1
 
-        def log_wrapper(*args, **kwargs):
-            response = func(*args, **kwargs)
-            expected_db_api_responses = (200, 201, 204, 404)
+        while True:
+            response = self._list_page(endpoint, params=dict(params, page=str(page), page_size=page_size),
+                                       fields=fields)
 
-            # If unexpected response, enter a WARNING log.
-            if response.status_code not in expected_db_api_responses:
-                verb_name = func.__name__
-                endpoint_name = args[0]
-                endpoint_lookup_field = self._endpoint_pk_dict[endpoint_name]
+            if response.status_code == 404:
+                return
 
-                if func.__name__ == 'list':
-                    logger.error(
-                        ('!GATEWAY ERROR! "{}" request to API endpoint "{}" with {}: {} returned {} status code '
-                         '- see the Gateway logs for traceback').format(
-                            verb_name, endpoint_name, list(kwargs['params'].keys()), list(kwargs['params'].values()),
-                            response.status_code)
-                    )
+            if response.status_code != 200:
+                raise requests.HTTPError('Listing "{0}" page {1} returned {2} status code'.format(
+                    endpoint, page, response.status_code), response=response)
 
-                else:
-                    logger.error(
-                        ('!GATEWAY ERROR! "{}" request to API endpoint "{}" with {}: {} returned {} status code '
-                         '- see the Gateway logs for traceback').format(
-                            verb_name, args[0], endpoint_lookup_field, kwargs['params'][endpoint_lookup_field],
-                            response.status_code)
-                    )
+            if not response.record:
+                return
 
-                logger.info('!GATEWAY ERROR! Targeted url: {}'.format(response.url))
+            yield from response.record
 
-            return response
+            if not response.has_next_page:
+                return
 
-        return log_wrapper
+            page += 1
 
-    def list(self, endpoint, params):
+    @_dispatch
+    def _list_page(self, endpoint, params, fields=None):
+        return self._get_list(endpoint, params, fields, False)
+
+    def _get_list(self, endpoint, params, fields, count_only):
         query_params = ''.join(['&' + key + '=' + value for key, value in params.items()])
 
-        response = requests.get(self.target_url_prefix + endpoint + '/?' + query_params)
+        if count_only:
+            query_params += '&count_only=true'
+        elif fields is not None:
+            query_params += '&fields=' + ','.join(fields)
+
+        response = self._request('get', self.target_url_prefix + endpoint + '/?' + query_params)
 
         if response.status_code == 200:
-            response.record = json.loads(response.text)
+            _decode_list_response(response, fields, count_only)
 
         return response
 
+    @_read_through
+    @_shared_read_through
+    @_dispatch
     def read(self, endpoint, params):
         endpoint_lookup_field = self._endpoint_pk_dict[endpoint]
-        response = requests.get(self.target_url_prefix + endpoint + '/' + params[endpoint_lookup_field] + '/',
-                                data=params)
+        url = self.target_url_prefix + endpoint + '/' + params[endpoint_lookup_field] + '/'
+        response = self._request('get', url, data=params)
 
         if response.status_code == 200:
-            response.record = json.loads(response.text)
+            _decode_response(response)
 
         return response
 
+    @_invalidates
+    @_dispatch
     def create(self, endpoint, params):
-        response = requests.post(self.target_url_prefix + endpoint + '/', data=params)
+        response = self._request('post', self.target_url_prefix + endpoint + '/', data=params)
 
         if response.status_code == 201:
             response.record = json.loads(response.text)
 
         return response
 
+    @_invalidates
+    @_dispatch
     def patch(self, endpoint, params):
         endpoint_lookup_field = self._endpoint_pk_dict[endpoint]
-        response = requests.patch(self.target_url_prefix + endpoint + '/' + params[endpoint_lookup_field] + '/',
-                                  data=params)
+        url = self.target_url_prefix + endpoint + '/' + params[endpoint_lookup_field] + '/'
+        response = self._request('patch', url, data=params)
 
         if response.status_code == 200:
             response.record = json.loads(response.text)
 
         return response
 
+    @_invalidates
+    @_dispatch
     def put(self, endpoint, params):
         endpoint_lookup_field = self._endpoint_pk_dict[endpoint]
-        response = requests.put(self.target_url_prefix + endpoint + '/' + params[endpoint_lookup_field] + '/',
-                                data=params)
+        url = self.target_url_prefix + endpoint + '/' + params[endpoint_lookup_field] + '/'
+        response = self._request('put', url, data=params)
 
         if response.status_code == 200:
             response.record = json.loads(response.text)
 
         return response
 
+    @_invalidates
+    @_dispatch
     def delete(self, endpoint, params):
         endpoint_lookup_field = self._endpoint_pk_dict[endpoint]
-        return requests.delete(self.target_url_prefix + endpoint + '/' + params[endpoint_lookup_field] + '/',
-                               data=params)
+        url = self.target_url_prefix + endpoint + '/' + params[endpoint_lookup_field] + '/'
+        return self._request('delete', url, data=params)
+
+    def read_many(self, endpoint, ids):
+        """
+        Reads the records at endpoint with each of the given primary keys. Endpoints listed in _bulk_read_endpoints
+        are fetched with one list call per _bulk_read_batch_size ids, and any other endpoint, or a batch the gateway
+        fails to list, with concurrent reads (see gather).
+        :param ids: Iterable of primary key values. Duplicates are only fetched once.
+        :return: dict of {id: record}. Ids with no matching record are left out.
+        """
+        endpoint_lookup_field = self._endpoint_pk_dict[endpoint]
+        ids = list(dict.fromkeys(str(record_id) for record_id in ids))
+        records = {}
+
+        if endpoint in self._bulk_read_endpoints and ids:
+            batches = [ids[start:start + self._bulk_read_batch_size]
+                       for start in range(0, len(ids), self._bulk_read_batch_size)]
+            responses = self.gather([('list', endpoint, {endpoint_lookup_field + '__in': ','.join(batch)})
+                                     for batch in batches], raise_errors=True)
+            ids = []
+
+            for batch, response in zip(batches, responses):
+                if response.status_code == 200:
+                    # Rows of other ids are skipped, in case a gateway ignores the filter
+                    records.update((str(record[endpoint_lookup_field]), record) for record in response.record
+                                   if str(record[endpoint_lookup_field]) in batch)
+                elif response.status_code != 404:
+                    ids.extend(batch)
+
+        if not ids:
+            return records
+
+        responses = self.gather([('read', endpoint, {endpoint_lookup_field: record_id}) for record_id in ids],
+                                raise_errors=True)
+
+        records.update((record_id, response.record) for record_id, response in zip(ids, responses)
+                       if response.status_code == 200)
+
+        return records
+
+    def gather(self, calls, raise_errors=False):
+        """
+        Issues a batch of independent gateway calls concurrently on a bounded, process-wide thread pool, so the batch
+        takes about as long as its slowest call rather than the sum of them all.
+        Calls made inside an active identity map (see activate_request_cache) read from and populate that map, and
+        count towards the caller's page in gateway_metrics.
+        :param calls: Iterable of (verb, endpoint, params) tuples issued against this gateway. A tuple may be prefixed
+         with another gateway client, i.e. (gateway, verb, endpoint, params), to mix gateways within one batch.
+        :param raise_errors: If True, the first error raised by any call is re-raised once the whole batch is done.
+        :return: List of responses in the same order as calls. A call that raised holds its exception instead.
+        """
+        def issue(call):
+            gateway, verb, endpoint, params = call if len(call) == 4 else (self,) + tuple(call)
+
+            try:
+                return getattr(gateway, verb)(endpoint, params=params)
+            except Exception as ex:
+                return ex
+
+        results = [future.result() for future in [submit(issue, call) for call in calls]]
+
+        if raise_errors:
+            for result in results:
+                if isinstance(result, Exception):
+                    raise result
+
+        return results
+
+    def _request(self, method, url, **kwargs):
+        """
+        Makes a call to this gateway under its timeout, retry and circuit breaker policy, see http_client.request.
+        """
+        return request(self.service_name, method, url, **kwargs)
 
     def get_endpoint_pk(self, endpoint):
         return self._endpoint_pk_dict[endpoint]
@@ -146,6 +604,7 @@ class IdentityGatewayActions(DBGatewayActions):
         'summary': 'application_id'
     }
 
+    service_name = 'identity-gateway'
     target_url_prefix = os.environ.get('APP_IDENTITY_URL') + 'api/v1/'
 
 
@@ -173,6 +632,13 @@ class NannyGatewayActions(DBGatewayActions):
         'timeline-log': 'object_id'
     }
 
+    _endpoint_cache_ttl_dict = {
+        'applicant-personal-details': 60
+    }
+
+    _bulk_read_endpoints = {'application'}
+
+    service_name = 'nanny-gateway'
     target_url_prefix = os.environ.get('APP_NANNY_GATEWAY_URL') + '/api/v1/'
 
 
@@ -194,4 +660,12 @@ class HMGatewayActions(DBGatewayActions):
         'arc-search': 'adult_id'
     }
 
+    _endpoint_cache_ttl_dict = {
+        'dpa-auth': 600,
+        'setting-address': 300
+    }
+
+    _bulk_read_endpoints = {'adult'}
+
+    service_name = 'hm-gateway'
     target_url_prefix = settings.HM_GATEWAY_URL + '/api/v1/'
@@ -1,16 +1,17 @@
 import json
 
-import requests
-
 from django.conf import settings
 
+from . import http_client
+
 
 DBS_API_ENDPOINT = settings.DBS_URL
 
 
 def read(dbs_certificate_number):
     params = {'certificate_number': dbs_certificate_number}
-    response = requests.get(DBS_API_ENDPOINT + '/api/v1/dbs/' + dbs_certificate_number + '/', data=params, verify=False)
+    response = http_client.request('dbs-api', 'get', DBS_API_ENDPOINT + '/api/v1/dbs/' + dbs_certificate_number + '/',
+                                   data=params, verify=False)
     if response.status_code == 200:
         response.record = json.loads(response.text)
     return response
@@ -20,10 +21,10 @@ def create(dbs_certificate_number, date_issued, date_of_birth, certificate_infor
     params = {'certificate_number': dbs_certificate_number, 'certificate_information': certificate_information,
               'date_of_issue': date_issued,
               'date_of_birth': date_of_birth}
-    response = requests.post(DBS_API_ENDPOINT + '/api/v1/dbs/', data=params, verify=False)
+    response = http_client.request('dbs-api', 'post', DBS_API_ENDPOINT + '/api/v1/dbs/', data=params, verify=False)
     return response
 
 
 def batch_overwrite(files):
-    response = requests.post(DBS_API_ENDPOINT + '/api/v1/dbs/batch-overwrite/', files=files)
+    response = http_client.request('dbs-api-batch', 'post', DBS_API_ENDPOINT + '/api/v1/dbs/batch-overwrite/', files=files)
     return response
@@ -0,0 +1,129 @@
+"""
+OFS-MORE-CCN3: Apply to be a Childminder Beta
+-- gateway_metrics.py --
+
+@author: Informed Solutions
+
+In-process aggregation of gateway call counts, latencies, payload sizes and errors, per (gateway, verb, endpoint) and
+per ARC page, see DBGatewayActions and GatewayMetricsMiddleware.
+"""
+import bisect
+import threading
+from collections import defaultdict
+
+# Upper bounds, in milliseconds, of the latency histogram buckets. Slower calls fall in a final '+Inf' bucket.
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_lock = threading.Lock()
+_calls = {}
+_pages = defaultdict(lambda: {'requests': 0, 'gateway_calls': 0, 'gateway_ms': 0.0})
+_page_context = threading.local()
+
+
+class _CallStats:
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.payload_bytes = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def as_dict(self):
+        bucket_names = [str(bound) for bound in LATENCY_BUCKETS_MS] + ['+Inf']
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'payload_bytes': self.payload_bytes,
+            'total_ms': round(self.total_ms, 3),
+            'mean_ms': round(self.total_ms / self.calls, 3) if self.calls else 0,
+            'max_ms': round(self.max_ms, 3),
+            'latency_ms_histogram': dict(zip(bucket_names, self.histogram)),
+        }
+
+
+def record_call(gateway_name, verb, endpoint, elapsed_ms, payload_bytes=0, error=False):
+    """
+    Adds a single gateway call to the process-wide totals, and to the page currently being served on this thread.
+    """
+    with _lock:
+        stats = _calls.get((gateway_name, verb, endpoint))
+
+        if stats is None:
+            stats = _calls[(gateway_name, verb, endpoint)] = _CallStats()
+
+        stats.calls += 1
+        stats.errors += 1 if error else 0
+        stats.payload_bytes += payload_bytes
+        stats.total_ms += elapsed_ms
+        stats.max_ms = max(stats.max_ms, elapsed_ms)
+        stats.histogram[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+
+        page = get_page_context()
+
+        if page is not None:
+            page['gateway_calls'] += 1
+            page['gateway_ms'] += elapsed_ms
+
+
+def start_page():
+    """
+    Starts counting the gateway calls made on this thread towards a page, e.g. for the request being served.
+    """
+    _page_context.page = {'gateway_calls': 0, 'gateway_ms': 0.0}
+
+
+def end_page(page_name):
+    """
+    Stops counting gateway calls towards the current page, and adds them to page_name's totals.
+    """
+    page = get_page_context()
+    _page_context.page = None
+
+    if page is None:
+        return
+
+    with _lock:
+        totals = _pages[page_name]
+        totals['requests'] += 1
+        totals['gateway_calls'] += page['gateway_calls']
+        totals['gateway_ms'] += page['gateway_ms']
+
+
+def get_page_context():
+    return getattr(_page_context, 'page', None)
+
+
+def set_page_context(page):
+    """
+    Counts this thread's gateway calls towards page, e.g. in a worker thread issuing calls on behalf of a request.
+    """
+    _page_context.page = page
+
+
+def snapshot():
+    """
+    Gets a copy of the current totals.
+    :return: dict with a 'gateway_calls' list, one entry per (gateway, verb, endpoint) and slowest first by total
+     time, and a 'pages' list, one entry per page and busiest first by gateway calls per request.
+    """
+    with _lock:
+        gateway_calls = [dict(gateway=gateway_name, verb=verb, endpoint=endpoint, **stats.as_dict())
+                         for (gateway_name, verb, endpoint), stats in _calls.items()]
+        pages = [dict(page=page_name,
+                      gateway_calls_per_request=round(totals['gateway_calls'] / totals['requests'], 2),
+                      gateway_ms_per_request=round(totals['gateway_ms'] / totals['requests'], 3),
+                      **totals)
+                 for page_name, totals in _pages.items()]
+
+    return {
+        'gateway_calls': sorted(gateway_calls, key=lambda entry: entry['total_ms'], reverse=True),
+        'pages': sorted(pages, key=lambda entry: entry['gateway_calls_per_request'], reverse=True),
+    }
+
+
+def reset():
+    with _lock:
+        _calls.clear()
+        _pages.clear()
@@ -0,0 +1,260 @@
+"""
+OFS-MORE-CCN3: Apply to be a Childminder Beta
+-- http_client.py --
+
+@author: Informed Solutions
+
+Shared, pooled HTTP sessions for outbound calls to the backing services, and the policy every such call is made
+under: per-service connect and read timeouts, a bounded budget of jittered retries for idempotent verbs, and a circuit
+breaker per service that fails fast while the service cannot be reached.
+"""
+import logging
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests import RequestException
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger()
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+IDEMPOTENT_METHODS = ('get', 'head', 'options', 'put', 'delete')
+RETRYABLE_STATUS_CODES = (502, 503, 504)
+
+
+class CircuitOpenError(RequestException):
+    """
+    Raised instead of making a call to a service whose circuit breaker is open.
+    """
+
+
+class CircuitBreaker:
+    """
+    Counts consecutive calls to one service that could not reach it, i.e. connection errors and timeouts. Once
+    failure_threshold is reached the breaker opens (trips) and calls fail fast for reset_timeout seconds, after which a
+    single trial call is let through: if it succeeds the breaker closes again, otherwise it re-opens.
+    Error responses are not counted: they show the service is reachable, and are usually down to one endpoint, which
+    should not cut off the service's other endpoints.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.trips += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class RetryBudget:
+    """
+    Token bucket bounding retries to a fraction of the calls made to one service, so retries cannot multiply the load
+    on a service that is already struggling. Each call deposits ratio tokens, up to capacity, and each retry
+    withdraws one.
+    """
+
+    def __init__(self, ratio, capacity):
+        self.ratio = ratio
+        self.capacity = capacity
+        self.tokens = capacity
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + self.ratio)
+
+    def withdraw(self):
+        with self._lock:
+            if self.tokens < 1:
+                return False
+
+            self.tokens -= 1
+            return True
+
+
+_breakers = {}
+_retry_budgets = {}
+_policy_lock = threading.Lock()
+
+
+def get_session(url):
+    """
+    Gets the process-wide session for the host targeted by url, creating it on first use.
+    Sessions keep their TCP (and TLS) connections alive between calls, so repeated requests to the same
+    gateway reuse an open socket instead of performing a fresh handshake each time.
+    :param url: Any url on the target host.
+    :return: requests.Session bound to the host's connection pool.
+    """
+    host = _get_host(url)
+    session = _sessions.get(host)
+
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(host)
+            if session is None:
+                session = _build_session()
+                _sessions[host] = session
+
+    return session
+
+
+def request(service, method, url, **kwargs):
+    """
+    Makes an outbound call to service through its pooled session, under the service's timeout, retry and circuit
+    breaker policy. Only idempotent verbs are retried, after a connection error, timeout or 502/503/504 response,
+    with full-jitter exponential backoff and while the service's retry budget allows.
+    :param service: Name of the backing service, keying its entry in OUTBOUND_HTTP_TIMEOUTS and its breaker.
+    :param method: HTTP verb, e.g. 'get'.
+    :param url: Full url to call.
+    :param kwargs: Passed through to requests, e.g. data, headers or verify.
+    :raises CircuitOpenError: If the service's breaker is open, see GatewayUnavailableMiddleware.
+    :return: requests.Response
+    """
+    method = method.lower()
+    breaker = get_circuit_breaker(service)
+    retry_budget = _get_retry_budget(service)
+    kwargs.setdefault('timeout', get_timeout(service))
+    retries = settings.OUTBOUND_HTTP_MAX_RETRIES if method in IDEMPOTENT_METHODS else 0
+    retry_budget.deposit()
+    attempt = 0
+
+    while True:
+        if not breaker.allow_request():
+            raise CircuitOpenError('Circuit breaker for "{}" is open, not calling {}'.format(service, url))
+
+        try:
+            response = getattr(get_session(url), method)(url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            breaker.record_failure()
+
+            if attempt >= retries or not retry_budget.withdraw():
+                raise
+        except RequestException:
+            breaker.record_failure()
+            raise
+        else:
+            breaker.record_success()
+
+            if response.status_code not in RETRYABLE_STATUS_CODES or attempt >= retries \
+                    or not retry_budget.withdraw():
+                return response
+
+        attempt += 1
+        logger.info('Retrying "{}" request to {} (attempt {})'.format(method, url, attempt + 1))
+        time.sleep(random.uniform(0, settings.OUTBOUND_HTTP_RETRY_BACKOFF * 2 ** attempt))
+
+
+def get_timeout(service):
+    """
+    Gets the (connect, read) timeout in seconds for calls to service.
+    """
+    return settings.OUTBOUND_HTTP_TIMEOUTS.get(
+        service, (settings.OUTBOUND_HTTP_CONNECT_TIMEOUT, settings.OUTBOUND_HTTP_READ_TIMEOUT))
+
+
+def get_circuit_breaker(service):
+    breaker = _breakers.get(service)
+
+    if breaker is None:
+        with _policy_lock:
+            breaker = _breakers.setdefault(service, CircuitBreaker(settings.OUTBOUND_HTTP_BREAKER_FAILURE_THRESHOLD,
+                                                                   settings.OUTBOUND_HTTP_BREAKER_RESET_TIMEOUT))
+
+    return breaker
+
+
+def get_circuit_breaker_stats():
+    """
+    Gets the state, consecutive failure count and total number of trips of each service's circuit breaker.
+    :return: dict of {service: {'state': str, 'failures': int, 'trips': int}}
+    """
+    with _policy_lock:
+        breakers = dict(_breakers)
+
+    return {service: {'state': breaker.state, 'failures': breaker.failures, 'trips': breaker.trips}
+            for service, breaker in breakers.items()}
+
+
+def reset_circuit_breakers():
+    """
+    Drops every circuit breaker and retry budget, closing all breakers.
+    """
+    with _policy_lock:
+        _breakers.clear()
+        _retry_budgets.clear()
+
+
+def _get_retry_budget(service):
+    retry_budget = _retry_budgets.get(service)
+
+    if retry_budget is None:
+        with _policy_lock:
+            retry_budget = _retry_budgets.setdefault(service, RetryBudget(settings.OUTBOUND_HTTP_RETRY_BUDGET_RATIO,
+                                                                          settings.OUTBOUND_HTTP_RETRY_BUDGET_CAPACITY))
+
+    return retry_budget
+
+
+def close_sessions():
+    """
+    Closes every pooled session and drops it from the pool, e.g. after a fork or when settings change.
+    """
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def _get_host(url):
+    split_url = urlsplit(url)
+    return '{0}://{1}'.format(split_url.scheme, split_url.netloc)
+
+
+def _build_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=settings.GATEWAY_POOL_CONNECTIONS,
+                          pool_maxsize=settings.GATEWAY_POOL_MAXSIZE,
+                          max_retries=settings.GATEWAY_MAX_RETRIES)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    if not settings.GATEWAY_KEEP_ALIVE:
+        session.headers['Connection'] = 'close'
+
+    return session
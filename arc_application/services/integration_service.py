@@ -1,11 +1,11 @@
 import logging
 
-import requests
-
 from django.conf import settings
 from requests import RequestException
 from django.utils.http import urlencode
 
+from . import http_client
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,7 +24,7 @@ def get_individual_search_results(query_params):
     request_url = f"{settings.INTEGRATION_ADAPTER_URL}/api/v1/individuals-search/?{urlencode(query_params)}"
 
     try:
-        api_response = requests.get(request_url, verify=False)
+        api_response = http_client.request('integration-adapter', 'get', request_url, verify=False)
 
         if api_response.status_code:
             successful = True
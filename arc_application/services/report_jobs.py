@@ -0,0 +1,164 @@
+"""
+OFS-MORE-CCN3: Apply to be a Childminder Beta
+-- report_jobs.py --
+
+@author: Informed Solutions
+
+Background generation of daily reporting CSVs. A report request records a ReportJob, or reuses one the same user
+requested within the REPORT_CACHE_TTL setting, and the run_report_jobs management command writes each queued report to
+REPORT_STORAGE_DIR for the user to download. The command is expected to run as a supervised service of its own; jobs
+left running by a worker that stopped are queued again after the REPORT_JOB_TIMEOUT setting.
+"""
+import csv
+import logging
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import ReportJob
+from .reporting_facts import REPORTING_SERVICES
+
+log = logging.getLogger()
+
+
+def find_report_job(report, user, start_date=None, end_date=None, services=REPORTING_SERVICES):
+    """
+    Finds a job generating report for the same days and services requested by user within the REPORT_CACHE_TTL
+    setting, unless it failed or its generated report has since been removed.
+    :param report: Name of the report, e.g. 'applications-audit-log'
+    :param user: User requesting the report, the only user its job may be downloaded by
+    :param start_date: Optional first day reported on
+    :param end_date: Optional last day reported on
+    :param services: Services reported on, of 'Childminder', 'Adult' and 'Nanny'
+    :return: ReportJob, or None if there is no such job
+    """
+    window_start = timezone.now() - timedelta(seconds=settings.REPORT_CACHE_TTL)
+    jobs = ReportJob.objects.filter(requested_by=user, date_requested__gte=window_start, **_report_job_filters(
+        report, start_date, end_date, services)).exclude(status=ReportJob.FAILED)
+
+    for job in jobs.order_by('-date_requested'):
+        if job.status != ReportJob.COMPLETE or os.path.exists(report_job_path(job)):
+            return job
+
+    return None
+
+
+def request_report_job(report, user, start_date=None, end_date=None, services=REPORTING_SERVICES):
+    """
+    Gets a job generating report, reusing one found by find_report_job or otherwise queueing a new one.
+    Parameters are as for find_report_job.
+    :return: ReportJob
+    """
+    job = find_report_job(report, user, start_date, end_date, services)
+
+    if job is None:
+        job = ReportJob.objects.create(requested_by=user, **_report_job_filters(report, start_date, end_date,
+                                                                                services))
+
+    return job
+
+
+def claim_report_job():
+    """
+    Marks the longest queued job as running, so that no other worker picks it up.
+    :return: The claimed ReportJob, or None if no job is queued
+    """
+    with transaction.atomic():
+        job = ReportJob.objects.select_for_update(skip_locked=True).filter(status=ReportJob.QUEUED) \
+            .order_by('date_requested').first()
+
+        if job is not None:
+            job.status = ReportJob.RUNNING
+            job.date_started = timezone.now()
+            job.save(update_fields=['status', 'date_started'])
+
+    return job
+
+
+def requeue_stale_report_jobs():
+    """
+    Queues again the jobs that have been running for longer than the REPORT_JOB_TIMEOUT setting, e.g. as the worker
+    generating them was stopped, so that they are picked up by the next claim_report_job.
+    :return: The number of jobs queued again
+    """
+    return ReportJob.objects.filter(
+        status=ReportJob.RUNNING, date_started__lt=timezone.now() - timedelta(seconds=settings.REPORT_JOB_TIMEOUT)
+    ).update(status=ReportJob.QUEUED, date_started=None)
+
+
+def generate_report_job(job, csv_columns, rows, file_name):
+    """
+    Writes the rows of a job's report to REPORT_STORAGE_DIR, marking the job complete, or failed if the rows could not
+    be generated.
+    :param csv_columns: Column names of the report
+    :param rows: Iterable of the report's rows, as dictionaries by column name, header row included
+    :param file_name: Name the report is downloaded as
+    """
+    path = report_job_path(job)
+    partial_path = path + '.partial'
+    os.makedirs(settings.REPORT_STORAGE_DIR, exist_ok=True)
+
+    try:
+        with open(partial_path, 'w', newline='') as report_file:
+            writer = csv.DictWriter(report_file, fieldnames=csv_columns)
+            for row in rows:
+                writer.writerow(row)
+
+        os.replace(partial_path, path)
+    except Exception:
+        log.exception('Report job {0} ({1}) failed'.format(job.job_id, job.report))
+        job.status = ReportJob.FAILED
+
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+    else:
+        job.status = ReportJob.COMPLETE
+        job.file_name = file_name
+
+    job.date_completed = timezone.now()
+    job.save(update_fields=['status', 'file_name', 'date_completed'])
+
+
+def purge_report_jobs():
+    """
+    Deletes jobs requested longer ago than the REPORT_JOB_RETENTION setting, with their generated reports.
+    :return: The number of jobs deleted
+    """
+    expired_jobs = ReportJob.objects.filter(
+        date_requested__lt=timezone.now() - timedelta(seconds=settings.REPORT_JOB_RETENTION))
+
+    for job in expired_jobs:
+        if os.path.exists(report_job_path(job)):
+            os.remove(report_job_path(job))
+
+    return expired_jobs.delete()[0]
+
+
+def report_job_query(job):
+    """
+    :return: The reporting view query parameters selecting the days and services the job reports on, as a dictionary
+    """
+    query = {}
+
+    if job.start_date:
+        query['start'] = job.start_date.strftime('%Y-%m-%d')
+    if job.end_date:
+        query['end'] = job.end_date.strftime('%Y-%m-%d')
+    if job.services != ','.join(REPORTING_SERVICES):
+        query['service'] = job.services
+
+    return query
+
+
+def _report_job_filters(report, start_date, end_date, services):
+    return {'report': report, 'start_date': start_date, 'end_date': end_date, 'services': ','.join(services)}
+
+
+def report_job_path(job):
+    """
+    :return: Path the job's report is generated to
+    """
+    return os.path.join(settings.REPORT_STORAGE_DIR, '{0}.csv'.format(job.job_id))
@@ -0,0 +1,106 @@
+"""
+OFS-MORE-CCN3: Apply to be a Childminder Beta
+-- reporting_facts.py --
+
+@author: Informed Solutions
+
+Maintenance of the ReportingFact table read by the daily reporting views: daily totals, by service, of the timeline
+events those reports count. Each service's totals are recounted from the day of its stored watermark onwards, so an
+update may be run as often as needed and only ever adds the days since it last ran. Updates are made by the
+update_reporting_facts management command, run on deployment and kept running with --interval as a supervised
+service; the REPORTING_FACTS_REFRESH_ON_REPORT setting instead runs an update before each report, as a stopgap.
+"""
+from collections import Counter
+from datetime import datetime, time
+
+from django.db import transaction
+from django.utils import timezone
+from timeline_logger.models import TimelineLog
+
+from ..models import ReportingFact, ReportingWatermark
+from .db_gateways import HMGatewayActions, NannyGatewayActions
+
+REPORTING_SERVICES = ('Childminder', 'Adult', 'Nanny')
+
+# Metric counted for each timeline log action
+REPORTING_METRICS = {
+    'returned by': 'returned',
+    'accepted by': 'processed',
+}
+
+
+def update_reporting_facts(services=REPORTING_SERVICES):
+    """
+    Recounts the daily totals of each service from the day of its watermark onwards. The timeline events are read,
+    from the database or over HTTP from the service's gateway, before any lock is taken; each service's watermark row
+    is then locked only while its totals are replaced, so concurrent updates of a service write one after the other.
+    :param services: Iterable of the services to update, of 'Childminder', 'Adult' and 'Nanny'
+    """
+    for service in services:
+        watermark, _ = ReportingWatermark.objects.get_or_create(service=service)
+        since = watermark.aggregated_to
+        counts = Counter()
+        aggregated_to = since
+
+        for timestamp, action in _timeline_events(service, since):
+            if action in REPORTING_METRICS:
+                counts[(timestamp.date(), REPORTING_METRICS[action])] += 1
+
+            aggregated_to = max(aggregated_to, timestamp.date()) if aggregated_to else timestamp.date()
+
+        with transaction.atomic():
+            watermark = ReportingWatermark.objects.select_for_update().get(service=service)
+
+            if watermark.aggregated_to != since:
+                # Another update recounted the service's totals while its events were being read here
+                continue
+
+            facts = ReportingFact.objects.filter(service=service)
+
+            if since is not None:
+                facts = facts.filter(date__gte=since)
+
+            facts.delete()
+            ReportingFact.objects.bulk_create([ReportingFact(date=date, service=service, metric=metric, count=count)
+                                               for (date, metric), count in counts.items()])
+
+            watermark.aggregated_to = aggregated_to
+            watermark.save(update_fields=['aggregated_to'])
+
+
+def rebuild_reporting_facts(services=REPORTING_SERVICES):
+    """
+    Discards the daily totals of each service and recounts them from its first timeline event.
+    """
+    with transaction.atomic():
+        ReportingFact.objects.filter(service__in=services).delete()
+        ReportingWatermark.objects.filter(service__in=services).update(aggregated_to=None)
+
+    update_reporting_facts(services)
+
+
+def _timeline_events(service, since):
+    """
+    :param since: Date of the first events to list, or None to list every event
+    :return: Generator of the (timestamp, action) of each of the service's timeline events logged from since onwards,
+     timestamps being in UTC, as the daily reporting views compare them
+    """
+    if service == 'Childminder':
+        timelinelog = TimelineLog.objects.all()
+
+        if since is not None:
+            start = datetime.combine(since, time.min).replace(tzinfo=timezone.utc)
+            timelinelog = timelinelog.filter(timestamp__gte=start)
+
+        for timestamp, extra_data in timelinelog.values_list('timestamp', 'extra_data').iterator():
+            yield timestamp, (extra_data or {}).get('action')
+    else:
+        gateway = HMGatewayActions() if service == 'Adult' else NannyGatewayActions()
+        params = {'timestamp__gte': datetime.combine(since, time.min).strftime('%Y-%m-%dT%H:%M:%S')} if since else {}
+
+        # Earlier events are also skipped here, in case a gateway ignores the timestamp filter
+        for log in gateway.iter_list('timeline-log', params=params):
+            timestamp = datetime.strptime(log['timestamp'][:-6], '%Y-%m-%dT%H:%M:%S.%f')
+
+            if since is None or timestamp.date() >= since:
+                yield timestamp, (log['extra_data'] or {}).get('action')
@@ -0,0 +1,145 @@
+"""
+OFS-MORE-CCN3: Apply to be a Childminder Beta
+-- search_index.py --
+
+@author: Informed Solutions
+
+Maintenance of the ChildminderSearchIndex table searched by SearchService. Rows are rebuilt from the Childminder
+tables whenever ARC saves to them (see signals.py), and by the rebuild_search_index management command: in full, or
+with --stale-only for applications not yet indexed or updated since, e.g. by the applicant (see
+refresh_stale_search_index). The stale refresh is run on deployment, and should be kept running with --interval as a
+supervised service; the SEARCH_INDEX_REFRESH_ON_SEARCH setting instead runs it before each search, as a stopgap.
+"""
+import re
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F, Q
+
+from ..models import Application, ApplicantHomeAddress, ApplicantName, ApplicantPersonalDetails, \
+    ChildminderSearchIndex, ChildminderSearchToken
+
+
+def normalise_name(name):
+    """
+    :return: name as lower case words separated by single spaces
+    """
+    return ' '.join(name.lower().split())
+
+
+def normalise_postcode(postcode):
+    """
+    :return: postcode in upper case, without spaces
+    """
+    return re.sub(r'\s', '', postcode).upper()
+
+
+def update_search_index(application_ids):
+    """
+    Rebuilds the search index rows of the given applications from the Childminder tables, removing the rows of
+    applications that no longer exist.
+    :param application_ids: Iterable of application ids
+    """
+    application_ids = set(application_ids)
+
+    if not application_ids:
+        return
+
+    with transaction.atomic():
+        # Locking the applications, in a consistent order, makes concurrent rebuilds of the same rows, e.g. by a
+        # signal and a stale refresh, run one after the other rather than both inserting the deleted rows
+        applications = list(Application.objects.select_for_update().filter(pk__in=application_ids).order_by('pk'))
+
+        names = defaultdict(list)
+        for name in ApplicantName.objects.filter(application_id__in=application_ids).order_by('-current_name'):
+            names[name.application_id_id].append(name)
+
+        personal_details = {}
+        for details in ApplicantPersonalDetails.objects.filter(application_id__in=application_ids):
+            personal_details.setdefault(details.application_id_id, details)
+
+        addresses = defaultdict(list)
+        for address in ApplicantHomeAddress.objects.filter(application_id__in=application_ids):
+            addresses[address.application_id_id].append(address)
+
+        rows = []
+        tokens = []
+
+        for application in applications:
+            row, row_tokens = _build_index_row(application, names[application.pk],
+                                               personal_details.get(application.pk), addresses[application.pk])
+            rows.append(row)
+            tokens.extend(row_tokens)
+
+        ChildminderSearchToken.objects.filter(search_index_id__in=application_ids).delete()
+        ChildminderSearchIndex.objects.filter(application_id__in=application_ids).delete()
+        ChildminderSearchIndex.objects.bulk_create(rows)
+        ChildminderSearchToken.objects.bulk_create(tokens)
+
+
+def refresh_stale_search_index():
+    """
+    Indexes applications that have no search index row, or that have been updated since theirs was built, e.g. by
+    the applicant through the Childminder service, whose saves do not reach ARC's signals.
+    Staleness is judged by Application.date_updated alone, the name, personal details and home address tables having
+    no timestamps of their own, so changes to them are only picked up where the service saving them also bumps the
+    application's date_updated.
+    """
+    stale_application_ids = Application.objects.filter(
+        Q(search_index__isnull=True) | Q(date_updated__gt=F('search_index__date_updated'))
+    ).values_list('pk', flat=True)
+
+    update_search_index(stale_application_ids)
+
+
+def rebuild_search_index(batch_size=500):
+    """
+    Rebuilds every row of the search index, batch_size applications at a time.
+    :return: The number of applications indexed
+    """
+    application_ids = list(Application.objects.values_list('pk', flat=True))
+
+    ChildminderSearchIndex.objects.exclude(application_id__in=Application.objects.all()).delete()
+
+    for start in range(0, len(application_ids), batch_size):
+        update_search_index(application_ids[start:start + batch_size])
+
+    return len(application_ids)
+
+
+def _build_index_row(application, names, personal_details, addresses):
+    """
+    :return: Tuple of the application's search index row and a list of its search tokens
+    """
+    current_name = names[0] if names else None
+    name_words = []
+
+    for name in names:
+        for word in normalise_name('{0} {1}'.format(name.first_name, name.last_name)).split():
+            if word not in name_words:
+                name_words.append(word)
+
+    home_postcodes = {normalise_postcode(address.postcode) for address in addresses}
+    care_postcodes = {normalise_postcode(address.postcode) for address in addresses if address.childcare_address}
+
+    row = ChildminderSearchIndex(
+        application_id=application,
+        application_reference=application.application_reference,
+        application_status=application.application_status,
+        date_submitted=application.date_submitted,
+        date_updated=application.date_updated,
+        applicant_name='{0} {1}'.format(current_name.first_name, current_name.last_name) if current_name else '',
+        has_name=bool(name_words),
+        has_childcare_address=bool(care_postcodes),
+        birth_day=personal_details.birth_day if personal_details else None,
+        birth_month=personal_details.birth_month if personal_details else None,
+        birth_year=personal_details.birth_year if personal_details else None,
+    )
+
+    tokens = [ChildminderSearchToken(search_index_id=application.pk, field=field, token=token)
+              for field, field_tokens in ((ChildminderSearchToken.NAME, name_words),
+                                          (ChildminderSearchToken.HOME_POSTCODE, home_postcodes),
+                                          (ChildminderSearchToken.CARE_POSTCODE, care_postcodes))
+              for token in field_tokens if token]
+
+    return row, tokens
@@ -1,17 +1,46 @@
 import datetime
+import hashlib
+import heapq
+import json
+import logging
 import re
+import time
+import uuid
+from concurrent.futures import TimeoutError
 
-from django.db.models import Q
+from django.db.models import F, Q
 from django.conf import settings
-from ..models import Application, ApplicantName
-from ..services.db_gateways import NannyGatewayActions, HMGatewayActions
+from django.core.cache import caches
+from ..models import ChildminderSearchIndex, ChildminderSearchToken
+from ..services.db_gateways import NannyGatewayActions, HMGatewayActions, submit
+from ..services.search_index import normalise_name, normalise_postcode, refresh_stale_search_index
+
+log = logging.getLogger()
+
+_CACHE_GENERATION_KEY = 'search:generation'
+_CM_SEARCH_FIELDS = ('application_id', 'application_reference', 'application_status', 'date_submitted',
+                     'date_updated', 'applicant_name')
+
+
+class SearchResults(list):
+    """
+    List of search results, flagging whether more results matched than were returned, and naming any sources that
+    could not be searched.
+    """
+
+    def __init__(self, results=(), more_results_available=False, failed_sources=(), page=1, has_next_page=False):
+        super().__init__(results)
+        self.more_results_available = more_results_available
+        self.failed_sources = list(failed_sources)
+        self.page = page
+        self.has_next_page = has_next_page
 
 
 class SearchService:
 
     @staticmethod
     def search(name: str, dob: str, home_postcode: str, care_location_postcode: str, reference: str,
-               application_type: str) -> dict:
+               application_type: str, page: int = 1, page_size: int = None, cache_scope: str = None) -> dict:
         """
         Exposed method to allow searching, given the following parameters:
         :param name: A string contained within the first_name OR last_name of an Applicant
@@ -20,271 +49,387 @@ class SearchService:
         :param care_location_postcode: A string contained within the care address(es) postcode field(s) for an Applicant
         :param reference: A string contained within the Application's reference number, only existing if submitted.
         :param application_type: A string of 'Childminder', 'Nanny' or 'All' that determines what records to fetch.
-        :return: A dictionary containing the ordered search results, prepared for displaying on the arc search view.
+        :param page: The page of results to return, counting from 1.
+        :param page_size: The number of results per page, defaulting to SEARCH_PAGE_SIZE.
+        :param cache_scope: If given, e.g. the searching user's group, results are cached for SEARCH_CACHE_TTL seconds
+         and shared with searches for the same terms in the same scope.
+        :return: A SearchResults list containing the requested page of ordered search results, prepared for displaying
+         on the arc search view.
         """
-        search_args = (name, dob, home_postcode, care_location_postcode, reference)
+        page_size = page_size or settings.SEARCH_PAGE_SIZE
 
-        # Search both Childminder and Nanny applications
-        if application_type == 'All':
-            search_results = SearchService._search_all(*search_args)
+        # Each source is asked only for the most recent results up to the end of the requested page, and never for
+        # more than SEARCH_RESULTS_LIMIT of them
+        window = min(page * page_size, settings.SEARCH_RESULTS_LIMIT)
+        capped = page * page_size >= settings.SEARCH_RESULTS_LIMIT
+        search_args = (name, dob, home_postcode, care_location_postcode, reference, window)
 
-        # Search Childminder applications only
-        elif application_type == 'Childminder':
-            search_results = SearchService._search_childminders(*search_args)
+        if application_type not in ('All', 'Childminder', 'Nanny', 'Association'):
+            raise ValueError('application_type was set to {0}, an unexpected value.')
 
-        # Search Nanny applications only
-        elif application_type == 'Nanny':
-            search_results = SearchService._search_nannies(*search_args)
+        cache_key = None
+        cached = None
 
-        elif application_type == 'Association':
-            search_results = SearchService._search_new_associations(*search_args)
+        if cache_scope is not None and settings.SEARCH_CACHE_TTL:
+            cache_key = SearchService.__get_cache_key(cache_scope, application_type, *search_args[:-1])
+            cached = SearchService.__get_cache().get(cache_key)
+
+        # A cached search answers any page within the results it holds, or any page at all if it holds every result
+        if cached is not None and (cached['window'] >= window or not cached['more_results']):
+            top_results = cached['results'][:window + 1]
+            more_results = len(top_results) > window or (cached['more_results'] and cached['window'] <= window)
+            failed_sources = []
 
         else:
-            raise ValueError('application_type was set to {0}, an unexpected value.')
+            # Search both Childminder and Nanny applications
+            if application_type == 'All':
+                search_results = SearchService._search_all(*search_args)
+
+            # Search Childminder applications only
+            elif application_type == 'Childminder':
+                search_results = SearchService._search_childminders(*search_args)
+
+            # Search Nanny applications only
+            elif application_type == 'Nanny':
+                search_results = SearchService._search_nannies(*search_args)
+
+            else:
+                search_results = SearchService._search_new_associations(*search_args)
+
+            top_results = SearchService._top_search_results(search_results, window + 1)
+            more_results = len(top_results) > window or bool(getattr(search_results, 'more_results_available', False))
+            failed_sources = getattr(search_results, 'failed_sources', ())
 
-        formatted_results = SearchService._format_search_results(search_results)
-        ordered_results = SearchService._order_search_results(formatted_results)
+            # Partial results are not kept, so the next search tries the failed sources again
+            if cache_key is not None and not failed_sources:
+                SearchService.__get_cache().set(
+                    cache_key, {'window': window, 'results': top_results, 'more_results': more_results},
+                    settings.SEARCH_CACHE_TTL)
 
-        return ordered_results
+        # Only the rows shown are formatted
+        formatted_results = SearchService._format_search_results(top_results[(page - 1) * page_size:window])
+
+        return SearchResults(formatted_results,
+                             more_results_available=more_results and capped,
+                             failed_sources=failed_sources,
+                             page=page,
+                             has_next_page=more_results and not capped)
 
     @staticmethod
-    def _search_all(name, dob, home_postcode, care_location_postcode, reference):
+    def iter_search(name: str, dob: str, home_postcode: str, care_location_postcode: str, reference: str,
+                    application_type: str, failed_sources=None):
+        """
+        Generator yielding every search result, formatted as by _format_search_results, one source after another as
+        each yields them, e.g. for exporting. Only one gateway page, or one database fetch, of results is held in
+        memory at a time, and there is no SEARCH_RESULTS_LIMIT. Results are ordered most recently submitted first
+        within each source, but are not merged across sources.
+        Parameters are as for search, and:
+        :param failed_sources: Optional list. If given, a Nanny or HM gateway source that fails is named in it, and
+         the remaining sources are still searched, so the caller can report the results as incomplete; otherwise the
+         gateway's error is raised.
+        """
+        if application_type not in ('All', 'Childminder', 'Nanny', 'Association'):
+            raise ValueError('application_type was set to {0}, an unexpected value.')
+
         search_args = (name, dob, home_postcode, care_location_postcode, reference)
 
-        cm_search_results = SearchService._search_childminders(*search_args)
-        nanny_search_results = SearchService._search_nannies(*search_args)
-        new_association_search_results = SearchService._search_new_associations(*search_args)
+        if application_type in ('All', 'Childminder'):
+            if settings.SEARCH_INDEX_REFRESH_ON_SEARCH:
+                refresh_stale_search_index()
 
+            rows = SearchService.__childminder_search_queryset(*search_args).values(*_CM_SEARCH_FIELDS).iterator()
 
-        combined_results = SearchService.__combine_search_results(cm_search_results, nanny_search_results,
-                                                                  search_list3=new_association_search_results)
+            for row in rows:
+                yield SearchService._format_search_result(SearchService.__cm_row_to_search_dict(row))
 
-        return combined_results
+        gateways = []
+
+        if application_type in ('All', 'Nanny'):
+            gateways.append(('Nanny', NannyGatewayActions()))
+
+        if application_type in ('All', 'Association') and settings.ENABLE_HM:
+            gateways.append(('Association', HMGatewayActions()))
+
+        for source, gateway in gateways:
+            try:
+                for search_dict in gateway.iter_list('arc-search', params=SearchService.__gateway_search_params(
+                        *search_args)):
+                    yield SearchService._format_search_result(search_dict)
+            except Exception:
+                if failed_sources is None:
+                    raise
+
+                log.exception('{0} search failed'.format(source))
+                failed_sources.append(source)
 
     @staticmethod
-    def _search_nannies(name, date_of_birth, home_postcode, care_location_postcode, application_reference):
+    def invalidate_cache():
         """
-        Function for handling the searching of nanny applications.
-        Gets nanny applications by use of the gateway_actions API by formulating a request (params) with the passed parameters.
-        :return: API response record
+        Evicts every cached search, e.g. when an application's status changes. Replaces the token the cache keys are
+        built from, so entries are evicted without having to know their keys. Only processes using the same cache see
+        the new token: with a per-process backend such as the default LocMemCache, other processes keep serving their
+        cached searches until SEARCH_CACHE_TTL expires, so SEARCH_CACHE_ALIAS should name a shared backend (e.g.
+        Memcached or Redis) wherever ARC runs more than one process.
         """
-        nanny_actions = NannyGatewayActions()
+        SearchService.__get_cache().set(_CACHE_GENERATION_KEY, uuid.uuid4().hex, None)
 
-        params_list = [('name', name),
-                       ('date_of_birth', date_of_birth),
-                       ('home_postcode', home_postcode),
-                       ('care_location_postcode', care_location_postcode),
-                       ('application_reference', application_reference)]
-        params = {key: val for key, val in params_list if val}
+    @staticmethod
+    def __get_cache():
+        return caches[settings.SEARCH_CACHE_ALIAS]
 
-        search_results_response = nanny_actions.list('arc-search', params=params)
+    @staticmethod
+    def __get_cache_key(cache_scope, application_type, name, dob, home_postcode, care_location_postcode, reference):
+        """
+        Builds the cache key of a search from its normalised terms, so searches differing only in case, spacing or
+         date of birth separators share an entry.
+        """
+        search_cache = SearchService.__get_cache()
+        generation = search_cache.get(_CACHE_GENERATION_KEY)
+
+        if generation is None:
+            search_cache.add(_CACHE_GENERATION_KEY, uuid.uuid4().hex, None)
+            generation = search_cache.get(_CACHE_GENERATION_KEY)
 
-        return search_results_response.record
+        terms = [cache_scope, application_type, normalise_name(name), re.split(r"[^0-9]", dob.strip()) if dob else [],
+                 normalise_postcode(home_postcode), normalise_postcode(care_location_postcode),
+                 reference.strip().upper()]
+
+        return 'search:{0}:{1}'.format(generation, hashlib.md5(json.dumps(terms).encode()).hexdigest())
 
     @staticmethod
-    def _search_new_associations(name, date_of_birth, home_postcode, care_location_postcode, application_reference):
+    def _search_all(name, dob, home_postcode, care_location_postcode, reference, limit=None):
+        """
+        Searches the Childminder, Nanny and HM sources concurrently. The Nanny and HM gateway searches run on the
+         gateway thread pool while the Childminder tables are queried, and are each given until SEARCH_SOURCE_TIMEOUT
+         seconds after the search started to respond.
+        A source that fails or times out is left out of the results and named in their failed_sources, rather than
+         failing the whole search.
+        :return: SearchResults list of dictionaries from every source that responded.
+        """
+        search_args = (name, dob, home_postcode, care_location_postcode, reference, limit)
+        deadline = time.monotonic() + settings.SEARCH_SOURCE_TIMEOUT
+
+        gateway_searches = [('Nanny', submit(SearchService._search_nannies, *search_args)),
+                            ('Association', submit(SearchService._search_new_associations, *search_args))]
+
+        search_lists = []
+        failed_sources = []
+
+        try:
+            search_lists.append(SearchService._search_childminders(*search_args))
+        except Exception:
+            log.exception('Childminder search failed')
+            failed_sources.append('Childminder')
+
+        for source, future in gateway_searches:
+            try:
+                search_lists.append(future.result(timeout=max(deadline - time.monotonic(), 0)))
+            except TimeoutError:
+                log.error('{0} search timed out after {1}s'.format(source, settings.SEARCH_SOURCE_TIMEOUT))
+                failed_sources.append(source)
+            except Exception:
+                log.exception('{0} search failed'.format(source))
+                failed_sources.append(source)
+
+        combined_results = SearchService.__combine_search_results(*search_lists)
+        combined_results.failed_sources = failed_sources
+
+        return combined_results
+
+    @staticmethod
+    def _search_nannies(name, date_of_birth, home_postcode, care_location_postcode, application_reference,
+                        limit=None):
         """
         Function for handling the searching of nanny applications.
         Gets nanny applications by use of the gateway_actions API by formulating a request (params) with the passed parameters.
-        :return: API response record
+        :return: SearchResults of the API response record
+        """
+        return SearchService.__search_gateway(NannyGatewayActions(), name, date_of_birth, home_postcode,
+                                              care_location_postcode, application_reference, limit)
+
+    @staticmethod
+    def _search_new_associations(name, date_of_birth, home_postcode, care_location_postcode, application_reference,
+                                 limit=None):
+        """
+        Function for handling the searching of new association (HM) applications.
+        Gets HM applications by use of the gateway_actions API by formulating a request (params) with the passed parameters.
+        :return: SearchResults of the API response record
         """
         if settings.ENABLE_HM:
-            hm_actions = HMGatewayActions()
+            return SearchService.__search_gateway(HMGatewayActions(), name, date_of_birth, home_postcode,
+                                                  care_location_postcode, application_reference, limit)
+
+        return SearchResults()
+
+    @staticmethod
+    def __search_gateway(gateway, name, date_of_birth, home_postcode, care_location_postcode, application_reference,
+                         limit):
+        """
+        Searches a gateway's arc-search endpoint, asking for at most limit results when given.
+        :return: SearchResults of the API response record, flagging more results available if the gateway had more
+        """
+        params = SearchService.__gateway_search_params(name, date_of_birth, home_postcode, care_location_postcode,
+                                                       application_reference)
+
+        if limit is None:
+            return SearchResults(gateway.list('arc-search', params=params).record)
+
+        params.update({'page': '1', 'page_size': str(limit)})
+        search_results_response = gateway.list('arc-search', params=params)
+        search_results_record = search_results_response.record
+
+        # Gateways that do not page their search results return them all, so are cut down to size here
+        return SearchResults(search_results_record[:limit],
+                             more_results_available=getattr(search_results_response, 'has_next_page', False) or
+                             len(search_results_record) > limit)
 
-            params_list = [('name', name),
+    @staticmethod
+    def __gateway_search_params(name, date_of_birth, home_postcode, care_location_postcode, application_reference):
+        params_list = [('name', name),
                        ('date_of_birth', date_of_birth),
                        ('home_postcode', home_postcode),
                        ('care_location_postcode', care_location_postcode),
                        ('application_reference', application_reference)]
-            params = {key: val for key, val in params_list if val}
+        return {key: val for key, val in params_list if val}
 
-            search_results_response = hm_actions.list('arc-search', params=params)
+    @staticmethod
+    def _search_childminders(name, dob, home_postcode, care_location_postcode, reference, limit=None):
+        """
+        Function for handling childminder searches.
+        First generates a queryset of the childminder search index rows matching the search, then converts those search
+         results to a standard dictionary format.
+        At most limit results are returned, defaulting to SEARCH_RESULTS_LIMIT, most recently submitted first.
+        :return: SearchResults list of dictionaries containing filtered results.
+        """
+        if settings.SEARCH_INDEX_REFRESH_ON_SEARCH:
+            refresh_stale_search_index()
 
-            search_results_record = search_results_response.record
+        # Fetch one row beyond the limit to find out whether any results were left out
+        limit = limit or settings.SEARCH_RESULTS_LIMIT
+        search_results_queryset = SearchService.__childminder_search_queryset(name, dob, home_postcode,
+                                                                              care_location_postcode, reference)
 
-        else:
-            search_results_record = []
+        search_results_dict = SearchService.__queryset_to_search_dict(search_results_queryset, limit=limit + 1)
 
-        return search_results_record
+        return SearchResults(search_results_dict[:limit], more_results_available=len(search_results_dict) > limit)
 
     @staticmethod
-    def _search_childminders(name, dob, home_postcode, care_location_postcode, reference):
+    def __childminder_search_queryset(name, dob, home_postcode, care_location_postcode, reference):
         """
-        Function for handling childminder searches.
-        First generates a queryset containing the childminder search results, then converts those search results to a
-         standard dictionary format.
-        :return: List of dictionaries containing filtered results.
+        :return: Queryset of the childminder search index rows matching the search, most recently submitted first
         """
-        query = Q()
+        # Every term is matched against the single, denormalised search index row of each application, names and
+        # postcodes through its search tokens. As before, only applicants with a name and a childcare address are
+        # searchable.
+        queryset = ChildminderSearchIndex.objects.filter(has_name=True, has_childcare_address=True)
 
-        if len(reference) > 0:
-            query.add(Q(application_reference__icontains=reference), Q.AND)
+        if re.fullmatch(r'[A-Za-z]{2}[0-9]{7}', reference):
+            queryset = queryset.filter(application_reference=reference.upper())
+        elif len(reference) > 0:
+            queryset = queryset.filter(application_reference__icontains=reference)
 
-        query.add(
-            Q(
-                Q(applicantname__first_name__icontains=name) |
-                Q(applicantname__last_name__icontains=name)
-            ), Q.AND
-        )
+        if len(name) > 0:
+            for word in normalise_name(name).split():
+                queryset = queryset.filter(SearchService.__token_query(ChildminderSearchToken.NAME, word))
 
         if len(dob) > 0:
-            # Split DOB by non-alpha characters
-            split_dob = re.split(r"[^0-9]", dob)
-
-            if len(split_dob) == 1:
-                # If only one DOB part has been supplied assume it could be day month or year
-
-                # Create four digit year if 2 digit year supplied
-                if len(split_dob[0]) == 2:
-                    previous_century_year = str(19) + split_dob[0]
-                    current_century_year = str(20) + split_dob[0]
-                else:
-                    # Otherwise allow longer values to be directly issued against query
-                    previous_century_year = split_dob[0]
-                    current_century_year = split_dob[0]
-
-                query.add(
-                    Q(
-                        Q(applicantpersonaldetails__birth_day=int(split_dob[0])) |
-                        Q(applicantpersonaldetails__birth_month=int(split_dob[0])) |
-                        Q(applicantpersonaldetails__birth_year=int(previous_century_year)) |
-                        Q(applicantpersonaldetails__birth_year=int(current_century_year))
-                    ), Q.AND
-                )
-
-            if len(split_dob) == 2:
-                # If two DOBs part have been supplied, again assume second part is either a month or a year
-
-                # Create four digit year if 2 digit year supplied
-                if len(split_dob[1]) == 2:
-                    previous_century_year = str(19) + split_dob[1]
-                    current_century_year = str(20) + split_dob[1]
-                else:
-                    # Otherwise allow longer values to be directly issued against query
-                    previous_century_year = split_dob[1]
-                    current_century_year = split_dob[1]
-
-                query.add(
-                    Q(
-                        Q(applicantpersonaldetails__birth_day=int(split_dob[0])),
-                        Q(applicantpersonaldetails__birth_month=int(split_dob[0])) |
-                        Q(applicantpersonaldetails__birth_month=int(split_dob[1])) |
-                        Q(applicantpersonaldetails__birth_year=int(previous_century_year)) |
-                        Q(applicantpersonaldetails__birth_year=int(current_century_year))
-                    ), Q.AND
-                )
-
-            if len(split_dob) == 3:
-
-                # Create four digit year if 2 digit year supplied
-                if len(split_dob[2]) == 2:
-                    previous_century_year = str(19) + split_dob[2]
-                    current_century_year = str(20) + split_dob[2]
-                else:
-                    # Otherwise allow longer values to be directly issued against query
-                    previous_century_year = split_dob[2]
-                    current_century_year = split_dob[2]
-
-                query.add(
-                    Q(
-                        Q(applicantpersonaldetails__birth_day=int(split_dob[0])),
-                        Q(applicantpersonaldetails__birth_month=int(split_dob[0])) |
-                        Q(applicantpersonaldetails__birth_month=int(split_dob[1])) |
-                        Q(applicantpersonaldetails__birth_year=int(previous_century_year)) |
-                        Q(applicantpersonaldetails__birth_year=int(current_century_year))
-                    ), Q.AND
-                )
-
-        address_query = Q()
-
-        home_address_query = Q()
-        home_address_query.add(
-            Q(
-                Q(applicanthomeaddress__childcare_address=False),
-                Q(applicanthomeaddress__postcode__icontains=home_postcode)
-            ), Q.AND
-        )
+            queryset = queryset.filter(SearchService.__cm_dob_query(dob))
 
-        home_address_query.add(
-            Q(applicanthomeaddress__postcode__icontains=home_postcode), Q.OR
-        )
+        if len(home_postcode) > 0:
+            queryset = queryset.filter(SearchService.__token_query(ChildminderSearchToken.HOME_POSTCODE,
+                                                                   normalise_postcode(home_postcode)))
 
-        childcare_address_query = Q()
-        childcare_address_query.add(
-            Q(
-                Q(applicanthomeaddress__childcare_address=True),
-                Q(applicanthomeaddress__postcode__icontains=care_location_postcode)
-            ), Q.AND
-        )
+        if len(care_location_postcode) > 0:
+            queryset = queryset.filter(SearchService.__token_query(ChildminderSearchToken.CARE_POSTCODE,
+                                                                   normalise_postcode(care_location_postcode)))
+
+        return queryset.order_by(F('date_submitted').desc(nulls_last=True))
+
+    @staticmethod
+    def __token_query(field, term):
+        """
+        Builds the search index filter for applications with a token of the given field starting with term, e.g. a
+        name word starting 'lov' or a postcode starting 'WA14', matched against the index on the token column.
+        :return: Q object
+        """
+        return Q(pk__in=ChildminderSearchToken.objects.filter(field=field, token__startswith=term)
+                 .values('search_index_id'))
+
+    @staticmethod
+    def __cm_dob_query(dob):
+        """
+        Builds the search index filter for a full or partial date of birth, e.g. '12', '12/1986' or
+         '12/05/86'.
+        :return: Q object
+        """
+        # Split DOB by non-alpha characters
+        split_dob = re.split(r"[^0-9]", dob)
 
-        address_query.add(home_address_query, Q.OR)
-        address_query.add(childcare_address_query, Q.AND)
+        if len(split_dob) > 3:
+            return Q()
 
-        query.add(address_query, Q.AND)
+        # The last part supplied could be a year; create four digit years if a 2 digit year was supplied, otherwise
+        # allow longer values to be directly issued against query
+        if len(split_dob[-1]) == 2:
+            previous_century_year = str(19) + split_dob[-1]
+            current_century_year = str(20) + split_dob[-1]
+        else:
+            previous_century_year = split_dob[-1]
+            current_century_year = split_dob[-1]
 
-        search_results_queryset = Application.objects.filter(query)
+        year_query = Q(birth_year=int(previous_century_year)) | Q(birth_year=int(current_century_year))
 
-        search_results_dict = SearchService.__queryset_to_search_dict(search_results_queryset)
+        if len(split_dob) == 1:
+            # If only one DOB part has been supplied assume it could be day month or year
+            return Q(birth_day=int(split_dob[0])) | Q(birth_month=int(split_dob[0])) | year_query
 
-        return search_results_dict
+        # Otherwise the first part is the day, and the second part either a month or a year
+        return Q(
+            Q(birth_day=int(split_dob[0])),
+            Q(birth_month=int(split_dob[0])) | Q(birth_month=int(split_dob[1])) | year_query
+        )
 
     @staticmethod
-    def __queryset_to_search_dict(queryset):
+    def __queryset_to_search_dict(queryset, limit=None):
         """
-        Converts a Childminder queryset to the same response formatting as a nanny search result record.
+        Converts a Childminder search index queryset to the same response formatting as a nanny search result record.
         The returned dictionary contains the minimum amount of information required to generate the search table.
-        Note: date_submitted and date_accessed are also formatted to strings inside this function.
+        Note: date_submitted and date_accessed are left as datetimes, and are formatted to strings by
+         _format_search_results.
         :param queryset:
+        :param limit: Maximum number of rows to fetch, or None for all of them
         :return: A search_list (List of search dictionaries)
         """
-        search_list = [
-            {'application_id': query.application_id,
-             'application_reference': query.application_reference,
-             'application_type': 'Childminder',
-             'applicant_name': SearchService.__cm_get_name(query.application_id),
-             'date_submitted': query.date_submitted.strftime('%d/%m/%Y') if query.date_submitted else "",
-             'date_accessed': query.date_updated.strftime('%d/%m/%Y') if query.date_updated else "",
-             'submission_type': query.application_status}
-            for query in queryset]
+        rows = queryset.values(*_CM_SEARCH_FIELDS)[:limit]
 
-        return search_list
+        return [SearchService.__cm_row_to_search_dict(row) for row in rows]
 
     @staticmethod
-    def __cm_get_name(app_id):
-        """
-        Gets the applicant's first_name and last_name.
-        :param app_id: Applicant's id
-        :return: String of first_name, last_name
-        """
-        if ApplicantName.objects.filter(application_id=app_id).exists():
-            applicant_name_record = ApplicantName.objects.get(application_id=app_id)
-
-            first_name = applicant_name_record.first_name
-            last_name = applicant_name_record.last_name
-
-            return "{0} {1}".format(first_name, last_name)
-        else:
-            return ""
+    def __cm_row_to_search_dict(row):
+        return {'application_id': row['application_id'],
+                'application_reference': row['application_reference'],
+                'application_type': 'Childminder',
+                'applicant_name': row['applicant_name'],
+                'date_submitted': row['date_submitted'],
+                'date_accessed': row['date_updated'],
+                'submission_type': row['application_status']}
 
     @staticmethod
-    def __combine_search_results(search_list1, search_list2, search_list3=None):
+    def __combine_search_results(*search_lists):
         """
-        Combines two search_lists into a single list.
-        :return:
+        Combines search_lists into a single list.
+        :return: SearchResults, flagging more results available if any of the search_lists did
         """
-        combined_list = search_list1.copy()
-        combined_list += search_list2
-
-        if search_list3 is not None:
-            combined_list += search_list3
-
-        return combined_list
+        return SearchResults(
+            [search_dict for search_list in search_lists for search_dict in search_list],
+            more_results_available=any(getattr(search_list, 'more_results_available', False)
+                                       for search_list in search_lists))
 
     @staticmethod
     def _order_search_results(search_list):
         """
-        Orders search_list by it's date_accessed field.
-        The key used will also append all blank values (None or "") for date_accessed to the end of the ordered list.
+        Orders search_list by it's date_submitted field.
+        The key used will also append all blank values (None or "") for date_submitted to the end of the ordered list.
         :param search_list:
         :return: A sorted search_list
         """
@@ -292,16 +437,33 @@ class SearchService:
                       key=SearchService._order_dict,
                       reverse=True)
 
+    @staticmethod
+    def _top_search_results(search_list, count):
+        """
+        Gets the count most recently submitted entries of search_list, in the same order as _order_search_results,
+        without sorting the whole list.
+        :return: A sorted search_list of at most count entries
+        """
+        return heapq.nlargest(count, search_list, key=SearchService._order_dict)
+
     @staticmethod
     def _order_dict(search_dict):
         """
-        Converts the passed search_dict's date_submitted parameter to a datetime for comparison.
-        If the date_submitted is invalid, returns the minimum value date.
-        :param search_dict: Formatted dictionary, expecting date_submitted to be in format DD/MM/YYYY (aka %d/%m/%Y)
-        :return: Datetime
+        Gets the passed search_dict's date_submitted parameter as a datetime for comparison.
+        If the date_submitted is blank, returns the minimum value date.
+        :param search_dict: Dictionary with date_submitted as a datetime, as for Childminder results, or as a string in
+         format DD/MM/YYYY (aka %d/%m/%Y), as for gateway results
+        :return: Naive datetime
         """
-        return datetime.datetime.strptime(search_dict['date_submitted'], '%d/%m/%Y') if search_dict[
-            'date_submitted'] else datetime.datetime.min
+        date_submitted = search_dict['date_submitted']
+
+        if not date_submitted:
+            return datetime.datetime.min
+
+        if isinstance(date_submitted, datetime.datetime):
+            return date_submitted.replace(tzinfo=None)
+
+        return datetime.datetime.strptime(date_submitted, '%d/%m/%Y')
 
     @staticmethod
     def _format_search_results(search_list):
@@ -310,22 +472,38 @@ class SearchService:
         :param search_list: A list of dictionaries to be displayed.
         :return: A list of dictionaries (of equal length to search_list) with appended and formatted information.
         """
-        formatted_search_results = [
-            {'application_id': search_dict['application_id'],
-             'application_reference': search_dict['application_reference'],
-             'application_type': search_dict['application_type'],
-             'applicant_name': search_dict['applicant_name'],
-             'date_submitted': search_dict['date_submitted'],
-             'date_accessed': search_dict['date_accessed'],
-             'submission_type': SearchService.__format_submission_type(search_dict['submission_type']),
-             'summary_link': '/arc/search-summary?id={0}&app_type={1}'.format(str(search_dict['application_id']),
-                                                                              search_dict['application_type']),
-             'audit_link': '/arc/auditlog?id={0}&app_type={1}'.format(str(search_dict['application_id']),
-                                                                      search_dict['application_type'])}
-            for search_dict in search_list]
+        formatted_search_results = [SearchService._format_search_result(search_dict) for search_dict in search_list]
 
         return formatted_search_results
 
+    @staticmethod
+    def _format_search_result(search_dict):
+        """
+        Converts a single search result dictionary to the displayable format used by _format_search_results.
+        """
+        return {'application_id': search_dict['application_id'],
+                'application_reference': search_dict['application_reference'],
+                'application_type': search_dict['application_type'],
+                'applicant_name': search_dict['applicant_name'],
+                'date_submitted': SearchService.__format_date(search_dict['date_submitted']),
+                'date_accessed': SearchService.__format_date(search_dict['date_accessed']),
+                'submission_type': SearchService.__format_submission_type(search_dict['submission_type']),
+                'summary_link': '/arc/search-summary?id={0}&app_type={1}'.format(str(search_dict['application_id']),
+                                                                                 search_dict['application_type']),
+                'audit_link': '/arc/auditlog?id={0}&app_type={1}'.format(str(search_dict['application_id']),
+                                                                         search_dict['application_type'])}
+
+    @staticmethod
+    def __format_date(date):
+        """
+        Converts a datetime to a displayable DD/MM/YYYY string. Gateway results already hold their dates as strings.
+        :return: String of the date, or an empty string if there is none.
+        """
+        if isinstance(date, datetime.datetime):
+            return date.strftime('%d/%m/%Y')
+
+        return date or ""
+
     @staticmethod
     def __format_submission_type(submission_type: str) -> str:
         """
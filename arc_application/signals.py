@@ -0,0 +1,28 @@
+"""
+OFS-MORE-CCN3: Apply to be a Childminder Beta
+-- signals.py --
+
+@author: Informed Solutions
+
+Receivers keeping the Childminder search index current as ARC saves to the tables it is built from.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Application, ApplicantHomeAddress, ApplicantName, ApplicantPersonalDetails
+from .services.search_index import update_search_index
+
+
+@receiver(post_save, sender=Application)
+def index_application(sender, instance, **kwargs):
+    update_search_index([instance.pk])
+
+
+@receiver(post_save, sender=ApplicantName)
+@receiver(post_delete, sender=ApplicantName)
+@receiver(post_save, sender=ApplicantPersonalDetails)
+@receiver(post_delete, sender=ApplicantPersonalDetails)
+@receiver(post_save, sender=ApplicantHomeAddress)
+@receiver(post_delete, sender=ApplicantHomeAddress)
+def index_applicant_details(sender, instance, **kwargs):
+    update_search_index([instance.application_id_id])
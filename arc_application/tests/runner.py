@@ -0,0 +1,36 @@
+"""
+Test runner for the ARC test suite.
+"""
+import unittest
+
+from xmlrunner.extra.djangotestrunner import XMLTestRunner
+
+from ..services import http_client
+
+
+class ARCTestRunner(XMLTestRunner):
+    """
+    XMLTestRunner that closes every outbound circuit breaker before the suite and after each test, so a test whose
+    gateway calls fail cannot leave a breaker open, or a retry budget spent, for the tests run after it.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        http_client.reset_circuit_breakers()
+
+    def build_suite(self, *args, **kwargs):
+        suite = super().build_suite(*args, **kwargs)
+
+        for test in _iter_tests(suite):
+            test.addCleanup(http_client.reset_circuit_breakers)
+
+        return suite
+
+
+def _iter_tests(suite):
+    # A ParallelTestSuite, built for --parallel, holds its tests as subsuites
+    for test in getattr(suite, 'subsuites', suite):
+        if isinstance(test, unittest.TestSuite):
+            yield from _iter_tests(test)
+        else:
+            yield test
@@ -0,0 +1,345 @@
+"""
+Tests for assuring that the daily reporting views gather and generate reports correctly.
+"""
+import os
+import tempfile
+from datetime import date, datetime, timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.http import QueryDict
+from django.test import TestCase, override_settings, tag
+from django.urls import reverse
+from django.utils import timezone
+from timeline_logger.models import TimelineLog
+
+from ...models import Application, ReportingFact, ReportingWatermark, ReportJob
+from ...services.db_gateways import HMGatewayActions, NannyGatewayActions
+from ...services.report_jobs import claim_report_job, report_job_path, request_report_job, \
+    requeue_stale_report_jobs
+from ...services.reporting_facts import update_reporting_facts
+from ...views.daily_reporting import ApplicationsAuditLogView, ApplicationsInQueueView, ApplicationsReturnedView, \
+    DailyReportingBaseView
+
+
+def create_timeline_log(application, user, action, user_type='applicant'):
+    return TimelineLog.objects.create(content_object=application, user=user,
+                                      template='timeline_logger/application_action.txt',
+                                      extra_data={'user_type': user_type, 'action': action, 'entity': 'application'})
+
+
+@tag('unit')
+class BulkApplicationHistoryUnitTests(TestCase):
+    """
+    Test case for listing the histories of many applications at once.
+    """
+    def setUp(self):
+        self.view = DailyReportingBaseView()
+        self.user = User.objects.create_user(username='governor_tARCin', password='my_secret')
+        self.applications = [Application.objects.create(application_status='SUBMITTED') for _ in range(3)]
+
+        for application in self.applications[:2]:
+            create_timeline_log(application, None, 'created by')
+            create_timeline_log(application, None, 'submitted by')
+            create_timeline_log(application, self.user, 'assigned to', 'reviewer')
+
+    def test_childminder_histories_match_single_application_histories(self):
+        app_ids = [application.application_id for application in self.applications]
+
+        with self.assertNumQueries(1):
+            histories = self.view.bulk_application_history(app_ids, 'Childminder')
+
+        for app_id in app_ids:
+            self.assertEqual(histories[str(app_id)], self.view.application_history(str(app_id), 'Childminder'))
+
+        self.assertEqual(histories[str(app_ids[2])], {})
+
+    def get_gateway_logs(self):
+        timestamp = '2019-01-02T10:00:00.000000+00:00'
+        return [{'id': 1, 'object_id': 'adult-1', 'user': None, 'timestamp': timestamp,
+                 'extra_data': {'action': 'submitted by', 'user_type': 'applicant'}},
+                {'id': 2, 'object_id': 'adult-2', 'user': None, 'timestamp': timestamp,
+                 'extra_data': {'action': 'created by', 'user_type': 'applicant'}}]
+
+    def test_gateway_histories_of_few_ids_are_filtered_on_them(self):
+        with patch.object(HMGatewayActions, 'iter_list', return_value=iter(self.get_gateway_logs())) as mock_iter_list:
+            histories = self.view.bulk_application_history(['adult-3', 'adult-1'], 'Adult')
+
+        mock_iter_list.assert_called_once_with('timeline-log', params={'object_id__in': 'adult-1,adult-3'})
+        self.assertEqual(list(histories['adult-1'].values()), [{'Submitted': 'applicant'}])
+        self.assertEqual(histories['adult-3'], {})
+        self.assertNotIn('adult-2', histories)
+
+    @override_settings(REPORTING_HISTORY_ID_FILTER_LIMIT=1)
+    def test_gateway_histories_of_many_ids_are_listed_in_one_sweep(self):
+        with patch.object(HMGatewayActions, 'iter_list', return_value=iter(self.get_gateway_logs())) as mock_iter_list:
+            histories = self.view.bulk_application_history(['adult-1', 'adult-3'], 'Adult')
+
+        mock_iter_list.assert_called_once_with('timeline-log', params={})
+        self.assertEqual(list(histories['adult-1'].values()), [{'Submitted': 'applicant'}])
+        self.assertNotIn('adult-2', histories)
+
+    def test_gateway_histories_of_no_ids_make_no_calls(self):
+        with patch.object(HMGatewayActions, 'iter_list') as mock_iter_list:
+            self.assertEqual(self.view.bulk_application_history([], 'Adult'), {})
+
+        mock_iter_list.assert_not_called()
+
+
+@tag('unit')
+@override_settings(REPORTING_FACTS_REFRESH_ON_REPORT=False)
+class ReportingFactsUnitTests(TestCase):
+    """
+    Test case for the daily reporting totals.
+    """
+    def setUp(self):
+        self.application = Application.objects.create(application_status='SUBMITTED')
+        self.gateway_patchers = [patch.object(gateway, 'iter_list', side_effect=lambda *args, **kwargs: iter([]))
+                                 for gateway in (HMGatewayActions, NannyGatewayActions)]
+
+        for patcher in self.gateway_patchers:
+            patcher.start()
+
+    def tearDown(self):
+        for patcher in self.gateway_patchers:
+            patcher.stop()
+
+    def log_action(self, action, logged):
+        log = create_timeline_log(self.application, None, action)
+        TimelineLog.objects.filter(pk=log.pk).update(timestamp=logged.replace(tzinfo=timezone.utc))
+
+    def get_facts(self):
+        return {(fact.date, fact.metric): fact.count for fact in ReportingFact.objects.filter(service='Childminder')}
+
+    def test_events_are_counted_by_day(self):
+        self.log_action('returned by', datetime(2020, 3, 1, 9))
+        self.log_action('returned by', datetime(2020, 3, 1, 17))
+        self.log_action('accepted by', datetime(2020, 3, 2, 9))
+        self.log_action('created by', datetime(2020, 3, 2, 9))
+
+        update_reporting_facts()
+
+        self.assertEqual(self.get_facts(), {(date(2020, 3, 1), 'returned'): 2, (date(2020, 3, 2), 'processed'): 1})
+        self.assertEqual(ReportingWatermark.objects.get(service='Childminder').aggregated_to, date(2020, 3, 2))
+
+    def test_update_is_idempotent_and_incremental(self):
+        self.log_action('returned by', datetime(2020, 3, 1, 9))
+        self.log_action('returned by', datetime(2020, 3, 2, 9))
+        update_reporting_facts()
+        update_reporting_facts()
+
+        self.assertEqual(self.get_facts(), {(date(2020, 3, 1), 'returned'): 1, (date(2020, 3, 2), 'returned'): 1})
+
+        self.log_action('returned by', datetime(2020, 3, 2, 12))
+        self.log_action('returned by', datetime(2020, 3, 3, 9))
+        # Days before the watermark are not recounted
+        ReportingFact.objects.filter(date=date(2020, 3, 1)).update(count=5)
+        update_reporting_facts()
+
+        self.assertEqual(self.get_facts(), {(date(2020, 3, 1), 'returned'): 5, (date(2020, 3, 2), 'returned'): 2,
+                                            (date(2020, 3, 3), 'returned'): 1})
+
+    def test_gateway_timeline_is_read_from_watermark(self):
+        ReportingWatermark.objects.create(service='Nanny', aggregated_to=date(2020, 3, 2))
+
+        with patch.object(NannyGatewayActions, 'iter_list', return_value=iter([])) as mock_iter_list:
+            update_reporting_facts(['Nanny'])
+
+        mock_iter_list.assert_called_once_with('timeline-log', params={'timestamp__gte': '2020-03-02T00:00:00'})
+
+    def test_returned_report_reads_totals(self):
+        self.log_action('returned by', datetime(2020, 2, 20, 9))
+        update_reporting_facts()
+
+        returned_apps = list(ApplicationsReturnedView().get_applications_returned())
+
+        self.assertEqual(returned_apps[2]['Childminder returned'], 1)
+        self.assertEqual(returned_apps[-1]['All services returned'], 1)
+
+
+@tag('unit')
+class QueueDepthUnitTests(TestCase):
+    """
+    Test case for the daily counts of the applications in queue report.
+    """
+    def test_dates_are_counted_by_day(self):
+        dates = [datetime(2020, 2, 19, 9), datetime(2020, 2, 19, 17), datetime(2020, 2, 21, 9), False]
+
+        counts = ApplicationsInQueueView().count_by_day(dates, datetime(2020, 2, 19), datetime(2020, 2, 22, 12))
+
+        self.assertEqual(counts, [(datetime(2020, 2, 19), 2), (datetime(2020, 2, 20), 0),
+                                  (datetime(2020, 2, 21), 1), (datetime(2020, 2, 22), 0)])
+
+
+@tag('unit')
+class AuditLogUnitTests(TestCase):
+    """
+    Test case for the streamed applications audit log.
+    """
+    def setUp(self):
+        self.application = Application.objects.create(application_status='SUBMITTED', application_reference='CM1000001')
+        create_timeline_log(self.application, None, 'submitted by')
+        create_timeline_log(self.application, None, 'flagged by')
+
+    def test_header_is_produced_before_any_query(self):
+        rows = ApplicationsAuditLogView().get_applications_audit_log()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(next(rows)['URN'], 'URN')
+
+    def test_logged_actions_are_streamed_as_rows(self):
+        with patch.object(HMGatewayActions, 'iter_list', side_effect=lambda *args, **kwargs: iter([])), \
+                patch.object(NannyGatewayActions, 'iter_list', side_effect=lambda *args, **kwargs: iter([])):
+            rows = list(ApplicationsAuditLogView().get_applications_audit_log())
+
+        self.assertEqual(len(rows), 2)
+        self.assertEqual((rows[1]['URN'], rows[1]['Type'], rows[1]['Action']), ('CM1000001', 'CM', 'Submitted'))
+
+
+@tag('unit')
+@override_settings(REPORTING_FACTS_REFRESH_ON_REPORT=False, REPORT_JOBS_ENABLED=True)
+class ReportJobUnitTests(TestCase):
+    """
+    Test case for generating reports in the background.
+    """
+    def setUp(self):
+        self.storage_dir = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(REPORT_STORAGE_DIR=self.storage_dir.name)
+        self.settings_override.enable()
+        self.user = User.objects.create_user(username='governor_tARCin', password='my_secret')
+        self.client.login(username='governor_tARCin', password='my_secret')
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.storage_dir.cleanup()
+
+    def test_report_request_is_queued(self):
+        response = self.client.post(reverse('applications-returned') + '?service=nanny')
+
+        job = ReportJob.objects.get()
+        self.assertEqual((job.status, job.services), (ReportJob.QUEUED, 'Nanny'))
+        self.assertRedirects(response, reverse('report-job', kwargs={'job_id': job.job_id}))
+        self.assertEqual(self.client.get(response.url).status_code, 200)
+
+    def test_report_is_not_queued_on_get(self):
+        response = self.client.get(reverse('applications-returned'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(ReportJob.objects.exists())
+
+        job = request_report_job('applications-returned', self.user)
+        response = self.client.get(reverse('applications-returned'))
+
+        self.assertRedirects(response, reverse('report-job', kwargs={'job_id': job.job_id}))
+
+    def test_identical_requests_reuse_job(self):
+        job = request_report_job('applications-returned', self.user)
+
+        self.assertEqual(request_report_job('applications-returned', self.user), job)
+        self.assertNotEqual(request_report_job('applications-processed', self.user), job)
+
+        ReportJob.objects.filter(pk=job.pk).update(status=ReportJob.FAILED)
+        self.assertNotEqual(request_report_job('applications-returned', self.user), job)
+
+    def test_worker_generates_report_for_download(self):
+        job = request_report_job('applications-returned', self.user)
+
+        call_command('run_report_jobs', once=True, stdout=StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ReportJob.COMPLETE)
+        self.assertTrue(os.path.exists(report_job_path(job)))
+
+        response = self.client.get(reverse('report-job', kwargs={'job_id': job.job_id}))
+        content = b''.join(response.streaming_content).decode()
+        self.assertTrue(content.startswith('Date,Childminder returned'))
+        self.assertIn(job.file_name, response['Content-Disposition'])
+
+    def test_jobs_are_only_shown_to_the_requesting_user(self):
+        other_user = User.objects.create_user(username='other_tARCin', password='my_secret')
+        job = request_report_job('applications-returned', other_user)
+
+        response = self.client.get(reverse('report-job', kwargs={'job_id': job.job_id}))
+
+        # The project's handler404 renders its page without a 404 status code
+        self.assertTemplateUsed(response, '404.html')
+        self.assertTemplateNotUsed(response, 'report_job.html')
+        self.assertNotIn('Content-Disposition', response)
+        self.assertNotEqual(request_report_job('applications-returned', self.user), job)
+
+    def test_failed_job_is_retried_with_its_filters(self):
+        job = request_report_job('applications-returned', self.user, start_date=date(2020, 3, 1),
+                                 services=('Nanny',))
+        ReportJob.objects.filter(pk=job.pk).update(status=ReportJob.FAILED)
+
+        response = self.client.get(reverse('report-job', kwargs={'job_id': job.job_id}))
+
+        self.assertEqual(response.context['report_url'],
+                         reverse('applications-returned') + '?start=2020-03-01&service=Nanny')
+
+    @override_settings(REPORT_JOB_TIMEOUT=60)
+    def test_stale_running_jobs_are_queued_again(self):
+        job = request_report_job('applications-returned', self.user)
+        self.assertEqual(claim_report_job(), job)
+
+        self.assertEqual(requeue_stale_report_jobs(), 0)
+        ReportJob.objects.filter(pk=job.pk).update(date_started=timezone.now() - timedelta(seconds=61))
+        self.assertEqual(requeue_stale_report_jobs(), 1)
+
+        self.assertEqual(claim_report_job(), job)
+
+
+@tag('unit')
+@override_settings(REPORTING_FACTS_REFRESH_ON_REPORT=False, REPORT_JOBS_ENABLED=False)
+class ReportFiltersUnitTests(TestCase):
+    """
+    Test case for the start, end and service filters of the reporting views.
+    """
+    def setUp(self):
+        User.objects.create_user(username='governor_tARCin', password='my_secret')
+        self.client.login(username='governor_tARCin', password='my_secret')
+
+    def test_filters_are_read_from_query_parameters(self):
+        view = DailyReportingBaseView()
+        params = QueryDict('start=2020-03-01&end=2020-03-07&service=Nanny,adult')
+
+        self.assertEqual(view.parse_report_filters(params), {'start_date': date(2020, 3, 1),
+                                                             'end_date': date(2020, 3, 7),
+                                                             'services': ('Adult', 'Nanny')})
+
+    def test_invalid_filters_are_rejected(self):
+        for query in ('start=01/03/2020', 'service=cleaner'):
+            response = self.client.get(reverse('applications-returned') + '?' + query)
+            self.assertEqual(response.status_code, 400)
+
+    def test_daily_report_covers_requested_days_and_services(self):
+        ReportingFact.objects.create(date=date(2020, 3, 2), service='Childminder', metric='returned', count=2)
+        ReportingFact.objects.create(date=date(2020, 3, 2), service='Nanny', metric='returned', count=3)
+        ReportingFact.objects.create(date=date(2020, 3, 9), service='Nanny', metric='returned', count=4)
+
+        view = ApplicationsReturnedView()
+        view.set_report_filters(start_date=date(2020, 3, 1), end_date=date(2020, 3, 7), services=('Nanny',))
+        rows = list(view.get_applications_returned())
+
+        self.assertEqual(rows[1]['Date'], '01 March 2020')
+        self.assertEqual(len(rows), 9)
+        self.assertEqual(rows[-1], {'Date': 'Total', 'Childminder returned': 0, 'New Association returned': 0,
+                                    'Nanny returned': 3, 'All services returned': 3})
+
+    def test_timeline_window_is_pushed_to_sources(self):
+        view = DailyReportingBaseView()
+        view.set_report_filters(start_date=date(2020, 3, 1), end_date=date(2020, 3, 7))
+        logs = [{'object_id': 'adult-1', 'user': None, 'extra_data': {}, 'timestamp': timestamp}
+                for timestamp in ('2020-03-01T10:00:00.000000+00:00', '2020-03-08T10:00:00.000000+00:00')]
+
+        with patch.object(HMGatewayActions, 'iter_list', return_value=iter(logs)) as mock_iter_list:
+            entries = list(view.iter_timeline_log('Adult'))
+
+        mock_iter_list.assert_called_once_with('timeline-log', params={'timestamp__gte': '2020-03-01T00:00:00',
+                                                                       'timestamp__lt': '2020-03-08T00:00:00'})
+        self.assertEqual([entry[1] for entry in entries], [datetime(2020, 3, 1, 10)])
+        self.assertEqual(view.get_timeline_log_filters(),
+                         {'timestamp__gte': datetime(2020, 3, 1, tzinfo=timezone.utc),
+                          'timestamp__lt': datetime(2020, 3, 8, tzinfo=timezone.utc)})
@@ -0,0 +1,602 @@
+"""
+Tests for the gateway client in services.db_gateways and its supporting HTTP plumbing.
+"""
+import json
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings, tag
+from django.urls import reverse
+
+from ...middleware import GatewayUnavailableMiddleware
+from ...services import db_gateways, gateway_metrics, http_client
+from ...services.db_gateways import NannyGatewayActions, HMGatewayActions
+from ..utils import patch_for_setUp
+
+
+class GatewayTestCase(TestCase):
+    """
+    Test case whose gateway calls are answered by a mock of requests.Session.get, available as self.mock_get.
+    """
+
+    def setUp(self):
+        self.mock_get = patch_for_setUp(self, 'requests.Session.get')
+
+
+class HttpClientUnitTests(TestCase):
+
+    def tearDown(self):
+        http_client.close_sessions()
+
+    @tag('unit')
+    def test_same_host_shares_a_session(self):
+        first = http_client.get_session('http://nanny-gateway:8000/nanny-gateway/api/v1/')
+        second = http_client.get_session('http://nanny-gateway:8000/something-else/')
+
+        self.assertIs(first, second)
+
+    @tag('unit')
+    def test_different_hosts_get_different_sessions(self):
+        nanny_session = http_client.get_session('http://nanny-gateway:8000/')
+        hm_session = http_client.get_session('http://hm-gateway:8000/')
+
+        self.assertIsNot(nanny_session, hm_session)
+
+    @tag('unit')
+    def test_gateway_verbs_are_issued_through_pooled_session(self):
+        session = http_client.get_session(NannyGatewayActions.target_url_prefix)
+
+        with mock.patch.object(session, 'get') as mock_get:
+            mock_get.return_value.status_code = 404
+            NannyGatewayActions().read('application', params={'application_id': '1234'})
+
+        mock_get.assert_called_once()
+
+
+@override_settings(OUTBOUND_HTTP_RETRY_BACKOFF=0, OUTBOUND_HTTP_MAX_RETRIES=2,
+                   OUTBOUND_HTTP_BREAKER_FAILURE_THRESHOLD=3, OUTBOUND_HTTP_BREAKER_RESET_TIMEOUT=60)
+class OutboundHttpPolicyUnitTests(TestCase):
+    url = 'http://nanny-gateway:8000/api/v1/application/1234/'
+
+    @tag('unit')
+    def test_calls_are_made_with_the_service_timeout(self):
+        with mock.patch('requests.Session.get') as mock_get:
+            mock_get.return_value.status_code = 200
+            http_client.request('notify', 'get', self.url)
+
+        self.assertEqual(mock_get.call_args[1]['timeout'], http_client.get_timeout('notify'))
+
+    @tag('unit')
+    def test_idempotent_calls_are_retried(self):
+        with mock.patch('requests.Session.get') as mock_get:
+            mock_get.side_effect = [mock.Mock(status_code=503), mock.Mock(status_code=200)]
+            response = http_client.request('nanny-gateway', 'get', self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_get.call_count, 2)
+
+    @tag('unit')
+    def test_non_idempotent_calls_are_not_retried(self):
+        with mock.patch('requests.Session.post') as mock_post:
+            mock_post.return_value.status_code = 503
+            response = http_client.request('nanny-gateway', 'post', self.url)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(mock_post.call_count, 1)
+
+    @tag('unit')
+    @override_settings(OUTBOUND_HTTP_RETRY_BUDGET_RATIO=0, OUTBOUND_HTTP_RETRY_BUDGET_CAPACITY=1)
+    def test_retries_stop_when_budget_is_spent(self):
+        with mock.patch('requests.Session.get') as mock_get:
+            mock_get.side_effect = requests.Timeout
+
+            for _ in range(2):
+                with self.assertRaises(requests.Timeout):
+                    http_client.request('nanny-gateway', 'get', self.url)
+
+        self.assertEqual(mock_get.call_count, 3)
+
+    @tag('unit')
+    def test_breaker_opens_after_repeated_failures(self):
+        with mock.patch('requests.Session.get') as mock_get:
+            mock_get.side_effect = requests.ConnectionError
+
+            with self.assertRaises(requests.ConnectionError):
+                http_client.request('nanny-gateway', 'get', self.url)
+
+            with self.assertRaises(http_client.CircuitOpenError):
+                http_client.request('nanny-gateway', 'get', self.url)
+
+        self.assertEqual(mock_get.call_count, 3)
+        self.assertEqual(http_client.get_circuit_breaker_stats()['nanny-gateway'],
+                         {'state': 'open', 'failures': 3, 'trips': 1})
+
+    @tag('unit')
+    def test_error_responses_do_not_open_breaker(self):
+        with mock.patch('requests.Session.get') as mock_get:
+            mock_get.return_value.status_code = 500
+
+            for _ in range(4):
+                self.assertEqual(http_client.request('nanny-gateway', 'get', self.url).status_code, 500)
+
+        self.assertEqual(http_client.get_circuit_breaker_stats()['nanny-gateway'],
+                         {'state': 'closed', 'failures': 0, 'trips': 0})
+
+    @tag('unit')
+    def test_open_breaker_serves_unavailable_page(self):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+
+        response = GatewayUnavailableMiddleware(lambda request: None).process_exception(
+            request, http_client.CircuitOpenError())
+
+        self.assertEqual(response.status_code, 503)
+
+    @tag('unit')
+    def test_breaker_closes_after_successful_trial_call(self):
+        breaker = http_client.get_circuit_breaker('nanny-gateway')
+
+        for _ in range(3):
+            breaker.record_failure()
+
+        breaker.opened_at -= 60
+
+        with mock.patch('requests.Session.get') as mock_get:
+            mock_get.return_value.status_code = 200
+            http_client.request('nanny-gateway', 'get', self.url)
+
+        self.assertEqual(breaker.state, http_client.CircuitBreaker.CLOSED)
+
+
+class DBGatewayActionsUnitTests(TestCase):
+
+    @tag('unit')
+    def test_gateway_clients_are_singletons_per_class(self):
+        self.assertIs(NannyGatewayActions(), NannyGatewayActions())
+        self.assertIsNot(NannyGatewayActions(), HMGatewayActions())
+
+    @tag('unit')
+    def test_patched_verbs_are_used_by_existing_instances(self):
+        gateway = NannyGatewayActions()
+
+        with mock.patch.object(NannyGatewayActions, 'read') as mock_read:
+            gateway.read('application', params={'application_id': '1234'})
+
+        mock_read.assert_called_once_with('application', params={'application_id': '1234'})
+
+    @tag('unit')
+    def test_unexpected_status_code_is_logged(self):
+        with mock.patch('requests.Session.get') as mock_get, \
+                mock.patch('arc_application.services.db_gateways.logger') as mock_logger:
+            mock_get.return_value.status_code = 500
+            HMGatewayActions().read('adult', params={'adult_id': '1234'})
+
+        self.assertEqual(mock_logger.error.call_count, 1)
+        self.assertIn('"read" request to API endpoint "adult" with adult_id: 1234 returned 500',
+                      mock_logger.error.call_args[0][0])
+
+
+class GatewayListModesUnitTests(GatewayTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.mock_get.return_value.status_code = 200
+        self.mock_get.return_value.text = ('[{"application_id": "1", "application_status": "SUBMITTED"}, '
+                                           '{"application_id": "2", "application_status": "SUBMITTED"}]')
+
+    @tag('unit')
+    def test_count_only_returns_the_gateway_count(self):
+        self.mock_get.return_value.text = '{"count": 42}'
+
+        response = NannyGatewayActions().list('application', params={'application_status': 'SUBMITTED'},
+                                              count_only=True)
+
+        self.assertEqual(response.count, 42)
+        self.assertIn('&count_only=true', self.mock_get.call_args[0][0])
+
+    @tag('unit')
+    def test_count_only_falls_back_to_counting_rows(self):
+        response = NannyGatewayActions().list('application', params={}, count_only=True)
+
+        self.assertEqual(response.count, 2)
+
+    @tag('unit')
+    def test_count_only_reads_the_count_of_a_paginated_listing(self):
+        self.mock_get.return_value.text = ('{"count": 1200, "next": "page-2", '
+                                           '"results": [{"application_id": "1"}, {"application_id": "2"}]}')
+
+        response = NannyGatewayActions().list('application', params={}, count_only=True)
+
+        self.assertEqual(response.count, 1200)
+
+    @tag('unit')
+    def test_fields_are_requested_and_projected(self):
+        response = NannyGatewayActions().list('application', params={}, fields=['application_id'])
+
+        self.assertEqual(response.record, [{'application_id': '1'}, {'application_id': '2'}])
+        self.assertIn('&fields=application_id', self.mock_get.call_args[0][0])
+
+    @tag('unit')
+    def test_list_modes_are_cached_separately(self):
+        with db_gateways.request_cache_scope():
+            NannyGatewayActions().list('application', params={})
+            response = NannyGatewayActions().list('application', params={}, count_only=True)
+
+        self.assertEqual(self.mock_get.call_count, 2)
+        self.assertEqual(response.count, 2)
+
+
+class GatewayIterListUnitTests(GatewayTestCase):
+
+    @staticmethod
+    def page(text, status_code=200):
+        response = requests.Response()
+        response.status_code = status_code
+        response.encoding = 'utf-8'
+        response._content = text.encode('utf-8')
+        return response
+
+    @tag('unit')
+    def test_pages_are_followed_until_the_last(self):
+        self.mock_get.side_effect = [
+            self.page('{"next": "page-2", "results": [{"adult_id": "1"}, {"adult_id": "2"}]}'),
+            self.page('{"next": null, "results": [{"adult_id": "3"}]}'),
+        ]
+
+        records = list(HMGatewayActions().iter_list('adult', params={}, page_size=2))
+
+        self.assertEqual([record['adult_id'] for record in records], ['1', '2', '3'])
+        self.assertIn('&page=2&page_size=2', self.mock_get.call_args[0][0])
+
+    @tag('unit')
+    def test_unpaginated_listing_is_a_single_page(self):
+        self.mock_get.return_value = self.page('[{"adult_id": "1"}, {"adult_id": "2"}]')
+
+        records = list(HMGatewayActions().iter_list('adult', params={}))
+
+        self.assertEqual(len(records), 2)
+        self.assertEqual(self.mock_get.call_count, 1)
+
+    @tag('unit')
+    def test_missing_listing_yields_nothing(self):
+        self.mock_get.return_value = self.page('', status_code=404)
+
+        self.assertEqual(list(HMGatewayActions().iter_list('adult', params={})), [])
+
+    @tag('unit')
+    def test_empty_page_ends_the_listing(self):
+        self.mock_get.return_value = self.page('{"next": "page-2", "results": []}')
+
+        self.assertEqual(list(HMGatewayActions().iter_list('adult', params={})), [])
+        self.assertEqual(self.mock_get.call_count, 1)
+
+    @tag('unit')
+    def test_failed_page_is_raised(self):
+        self.mock_get.side_effect = [
+            self.page('{"next": "page-2", "results": [{"adult_id": "1"}]}'),
+            self.page('', status_code=400),
+        ]
+        records = HMGatewayActions().iter_list('adult', params={})
+
+        self.assertEqual(next(records)['adult_id'], '1')
+        with self.assertRaises(requests.HTTPError):
+            next(records)
+
+    @tag('unit')
+    def test_pages_bypass_the_identity_map(self):
+        self.mock_get.return_value = self.page('[{"adult_id": "1"}]')
+
+        with db_gateways.request_cache_scope():
+            list(HMGatewayActions().iter_list('adult', params={}))
+            list(HMGatewayActions().iter_list('adult', params={}))
+
+        self.assertEqual(self.mock_get.call_count, 2)
+
+
+class GatewayReadManyUnitTests(GatewayTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.mock_get.side_effect = self.respond
+
+    @staticmethod
+    def respond(url, *args, **kwargs):
+        if '?' in url:
+            adult_ids = parse_qs(urlsplit(url).query)['adult_id__in'][0].split(',')
+
+            if 'unlisted' in adult_ids:
+                return mock.Mock(status_code=400, url=url)
+
+            return mock.Mock(status_code=200, url=url, text=json.dumps(
+                [{'adult_id': adult_id, 'URN': 'EY' + adult_id} for adult_id in adult_ids if adult_id != 'missing']))
+
+        if url.endswith('/missing/'):
+            return mock.Mock(status_code=404, url=url)
+
+        record_id = url.rstrip('/').rsplit('/', 1)[-1]
+        pk_field = 'adult_id' if '/adult/' in url else 'token_id'
+        return mock.Mock(status_code=200, url=url,
+                         text='{"%s": "%s", "URN": "EY%s"}' % (pk_field, record_id, record_id))
+
+    @tag('unit')
+    def test_records_are_keyed_by_id(self):
+        records = HMGatewayActions().read_many('application', ['1', 2, '1'])
+
+        self.assertEqual(records, {'1': {'token_id': '1', 'URN': 'EY1'}, '2': {'token_id': '2', 'URN': 'EY2'}})
+        self.assertEqual(self.mock_get.call_count, 2)
+
+    @tag('unit')
+    def test_missing_records_are_left_out(self):
+        records = HMGatewayActions().read_many('application', ['1', 'missing'])
+
+        self.assertEqual(list(records), ['1'])
+
+    @tag('unit')
+    def test_bulk_endpoints_are_fetched_in_one_call(self):
+        records = HMGatewayActions().read_many('adult', ['1', '2', 'missing'])
+
+        self.assertEqual(self.mock_get.call_count, 1)
+        self.assertIn('&adult_id__in=1,2,missing', self.mock_get.call_args[0][0])
+        self.assertEqual(records, {'1': {'adult_id': '1', 'URN': 'EY1'}, '2': {'adult_id': '2', 'URN': 'EY2'}})
+
+    @tag('unit')
+    def test_bulk_reads_are_listed_in_batches(self):
+        with mock.patch.object(HMGatewayActions, '_bulk_read_batch_size', 2):
+            records = HMGatewayActions().read_many('adult', ['1', '2', '3'])
+
+        self.assertEqual(self.mock_get.call_count, 2)
+        self.assertEqual(sorted(records), ['1', '2', '3'])
+
+    @tag('unit')
+    def test_failed_bulk_list_falls_back_to_reads(self):
+        records = HMGatewayActions().read_many('adult', ['1', 'unlisted'])
+
+        self.assertEqual(self.mock_get.call_count, 3)
+        self.assertEqual(sorted(records), ['1', 'unlisted'])
+
+    @tag('unit')
+    def test_no_ids_makes_no_calls(self):
+        self.assertEqual(HMGatewayActions().read_many('adult', []), {})
+        self.mock_get.assert_not_called()
+
+
+class GatewayRequestCacheUnitTests(GatewayTestCase):
+
+    def setUp(self):
+        super().setUp()
+        db_gateways.activate_request_cache()
+        self.addCleanup(db_gateways.deactivate_request_cache)
+
+        self.mock_get.return_value.status_code = 200
+        self.mock_get.return_value.text = '{"application_id": "1234", "application_status": "SUBMITTED"}'
+
+    @tag('unit')
+    def test_repeat_read_is_served_from_identity_map(self):
+        first = NannyGatewayActions().read('application', params={'application_id': '1234'})
+        second = NannyGatewayActions().read('application', params={'application_id': '1234'})
+
+        self.assertEqual(self.mock_get.call_count, 1)
+        self.assertEqual(first.record, second.record)
+
+    @tag('unit')
+    def test_cached_records_are_isolated_from_caller_edits(self):
+        first = NannyGatewayActions().read('application', params={'application_id': '1234'})
+        first.record['application_status'] = 'ACCEPTED'
+        second = NannyGatewayActions().read('application', params={'application_id': '1234'})
+
+        self.assertEqual(second.record['application_status'], 'SUBMITTED')
+
+    @tag('unit')
+    def test_write_to_endpoint_invalidates_its_reads(self):
+        NannyGatewayActions().read('application', params={'application_id': '1234'})
+
+        with mock.patch('requests.Session.put') as mock_put:
+            mock_put.return_value.status_code = 200
+            mock_put.return_value.text = '{}'
+            NannyGatewayActions().put('application', params={'application_id': '1234'})
+
+        NannyGatewayActions().read('application', params={'application_id': '1234'})
+
+        self.assertEqual(self.mock_get.call_count, 2)
+
+    @tag('unit')
+    def test_reads_are_not_cached_outside_a_request(self):
+        db_gateways.deactivate_request_cache()
+
+        NannyGatewayActions().read('application', params={'application_id': '1234'})
+        NannyGatewayActions().read('application', params={'application_id': '1234'})
+
+        self.assertEqual(self.mock_get.call_count, 2)
+
+
+@override_settings(ENABLE_GATEWAY_SHARED_CACHE=True)
+class GatewaySharedCacheUnitTests(GatewayTestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        db_gateways.reset_shared_cache_stats()
+
+        self.mock_get.return_value.status_code = 200
+        self.mock_get.return_value.url = 'http://hm-gateway/api/v1/dpa-auth/1234/'
+        self.mock_get.return_value.text = '{"token_id": "1234", "URN": "EY123456"}'
+
+    @tag('unit')
+    def test_repeat_read_is_served_from_shared_cache(self):
+        HMGatewayActions().read('dpa-auth', params={'token_id': '1234'})
+        response = HMGatewayActions().read('dpa-auth', params={'token_id': '1234'})
+
+        self.assertEqual(self.mock_get.call_count, 1)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.record['URN'], 'EY123456')
+
+    @tag('unit')
+    def test_endpoints_without_ttl_are_not_cached(self):
+        HMGatewayActions().read('adult', params={'adult_id': '1234'})
+        HMGatewayActions().read('adult', params={'adult_id': '1234'})
+
+        self.assertEqual(self.mock_get.call_count, 2)
+
+    @tag('unit')
+    def test_write_to_endpoint_evicts_its_reads(self):
+        HMGatewayActions().list('dpa-auth', params={'token_id': '1234'})
+
+        with mock.patch('requests.Session.patch') as mock_patch:
+            mock_patch.return_value.status_code = 200
+            mock_patch.return_value.text = '{}'
+            HMGatewayActions().patch('dpa-auth', params={'token_id': '1234'})
+
+        HMGatewayActions().list('dpa-auth', params={'token_id': '1234'})
+
+        self.assertEqual(self.mock_get.call_count, 2)
+
+    @tag('unit')
+    def test_hits_and_misses_are_counted_per_endpoint(self):
+        for _ in range(3):
+            HMGatewayActions().read('dpa-auth', params={'token_id': '1234'})
+
+        self.assertEqual(db_gateways.get_shared_cache_stats()[('HMGatewayActions', 'dpa-auth')],
+                         {'hits': 2, 'misses': 1})
+
+    @tag('unit')
+    @override_settings(ENABLE_GATEWAY_SHARED_CACHE=False)
+    def test_reads_are_not_cached_unless_enabled(self):
+        HMGatewayActions().read('dpa-auth', params={'token_id': '1234'})
+        HMGatewayActions().read('dpa-auth', params={'token_id': '1234'})
+
+        self.assertEqual(self.mock_get.call_count, 2)
+
+
+class GatewayMetricsUnitTests(GatewayTestCase):
+
+    def setUp(self):
+        super().setUp()
+        gateway_metrics.reset()
+        self.addCleanup(gateway_metrics.reset)
+
+        self.mock_get.return_value.status_code = 200
+        self.mock_get.return_value.content = b'{"application_id": "1234"}'
+        self.mock_get.return_value.text = '{"application_id": "1234"}'
+
+    @tag('unit')
+    def test_calls_are_counted_per_gateway_verb_and_endpoint(self):
+        NannyGatewayActions().read('application', params={'application_id': '1234'})
+        NannyGatewayActions().read('application', params={'application_id': '1234'})
+        self.mock_get.return_value.status_code = 500
+        NannyGatewayActions().read('application', params={'application_id': '1234'})
+
+        call, = gateway_metrics.snapshot()['gateway_calls']
+
+        self.assertEqual((call['gateway'], call['verb'], call['endpoint']),
+                         ('NannyGatewayActions', 'read', 'application'))
+        self.assertEqual(call['calls'], 3)
+        self.assertEqual(call['errors'], 1)
+        self.assertEqual(call['payload_bytes'], 3 * len(b'{"application_id": "1234"}'))
+        self.assertEqual(sum(call['latency_ms_histogram'].values()), 3)
+
+    @tag('unit')
+    def test_cached_reads_are_not_counted(self):
+        with db_gateways.request_cache_scope():
+            NannyGatewayActions().read('application', params={'application_id': '1234'})
+            NannyGatewayActions().read('application', params={'application_id': '1234'})
+
+        call, = gateway_metrics.snapshot()['gateway_calls']
+
+        self.assertEqual(call['calls'], 1)
+
+    @tag('unit')
+    def test_calls_are_attributed_to_the_current_page(self):
+        gateway_metrics.start_page()
+        NannyGatewayActions().gather([('read', 'application', {'application_id': '1234'}),
+                                      ('read', 'first-aid', {'application_id': '1234'})])
+        gateway_metrics.end_page('nanny_arc_summary')
+
+        page, = gateway_metrics.snapshot()['pages']
+
+        self.assertEqual(page['page'], 'nanny_arc_summary')
+        self.assertEqual(page['requests'], 1)
+        self.assertEqual(page['gateway_calls'], 2)
+
+    @tag('unit')
+    def test_unresolved_urls_share_one_page(self):
+        self.client.get('/no-such-page/1/')
+        self.client.get('/no-such-page/2/')
+
+        self.assertEqual([page['page'] for page in gateway_metrics.snapshot()['pages']], ['<unresolved>'])
+
+    @tag('unit')
+    def test_metrics_endpoint_is_staff_only(self):
+        staff_user = User.objects.create_user('staff', password='password', is_staff=True)
+        User.objects.create_user('arc', password='password')
+
+        self.client.login(username='arc', password='password')
+        self.assertNotEqual(self.client.get(reverse('gateway-metrics')).status_code, 200)
+
+        self.client.force_login(staff_user)
+        response = self.client.get(reverse('gateway-metrics'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('circuit_breakers', response.json())
+
+
+class GatewayGatherUnitTests(GatewayTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.mock_get.side_effect = self.respond
+
+    @staticmethod
+    def respond(url, *args, **kwargs):
+        response = mock.Mock(status_code=200, url=url)
+        response.text = '{"url": "%s"}' % url
+        return response
+
+    @tag('unit')
+    def test_responses_are_returned_in_call_order(self):
+        endpoints = ['application', 'first-aid', 'dbs-check', 'insurance-cover', 'childcare-training']
+
+        responses = NannyGatewayActions().gather(
+            [('read', endpoint, {'application_id': '1234'}) for endpoint in endpoints])
+
+        self.assertEqual([response.record['url'] for response in responses],
+                         [NannyGatewayActions.target_url_prefix + endpoint + '/1234/' for endpoint in endpoints])
+
+    @tag('unit')
+    def test_calls_may_target_other_gateways(self):
+        nanny_response, hm_response = NannyGatewayActions().gather([
+            ('read', 'application', {'application_id': '1234'}),
+            (HMGatewayActions(), 'read', 'adult', {'adult_id': '5678'}),
+        ])
+
+        self.assertTrue(nanny_response.record['url'].startswith(NannyGatewayActions.target_url_prefix))
+        self.assertTrue(hm_response.record['url'].startswith(HMGatewayActions.target_url_prefix))
+
+    @tag('unit')
+    def test_failed_call_is_returned_in_its_slot(self):
+        application_response, missing_key_error = NannyGatewayActions().gather([
+            ('read', 'application', {'application_id': '1234'}),
+            ('read', 'application', {}),
+        ])
+
+        self.assertEqual(application_response.status_code, 200)
+        self.assertIsInstance(missing_key_error, KeyError)
+
+    @tag('unit')
+    def test_failed_call_is_raised_when_requested(self):
+        with self.assertRaises(KeyError):
+            NannyGatewayActions().gather([
+                ('read', 'application', {'application_id': '1234'}),
+                ('read', 'application', {}),
+            ], raise_errors=True)
+
+    @tag('unit')
+    def test_calls_share_the_callers_identity_map(self):
+        with db_gateways.request_cache_scope():
+            NannyGatewayActions().gather([('read', 'application', {'application_id': '1234'})])
+            NannyGatewayActions().read('application', params={'application_id': '1234'})
+
+        self.assertEqual(self.mock_get.call_count, 1)
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arc_application', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChildminderSearchIndex',
+            fields=[
+                ('application_id', models.OneToOneField(db_column='application_id', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_index', serialize=False, to='arc_application.Application')),
+                ('application_reference', models.CharField(blank=True, db_index=True, max_length=9, null=True)),
+                ('application_status', models.CharField(blank=True, max_length=50)),
+                ('date_submitted', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('date_updated', models.DateTimeField(blank=True, null=True)),
+                ('applicant_name', models.CharField(blank=True, max_length=201)),
+                ('name_tokens', models.TextField(blank=True)),
+                ('home_postcodes', models.TextField(blank=True)),
+                ('care_postcodes', models.TextField(blank=True)),
+                ('has_childcare_address', models.BooleanField(default=False)),
+                ('birth_day', models.IntegerField(blank=True, db_index=True, null=True)),
+                ('birth_month', models.IntegerField(blank=True, db_index=True, null=True)),
+                ('birth_year', models.IntegerField(blank=True, db_index=True, null=True)),
+            ],
+            options={
+                'db_table': 'CHILDMINDER_SEARCH_INDEX',
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arc_application', '0002_childminder_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportingFact',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('service', models.CharField(max_length=50)),
+                ('metric', models.CharField(max_length=50)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'REPORTING_FACT',
+            },
+        ),
+        migrations.CreateModel(
+            name='ReportingWatermark',
+            fields=[
+                ('service', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('aggregated_to', models.DateField()),
+            ],
+            options={
+                'db_table': 'REPORTING_WATERMARK',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='reportingfact',
+            unique_together=set([('date', 'service', 'metric')]),
+        ),
+    ]
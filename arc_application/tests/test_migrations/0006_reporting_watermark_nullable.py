@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arc_application', '0005_report_job_filters'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reportingwatermark',
+            name='aggregated_to',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def clear_search_index(apps, schema_editor):
+    # Rows indexed without tokens would no longer match any search; rebuild_search_index --stale-only reindexes them
+    apps.get_model('arc_application', 'ChildminderSearchIndex').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arc_application', '0006_reporting_watermark_nullable'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_search_index, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='ChildminderSearchToken',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(choices=[('name', 'Name'), ('home_postcode', 'Home postcode'), ('care_postcode', 'Childcare postcode')], max_length=20)),
+                ('token', models.CharField(db_index=True, max_length=100)),
+                ('search_index', models.ForeignKey(db_column='application_id', on_delete=django.db.models.deletion.CASCADE, related_name='tokens', to='arc_application.ChildminderSearchIndex')),
+            ],
+            options={
+                'db_table': 'CHILDMINDER_SEARCH_TOKEN',
+            },
+        ),
+        migrations.AddField(
+            model_name='childmindersearchindex',
+            name='has_name',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RemoveField(
+            model_name='childmindersearchindex',
+            name='name_tokens',
+        ),
+        migrations.RemoveField(
+            model_name='childmindersearchindex',
+            name='home_postcodes',
+        ),
+        migrations.RemoveField(
+            model_name='childmindersearchindex',
+            name='care_postcodes',
+        ),
+    ]
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arc_application', '0007_childminder_search_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportjob',
+            name='date_started',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
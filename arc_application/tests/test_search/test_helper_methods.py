@@ -1,11 +1,39 @@
 """
 Tests for assuring that SearchService is functioning correctly.
 """
+import time
+import types
+from datetime import datetime
+from io import StringIO
 from unittest.mock import patch
 
-from django.test import TestCase, tag
+import requests
 
-from ...services.search_service import SearchService
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings, tag
+
+from ...models import Application, ApplicantHomeAddress, ApplicantName, ApplicantPersonalDetails, \
+    ChildminderSearchIndex
+from ...services.search_service import SearchResults, SearchService
+
+
+def create_childminder_application(reference, first_name, last_name, postcode='WA14 4PA', childcare_address=True):
+    application = Application.objects.create(application_reference=reference, application_status='SUBMITTED',
+                                             date_submitted=datetime(2019, 1, 2), date_updated=datetime(2019, 1, 3))
+    personal_details = ApplicantPersonalDetails.objects.create(application_id=application, birth_day=1,
+                                                               birth_month=2, birth_year=1980)
+    ApplicantName.objects.create(application_id=application, personal_detail_id=personal_details,
+                                 current_name=True, first_name=first_name, last_name=last_name)
+    ApplicantHomeAddress.objects.create(application_id=application, personal_detail_id=personal_details,
+                                        postcode=postcode, childcare_address=childcare_address,
+                                        current_address=True)
+    return application
+
+
+def create_search_dict(application_id, application_type):
+    return {'application_id': application_id, 'application_reference': None, 'application_type': application_type,
+            'applicant_name': '', 'date_submitted': '', 'date_accessed': '', 'submission_type': 'SUBMITTED'}
 
 
 class SearchServiceUnitTests(TestCase):
@@ -154,3 +182,365 @@ class SearchServiceUnitTests(TestCase):
         formatted_search_list = SearchService._format_search_results(mock_search_list)
 
         self.assertEqual(formatted_search_list, expected_formatted_search_list)
+
+
+class FederatedSearchUnitTests(TestCase):
+    """
+    Test case for searches across every application type at once.
+    """
+
+    def setUp(self):
+        for method, application_type in (('_search_childminders', 'Childminder'), ('_search_nannies', 'Nanny'),
+                                         ('_search_new_associations', 'Association')):
+            patcher = patch('arc_application.services.search_service.SearchService.' + method,
+                            return_value=[create_search_dict(application_type.lower(), application_type)])
+            setattr(self, 'mock' + method, patcher.start())
+            self.addCleanup(patcher.stop)
+
+    @tag('unit')
+    def test_results_are_merged_from_every_source(self):
+        results = SearchService.search("", "", "", "", "", 'All')
+
+        self.assertEqual(sorted(result['application_type'] for result in results),
+                         ['Association', 'Childminder', 'Nanny'])
+        self.assertEqual(results.failed_sources, [])
+
+    @tag('unit')
+    def test_failed_source_is_reported_as_partial_result(self):
+        self.mock_search_nannies.side_effect = ValueError
+
+        results = SearchService.search("", "", "", "", "", 'All')
+
+        self.assertEqual(sorted(result['application_type'] for result in results), ['Association', 'Childminder'])
+        self.assertEqual(results.failed_sources, ['Nanny'])
+
+    @tag('unit')
+    @override_settings(SEARCH_SOURCE_TIMEOUT=0.1)
+    def test_slow_source_is_reported_as_partial_result(self):
+        self.mock_search_new_associations.side_effect = lambda *args: time.sleep(1)
+
+        started = time.monotonic()
+        results = SearchService.search("", "", "", "", "", 'All')
+
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(sorted(result['application_type'] for result in results), ['Childminder', 'Nanny'])
+        self.assertEqual(results.failed_sources, ['Association'])
+
+    @tag('unit')
+    def test_gateway_sources_are_searched_concurrently(self):
+        self.mock_search_nannies.side_effect = lambda *args: time.sleep(0.3) or []
+        self.mock_search_new_associations.side_effect = lambda *args: time.sleep(0.3) or []
+
+        started = time.monotonic()
+        SearchService.search("", "", "", "", "", 'All')
+
+        self.assertLess(time.monotonic() - started, 0.55)
+
+
+class SearchPaginationUnitTests(TestCase):
+    """
+    Test case for paging through search results.
+    """
+
+    def setUp(self):
+        childminder_results = SearchResults(
+            [dict(create_search_dict('cm{0}'.format(day), 'Childminder'), date_submitted=datetime(2019, 1, day))
+             for day in (1, 3, 5)])
+        nanny_results = SearchResults(
+            [dict(create_search_dict('nanny{0}'.format(day), 'Nanny'), date_submitted='0{0}/01/2019'.format(day))
+             for day in (2, 4)])
+
+        for method, results in (('_search_childminders', childminder_results), ('_search_nannies', nanny_results),
+                                ('_search_new_associations', SearchResults())):
+            patcher = patch('arc_application.services.search_service.SearchService.' + method, return_value=results)
+            setattr(self, 'mock' + method, patcher.start())
+            self.addCleanup(patcher.stop)
+
+    @tag('unit')
+    def test_pages_are_taken_from_merged_results(self):
+        first_page = SearchService.search("", "", "", "", "", 'All', page=1, page_size=2)
+        second_page = SearchService.search("", "", "", "", "", 'All', page=2, page_size=2)
+        last_page = SearchService.search("", "", "", "", "", 'All', page=3, page_size=2)
+
+        self.assertEqual([result['application_id'] for result in first_page], ['cm5', 'nanny4'])
+        self.assertEqual([result['application_id'] for result in second_page], ['cm3', 'nanny2'])
+        self.assertEqual([result['application_id'] for result in last_page], ['cm1'])
+        self.assertTrue(first_page.has_next_page)
+        self.assertTrue(second_page.has_next_page)
+        self.assertFalse(last_page.has_next_page)
+        self.assertEqual(second_page[0]['date_submitted'], '03/01/2019')
+
+    @tag('unit')
+    def test_sources_are_asked_for_results_up_to_the_end_of_the_page(self):
+        SearchService.search("", "", "", "", "", 'All', page=2, page_size=2)
+
+        self.assertEqual(self.mock_search_childminders.call_args[0][-1], 4)
+        self.assertEqual(self.mock_search_nannies.call_args[0][-1], 4)
+
+    @tag('unit')
+    @override_settings(SEARCH_RESULTS_LIMIT=4)
+    def test_pages_stop_at_results_limit(self):
+        results = SearchService.search("", "", "", "", "", 'All', page=2, page_size=2)
+
+        self.assertEqual([result['application_id'] for result in results], ['cm3', 'nanny2'])
+        self.assertFalse(results.has_next_page)
+        self.assertTrue(results.more_results_available)
+
+
+class SearchCacheUnitTests(TestCase):
+    """
+    Test case for caching repeat searches.
+    """
+
+    def setUp(self):
+        caches['default'].clear()
+        self.addCleanup(caches['default'].clear)
+
+        for method, application_type in (('_search_childminders', 'Childminder'), ('_search_nannies', 'Nanny'),
+                                         ('_search_new_associations', 'Association')):
+            patcher = patch('arc_application.services.search_service.SearchService.' + method,
+                            return_value=SearchResults([create_search_dict('{0}{1}'.format(application_type, index),
+                                                                           application_type)
+                                                        for index in range(3)]))
+            setattr(self, 'mock' + method, patcher.start())
+            self.addCleanup(patcher.stop)
+
+    def assertSourceCalls(self, count):
+        for mock_search in (self.mock_search_childminders, self.mock_search_nannies,
+                            self.mock_search_new_associations):
+            self.assertEqual(mock_search.call_count, count)
+
+    @tag('unit')
+    def test_repeat_search_is_answered_from_cache(self):
+        first_results = SearchService.search('Ada', '01/02/1980', 'WA14 4PA', '', '', 'All', cache_scope='arc')
+        repeat_results = SearchService.search(' ada ', '01 02 1980', 'wa144pa', '', '', 'All', cache_scope='arc')
+
+        self.assertSourceCalls(1)
+        self.assertEqual(repeat_results, first_results)
+
+    @tag('unit')
+    def test_searches_are_not_cached_without_scope(self):
+        SearchService.search('Ada', '', '', '', '', 'All')
+        SearchService.search('Ada', '', '', '', '', 'All')
+
+        self.assertSourceCalls(2)
+
+    @tag('unit')
+    def test_scopes_do_not_share_cached_searches(self):
+        SearchService.search('Ada', '', '', '', '', 'All', cache_scope='arc')
+        SearchService.search('Ada', '', '', '', '', 'All', cache_scope='contact-centre')
+
+        self.assertSourceCalls(2)
+
+    @tag('unit')
+    def test_cached_search_answers_earlier_pages(self):
+        SearchService.search('Ada', '', '', '', '', 'All', page=1, page_size=2, cache_scope='arc')
+        SearchService.search('Ada', '', '', '', '', 'All', page=3, page_size=2, cache_scope='arc')
+        results = SearchService.search('Ada', '', '', '', '', 'All', page=2, page_size=2, cache_scope='arc')
+
+        self.assertSourceCalls(2)
+        self.assertEqual(len(results), 2)
+        self.assertTrue(results.has_next_page)
+
+    @tag('unit')
+    def test_invalidated_searches_are_repeated(self):
+        SearchService.search('Ada', '', '', '', '', 'All', cache_scope='arc')
+        SearchService.invalidate_cache()
+        SearchService.search('Ada', '', '', '', '', 'All', cache_scope='arc')
+
+        self.assertSourceCalls(2)
+
+    @tag('unit')
+    def test_partial_results_are_not_cached(self):
+        self.mock_search_nannies.side_effect = ValueError
+
+        SearchService.search('Ada', '', '', '', '', 'All', cache_scope='arc')
+        SearchService.search('Ada', '', '', '', '', 'All', cache_scope='arc')
+
+        self.assertEqual(self.mock_search_childminders.call_count, 2)
+
+    @tag('unit')
+    @override_settings(SEARCH_CACHE_TTL=0)
+    def test_cache_can_be_turned_off(self):
+        SearchService.search('Ada', '', '', '', '', 'All', cache_scope='arc')
+        SearchService.search('Ada', '', '', '', '', 'All', cache_scope='arc')
+
+        self.assertSourceCalls(2)
+
+
+@override_settings(SEARCH_INDEX_REFRESH_ON_SEARCH=False)
+class ChildminderSearchUnitTests(TestCase):
+    """
+    Test case for searches against the Childminder search index.
+    """
+
+    def setUp(self):
+        for index in range(5):
+            create_childminder_application('CM{0:07d}'.format(index), 'Ada', 'Lovelace{0}'.format(index))
+
+    @tag('unit')
+    def test_results_and_names_are_fetched_in_one_query(self):
+        """
+        Test to assert applicant names are read from the search index rather than looked up per result.
+        """
+        with self.assertNumQueries(1):
+            results = SearchService._search_childminders('Ada', '', '', '', '')
+
+        self.assertEqual(len(results), 5)
+        self.assertEqual(sorted(result['applicant_name'] for result in results),
+                         ['Ada Lovelace{0}'.format(index) for index in range(5)])
+        self.assertEqual(results[0]['date_submitted'].strftime('%d/%m/%Y'), '02/01/2019')
+        self.assertEqual(results[0]['date_accessed'].strftime('%d/%m/%Y'), '03/01/2019')
+
+    @tag('unit')
+    def test_one_result_per_application(self):
+        """
+        Test to assert an applicant with several names and addresses appears once in the search results.
+        """
+        application = create_childminder_application('CM9999999', 'Ada', 'Byron', postcode='SK10 1AA',
+                                                     childcare_address=False)
+        personal_details = ApplicantPersonalDetails.objects.get(application_id=application)
+        ApplicantName.objects.create(application_id=application, personal_detail_id=personal_details,
+                                     current_name=False, first_name='Ada', last_name='Lovelace')
+        for postcode in ('SK10 1AB', 'SK10 1AC'):
+            ApplicantHomeAddress.objects.create(application_id=application, personal_detail_id=personal_details,
+                                                postcode=postcode, childcare_address=True, current_address=False)
+
+        with self.assertNumQueries(1):
+            results = SearchService._search_childminders('Ada', '01/02/1980', 'SK10', 'SK10', '')
+
+        self.assertEqual([result['application_id'] for result in results], [application.pk])
+        self.assertEqual(results[0]['applicant_name'], 'Ada Byron')
+        self.assertFalse(results.more_results_available)
+
+    @tag('unit')
+    @override_settings(SEARCH_RESULTS_LIMIT=3)
+    def test_results_are_capped(self):
+        """
+        Test to assert no more than SEARCH_RESULTS_LIMIT results are returned, flagging that more are available.
+        """
+        with self.assertNumQueries(1):
+            results = SearchService._search_childminders('Ada', '', '', '', '')
+
+        self.assertEqual(len(results), 3)
+        self.assertTrue(results.more_results_available)
+
+    @tag('unit')
+    @override_settings(SEARCH_RESULTS_LIMIT=5)
+    def test_results_at_limit_are_not_flagged(self):
+        """
+        Test to assert the more results available flag is only set when results were left out.
+        """
+        results = SearchService._search_childminders('Ada', '', '', '', '')
+
+        self.assertEqual(len(results), 5)
+        self.assertFalse(results.more_results_available)
+
+    @tag('unit')
+    def test_most_recently_submitted_results_are_kept(self):
+        """
+        Test to assert a limited search keeps the most recently submitted applications.
+        """
+        Application.objects.filter(application_reference='CM0000003').update(date_submitted=datetime(2019, 3, 1))
+        ChildminderSearchIndex.objects.filter(application_reference='CM0000003').update(
+            date_submitted=datetime(2019, 3, 1))
+
+        results = SearchService._search_childminders('Ada', '', '', '', '', limit=2)
+
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0]['application_reference'], 'CM0000003')
+        self.assertTrue(results.more_results_available)
+
+    @tag('unit')
+    def test_terms_are_normalised(self):
+        """
+        Test to assert names and postcodes match regardless of case and spacing.
+        """
+        self.assertEqual(len(SearchService._search_childminders('  ADA  lovelace1 ', '', 'wa144pa', 'W A14', '')), 1)
+        self.assertEqual(len(SearchService._search_childminders('', '', '', '', 'cm0000003')), 1)
+
+    @tag('unit')
+    def test_terms_match_the_start_of_each_token(self):
+        """
+        Test to assert each name word and postcode matches the start of an indexed name word or postcode.
+        """
+        self.assertEqual(len(SearchService._search_childminders('lov ad', '', 'WA1', 'WA14 4', '')), 5)
+        self.assertEqual(len(SearchService._search_childminders('velace', '', '', '', '')), 0)
+        self.assertEqual(len(SearchService._search_childminders('Ada', '', '4PA', '', '')), 0)
+
+    @tag('unit')
+    def test_index_follows_saved_details(self):
+        """
+        Test to assert the search index is updated when ARC saves an applicant's details.
+        """
+        name = ApplicantName.objects.get(last_name='Lovelace0')
+        name.first_name = 'Grace'
+        name.save()
+
+        results = SearchService._search_childminders('Grace', '', '', '', '')
+
+        self.assertEqual([result['applicant_name'] for result in results], ['Grace Lovelace0'])
+
+    @tag('unit')
+    @override_settings(SEARCH_INDEX_REFRESH_ON_SEARCH=True)
+    def test_stale_applications_are_indexed_on_search(self):
+        """
+        Test to assert applications updated without ARC's signals, e.g. by the applicant, are indexed when searched.
+        """
+        ApplicantName.objects.filter(last_name='Lovelace0').update(first_name='Grace')
+        Application.objects.filter(application_reference='CM0000000').update(date_updated=datetime(2019, 2, 1))
+
+        results = SearchService._search_childminders('Grace', '', '', '', '')
+
+        self.assertEqual([result['applicant_name'] for result in results], ['Grace Lovelace0'])
+        self.assertEqual(results[0]['date_accessed'].strftime('%d/%m/%Y'), '01/02/2019')
+
+    @tag('unit')
+    def test_search_index_is_rebuilt_by_command(self):
+        ChildminderSearchIndex.objects.all().delete()
+
+        call_command('rebuild_search_index', batch_size=2, stdout=StringIO())
+
+        self.assertEqual(ChildminderSearchIndex.objects.count(), 5)
+        self.assertEqual(len(SearchService._search_childminders('Ada', '', '', '', '')), 5)
+
+    @tag('unit')
+    def test_all_results_are_iterated_without_limit(self):
+        """
+        Test to assert iter_search yields every matching result, formatted for display, as a generator.
+        """
+        with override_settings(SEARCH_RESULTS_LIMIT=2):
+            results = SearchService.iter_search('Ada', '', '', '', '', 'Childminder')
+
+            self.assertIsInstance(results, types.GeneratorType)
+            results = list(results)
+
+        self.assertEqual(len(results), 5)
+        self.assertEqual(results[0]['date_submitted'], '02/01/2019')
+        self.assertEqual(results[0]['submission_type'], 'New')
+
+    @tag('unit')
+    @override_settings(ENABLE_HM=False)
+    @patch('arc_application.services.search_service.NannyGatewayActions.iter_list')
+    def test_gateway_results_are_iterated_after_childminder_results(self, mock_iter_list):
+        mock_iter_list.return_value = iter([create_search_dict('nanny', 'Nanny')])
+
+        results = list(SearchService.iter_search('Ada', '', '', '', '', 'All'))
+
+        self.assertEqual([result['application_type'] for result in results], ['Childminder'] * 5 + ['Nanny'])
+        self.assertEqual(mock_iter_list.call_args[1]['params'], {'name': 'Ada'})
+
+    @tag('unit')
+    @override_settings(ENABLE_HM=False)
+    @patch('arc_application.services.search_service.NannyGatewayActions.iter_list')
+    def test_failed_gateway_source_is_named(self, mock_iter_list):
+        mock_iter_list.side_effect = requests.HTTPError('Listing "arc-search" page 1 returned 500 status code')
+        failed_sources = []
+
+        results = list(SearchService.iter_search('Ada', '', '', '', '', 'All', failed_sources=failed_sources))
+
+        self.assertEqual(len(results), 5)
+        self.assertEqual(failed_sources, ['Nanny'])
+
+        with self.assertRaises(requests.HTTPError):
+            list(SearchService.iter_search('Ada', '', '', '', '', 'Nanny'))
@@ -6,6 +6,15 @@ from django.contrib.auth.models import Group
 inflect_engine = inflect.engine()
 
 
+class Echo:
+    """An object that implements just the write method of the file-like
+    interface, for streaming CSV rows as they are written, e.g. by csv.writer.
+    """
+    def write(self, value):
+        """Write the value by returning it, instead of storing in a buffer."""
+        return value
+
+
 def has_group(user, group_name):
     """
     Check if user is in group
@@ -39,36 +39,40 @@ class ApplicationsSummaryView(View):
 
         return cm_data
 
+    @staticmethod
+    def count_records(gateway, endpoint, params):
+        """
+        Function to count the records at a gateway endpoint without downloading them
+        :return: number of matching records, or 0 if there are none
+        """
+        response = gateway.list(endpoint, params=params, count_only=True)
+        return response.count if response.status_code == 200 else 0
+
     def get_nanny_data(self):
         """
         Function to return a dictionary of data for nannies applications at different statuses
         :return: dictionary of nannies application data
         """
+        nanny_gateway = NannyGatewayActions()
         nanny_data = {}
         # get applications at draft stage
-        draft_apps_response = NannyGatewayActions().list("application", params={'application_status': "DRAFTING"})
-        nanny_data['draft_applications'] = len(
-            draft_apps_response.record) if draft_apps_response.status_code == 200 else 0
+        nanny_data['draft_applications'] = self.count_records(nanny_gateway, "application",
+                                                              {'application_status': "DRAFTING"})
 
         # get new applications
-        new_apps_response = NannyGatewayActions().list("application", params={'application_status': "SUBMITTED"})
-        nanny_data['new_applications'] = len(new_apps_response.record) if new_apps_response.status_code == 200 else 0
+        nanny_data['new_applications'] = self.count_records(nanny_gateway, "application",
+                                                            {'application_status': "SUBMITTED"})
 
         # get returned applications
-        returned_apps_response = NannyGatewayActions().list("application",
-                                                            params={'application_status': "FURTHER_INFORMATION"})
-        nanny_data['returned_applications'] = len(
-            returned_apps_response.record) if returned_apps_response.status_code == 200 else 0
+        nanny_data['returned_applications'] = self.count_records(nanny_gateway, "application",
+                                                                 {'application_status': "FURTHER_INFORMATION"})
 
         # get pending applications
-        pending_apps_response = NannyGatewayActions().list("application",
-                                                           params={'application_status': "ACCEPTED"})
-        nanny_data['pending_applications'] = len(
-            pending_apps_response.record) if pending_apps_response.status_code == 200 else 0
+        nanny_data['pending_applications'] = self.count_records(nanny_gateway, "application",
+                                                                {'application_status': "ACCEPTED"})
 
         # get all applications
-        total_apps_response = NannyGatewayActions().list("application", params={})
-        total_applications = len(total_apps_response.record) if total_apps_response.status_code == 200 else 0
+        total_applications = self.count_records(nanny_gateway, "application", {})
         # take any applications in draft off the number of total applications
         nanny_data['non_draft_applications'] = total_applications - nanny_data[
             "draft_applications"]
@@ -80,36 +84,27 @@ class ApplicationsSummaryView(View):
         Function to return a dictionary of data for additional household member applications at different statuses
         :return: dictionary of household members data
         """
+        hm_gateway = HMGatewayActions()
         household_member_data = {}
         # get applications at draft stage, some of which will be in the 'waiting' status
-        draft_apps_response = HMGatewayActions().list("adult", params={'adult_status': "DRAFTING"})
-        waiting_apps_response = HMGatewayActions().list("adult", params={'adult_status': 'WAITING'})
-        draft_applications = len(
-            draft_apps_response.record) if draft_apps_response.status_code == 200 else 0
-        waiting_applications = len(
-            waiting_apps_response.record) if waiting_apps_response.status_code == 200 else 0
+        draft_applications = self.count_records(hm_gateway, "adult", {'adult_status': "DRAFTING"})
+        waiting_applications = self.count_records(hm_gateway, "adult", {'adult_status': 'WAITING'})
         household_member_data['draft_applications'] = draft_applications + waiting_applications
 
         # get new applications
-        new_apps_response = HMGatewayActions().list("adult", params={'adult_status': "SUBMITTED"})
-        household_member_data['new_applications'] = len(
-            new_apps_response.record) if new_apps_response.status_code == 200 else 0
+        household_member_data['new_applications'] = self.count_records(hm_gateway, "adult",
+                                                                       {'adult_status': "SUBMITTED"})
 
         # get returned applications
-        returned_apps_response = HMGatewayActions().list("adult",
-                                                         params={'adult_status': "FURTHER_INFORMATION"})
-        household_member_data['returned_applications'] = len(
-            returned_apps_response.record) if returned_apps_response.status_code == 200 else 0
+        household_member_data['returned_applications'] = self.count_records(hm_gateway, "adult",
+                                                                            {'adult_status': "FURTHER_INFORMATION"})
 
         # get pending applications
-        pending_apps_response = HMGatewayActions().list("adult",
-                                                        params={'adult_status': "ACCEPTED"})
-        household_member_data['pending_applications'] = len(
-            pending_apps_response.record) if pending_apps_response.status_code == 200 else 0
+        household_member_data['pending_applications'] = self.count_records(hm_gateway, "adult",
+                                                                           {'adult_status': "ACCEPTED"})
 
         # get all applications
-        total_apps_response = HMGatewayActions().list("adult", params={})
-        total_applications = len(total_apps_response.record) if total_apps_response.status_code == 200 else 0
+        total_applications = self.count_records(hm_gateway, "adult", {})
         # take any applications in draft off the number of total applications
         household_member_data['non_draft_applications'] = total_applications - household_member_data[
             "draft_applications"]
@@ -20,6 +20,7 @@ from timeline_logger.models import TimelineLog
 from ..review_util import reset_declaration
 from ..models import Application, Arc
 from ..services.db_gateways import NannyGatewayActions, HMGatewayActions
+from ..services.search_service import SearchService
 
 # Initiate logging
 log = logging.getLogger()
@@ -175,6 +176,8 @@ def release_application(request, application_id, status):
         app['adult_status'] = status
         HMGatewayActions().put('adult', params=app)
 
+    # Cached searches may show the application's previous status
+    SearchService.invalidate_cache()
 
     # keep arc record but un-assign user from it
     if Arc.objects.filter(application_id=application_id).exists():
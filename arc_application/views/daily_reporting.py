@@ -1,30 +1,161 @@
 import logging
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.views import View
 from django.utils.decorators import method_decorator
-from ..models import Application, Arc, ApplicantName
+from ..models import Application, Arc, ApplicantName, ReportingFact, ReportJob
 import csv
-from django.http import StreamingHttpResponse
+import os
+from django.http import FileResponse, Http404, HttpResponseBadRequest, HttpResponseNotAllowed, HttpResponseRedirect, \
+    StreamingHttpResponse
+from django.shortcuts import get_object_or_404, render
+from django.urls import reverse
 from django.contrib.auth.models import User
 from .audit_log import MockTimelineLog
 from timeline_logger.models import TimelineLog
 from ..services.db_gateways import NannyGatewayActions, HMGatewayActions
-from datetime import datetime, timedelta
-from collections import OrderedDict
+from ..services.report_jobs import find_report_job, report_job_path, report_job_query, request_report_job
+from ..services.reporting_facts import REPORTING_SERVICES, update_reporting_facts
+from ..utils import Echo
+from django.utils import timezone
+from django.utils.http import urlencode
+from datetime import datetime, time, timedelta
+from collections import Counter, OrderedDict, defaultdict
 
 
 # Initiate logging
 log = logging.getLogger()
 
-class Echo(View):
-    """An object that implements just the write method of the file-like
-    interface.
-    """
-    def write(self, value):
-        """Write the value by returning it, instead of storing in a buffer."""
-        return value
+class DailyReportingBaseView(View):
+
+    # Columns, name and download file name of the report, set by each report view
+    csv_columns = []
+    report_name = None
+    report_filename = None
+    # Whether the report is generated by the run_report_jobs management command when REPORT_JOBS_ENABLED is set
+    run_in_background = False
+    # Days and services reported on, set from the start, end and service query parameters
+    start_date = None
+    end_date = None
+    services = REPORTING_SERVICES
+
+    def get(self, request):
+        try:
+            report_filters = self.parse_report_filters(request.GET)
+        except ValueError as error:
+            return HttpResponseBadRequest(str(error))
+
+        self.set_report_filters(**report_filters)
+
+        if self.run_in_background and settings.REPORT_JOBS_ENABLED:
+            # Only a recently requested report is reused here, so that link prefetchers and crawlers never queue a
+            # job; otherwise the user is asked to request one, by POST
+            job = find_report_job(self.report_name, request.user, **report_filters)
+
+            if job is None:
+                return render(request, ReportJobView.template_name,
+                              context={'job': None, 'report_url': request.get_full_path(), 'failed': False})
+
+            return HttpResponseRedirect(reverse('report-job', kwargs={'job_id': job.job_id}))
+
+        pseudo_buffer = Echo()
+        writer = csv.DictWriter(pseudo_buffer, fieldnames=self.csv_columns)
+        response = StreamingHttpResponse((writer.writerow(data) for data in self.get_report_rows()),
+                                         content_type="text/csv")
+        response['Content-Disposition'] = 'attachment; filename="{0}"'.format(self.get_report_file_name())
+        log.debug("Download {0} (Reporting)".format(self.report_name))
+
+        return response
+
+    def post(self, request):
+        """
+        Queues the report, for the days and services in the query parameters, to be generated in the background
+        """
+        if not (self.run_in_background and settings.REPORT_JOBS_ENABLED):
+            return HttpResponseNotAllowed(['GET'])
+
+        try:
+            report_filters = self.parse_report_filters(request.GET)
+        except ValueError as error:
+            return HttpResponseBadRequest(str(error))
+
+        job = request_report_job(self.report_name, request.user, **report_filters)
+        log.debug("Requested {0} (Reporting), job {1}".format(self.report_name, job.job_id))
+
+        return HttpResponseRedirect(reverse('report-job', kwargs={'job_id': job.job_id}))
+
+    def get_report_rows(self):
+        """
+        :return: Iterable of the report's rows, header row first, as dictionaries by column name
+        """
+        raise NotImplementedError
+
+    def get_report_file_name(self):
+        return '{0}_{1}.csv'.format(self.report_filename, datetime.strftime(datetime.now(), "%Y%m%dT%H%M"))
+
+    def parse_report_filters(self, params):
+        """
+        function to read the days and services to report on from query parameters: start and end, inclusive days as
+        YYYY-MM-DD, and service, one or more of childminder, adult and nanny, repeated or comma separated
+        :return Dictionary of start_date, end_date and services, as taken by set_report_filters"""
+        report_filters = {'start_date': None, 'end_date': None, 'services': REPORTING_SERVICES}
+
+        for param, key in (('start', 'start_date'), ('end', 'end_date')):
+            if params.get(param):
+                try:
+                    report_filters[key] = datetime.strptime(params[param], '%Y-%m-%d').date()
+                except ValueError:
+                    raise ValueError('{0} must be a date as YYYY-MM-DD'.format(param))
+
+        services = [service.strip().lower() for value in params.getlist('service') for service in value.split(',')]
+        if services:
+            unknown_services = set(services) - {service.lower() for service in REPORTING_SERVICES}
+            if unknown_services:
+                raise ValueError('Unknown service: {0}'.format(', '.join(sorted(unknown_services))))
+            report_filters['services'] = tuple(service for service in REPORTING_SERVICES
+                                               if service.lower() in services)
+
+        return report_filters
+
+    def set_report_filters(self, start_date=None, end_date=None, services=REPORTING_SERVICES):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.services = tuple(services)
+
+    def get_report_days(self):
+        """
+        :return: The first and last days of a daily report, by default every day from 19 February 2020 to now
+        """
+        initial_date = datetime.combine(self.start_date, time.min) if self.start_date else datetime(2020, 2, 19, 0, 0)
+        end_date = datetime.combine(self.end_date, time.min) if self.end_date else datetime.now()
+        return initial_date, end_date
+
+    def get_timeline_log_filters(self):
+        """
+        function to bound TimelineLog entries to the days reported on, in UTC as the reports compare them
+        :return Dictionary of TimelineLog filters on timestamp"""
+        timeline_filters = {}
 
-class DailyReportingBaseView(Echo):
+        if self.start_date:
+            timeline_filters['timestamp__gte'] = datetime.combine(self.start_date, time.min)
+        if self.end_date:
+            timeline_filters['timestamp__lt'] = datetime.combine(self.end_date + timedelta(days=1), time.min)
+
+        return {key: value.replace(tzinfo=timezone.utc) for key, value in timeline_filters.items()}
+
+    def get_timeline_log_params(self):
+        """
+        function to bound gateway timeline-log entries to the days reported on
+        :return Dictionary of timeline-log list params"""
+        return {key: value.strftime('%Y-%m-%dT%H:%M:%S') for key, value in self.get_timeline_log_filters().items()}
+
+    def in_report_window(self, timestamp):
+        """
+        :return: Whether a naive UTC timestamp falls within the days reported on, for gateways that may ignore the
+         params of get_timeline_log_params
+        """
+        return (not self.start_date or timestamp.date() >= self.start_date) and \
+               (not self.end_date or timestamp.date() <= self.end_date)
 
     def application_history(self, app_id=None, app_type=None):
         """
@@ -44,11 +175,7 @@ class DailyReportingBaseView(Echo):
                 else:
                     return dictionary
             else:
-                api_response = HMGatewayActions().list('timeline-log', params={})
-                if api_response.status_code == 200:
-                    timelinelog = api_response.record
-                else:
-                    return dictionary
+                timelinelog = HMGatewayActions().iter_list('timeline-log', params={})
         elif app_type == 'Nanny':
             if app_id is not False:
                 api_response = NannyGatewayActions().list('timeline-log', params={'object_id': app_id})
@@ -57,11 +184,7 @@ class DailyReportingBaseView(Echo):
                 else:
                     return dictionary
             else:
-                api_response = NannyGatewayActions().list('timeline-log', params={})
-                if api_response.status_code == 200:
-                    timelinelog = api_response.record
-                else:
-                    return dictionary
+                timelinelog = NannyGatewayActions().iter_list('timeline-log', params={})
         else:
             return dictionary
         return self.extract_timeline_history(timelinelog, app_type, app_id)
@@ -99,31 +222,54 @@ class DailyReportingBaseView(Echo):
 
         return dictionary
 
+    def bulk_application_history(self, app_ids, app_type, since=None):
+        """
+        function to list the histories of many applications at once, fetching the timeline log of each service in
+        bulk rather than once per application. Gateway timeline logs are filtered on the ids when there are at most
+        REPORTING_HISTORY_ID_FILTER_LIMIT of them, and otherwise swept in full
+        :param app_ids: ids of the applications to list the histories of
+        :param since: Optional date before which history is left out
+        :return Dictionary of the application_history of each application, by str(app_id)"""
+        app_ids = {str(app_id) for app_id in app_ids}
+        timelinelogs = defaultdict(list)
+        since = datetime.combine(since, time.min) if since else None
+
+        if app_type == 'Childminder':
+            timelinelog = TimelineLog.objects.filter(object_id__in=app_ids).select_related('user')
+            if since:
+                timelinelog = timelinelog.filter(timestamp__gte=since.replace(tzinfo=timezone.utc))
+            for entry in timelinelog.order_by('-timestamp').iterator():
+                timelinelogs[entry.object_id].append(entry)
+        elif app_type in ('Adult', 'Nanny'):
+            gateway = HMGatewayActions() if app_type == 'Adult' else NannyGatewayActions()
+            params = {'timestamp__gte': since.strftime('%Y-%m-%dT%H:%M:%S')} if since else {}
+            if not app_ids:
+                return {}
+            if len(app_ids) <= settings.REPORTING_HISTORY_ID_FILTER_LIMIT:
+                params['object_id__in'] = ','.join(sorted(app_ids))
+            # Entries of other applications are also skipped here, in case a gateway ignores the object_id filter
+            for log in gateway.iter_list('timeline-log', params=params):
+                if log['object_id'] in app_ids:
+                    entry = MockTimelineLog(**log)
+                    if since is None or entry.timestamp >= since:
+                        timelinelogs[log['object_id']].append(entry)
+
+        return {app_id: self.extract_timeline_history(timelinelogs[app_id], app_type, app_id) for app_id in app_ids}
+
     def get_application_histories(self, app_id=None):
 
         application_history = {}
         if app_id is not False:
-            cm_application_id_list = Application.objects.all().values_list('application_id')
-            application_history['Childminder'] = {}
-            for app_id in cm_application_id_list:
-                application_history['Childminder'][str(app_id[0])] = self.application_history(str(app_id[0]),
-                                                                                              'Childminder')
-
-            adult_application_response = HMGatewayActions().list('adult', params={})
-            if adult_application_response.status_code == 200:
-                adult_application_records = adult_application_response.record
-                application_history['Adult'] = {}
-                for record in adult_application_records:
-                    app_id = record['adult_id']
-                    application_history['Adult'][app_id] = self.application_history(app_id, 'Adult')
-
-            nanny_applications_response = NannyGatewayActions().list('application', params={})
-            if nanny_applications_response.status_code == 200:
-                nanny_applications_records = nanny_applications_response.record
-                application_history['Nanny'] = {}
-                for record in nanny_applications_records:
-                    application_history['Nanny'][record['application_id']] = self.application_history(
-                        record['application_id'], 'Nanny')
+            cm_application_id_list = Application.objects.all().values_list('application_id', flat=True)
+            application_history['Childminder'] = self.bulk_application_history(cm_application_id_list, 'Childminder')
+
+            adult_id_list = [record['adult_id'] for record in
+                             HMGatewayActions().iter_list('adult', params={}, fields=['adult_id'])]
+            application_history['Adult'] = self.bulk_application_history(adult_id_list, 'Adult')
+
+            nanny_id_list = [record['application_id'] for record in
+                             NannyGatewayActions().iter_list('application', params={}, fields=['application_id'])]
+            application_history['Nanny'] = self.bulk_application_history(nanny_id_list, 'Nanny')
 
         else:
             application_history['Childminder'] = self.application_history(app_id,app_type='Childminder')
@@ -134,6 +280,37 @@ class DailyReportingBaseView(Echo):
 
         return application_history
 
+    def iter_timeline_log(self, app_type):
+        """
+        function to list every entry of the timeline log of app_type logged on the days reported on, a page of gateway
+        records or a chunk of database rows at a time
+        :return Generator of the (object_id, timestamp, extra_data, user) of each entry"""
+        if app_type == 'Childminder':
+            timelinelog = TimelineLog.objects.filter(**self.get_timeline_log_filters())
+            yield from timelinelog.values_list('object_id', 'timestamp', 'extra_data', 'user').iterator()
+        elif app_type in ('Adult', 'Nanny'):
+            gateway = HMGatewayActions() if app_type == 'Adult' else NannyGatewayActions()
+            for line in gateway.iter_list('timeline-log', params=self.get_timeline_log_params()):
+                timestamp = datetime.strptime(line['timestamp'][:-6], '%Y-%m-%dT%H:%M:%S.%f')
+                if self.in_report_window(timestamp):
+                    yield line['object_id'], timestamp, line['extra_data'], line['user']
+
+    def get_reporting_facts(self):
+        """
+        function to read the daily totals of timeline events counted by update_reporting_facts, for the days and
+        services reported on
+        :return Counter of totals by date, service and metric"""
+        if settings.REPORTING_FACTS_REFRESH_ON_REPORT:
+            update_reporting_facts(self.services)
+
+        facts = ReportingFact.objects.filter(service__in=self.services)
+        if self.start_date:
+            facts = facts.filter(date__gte=self.start_date)
+        if self.end_date:
+            facts = facts.filter(date__lte=self.end_date)
+        facts = facts.values_list('date', 'service', 'metric', 'count')
+        return Counter({(date, service, metric): count for date, service, metric, count in facts})
+
     def get_user(self, user_id):
         if user_id == '':
             return user_id
@@ -149,93 +326,93 @@ class DailyReportingBaseView(Echo):
 @method_decorator(login_required, name='get')
 class ApplicationsInQueueView(DailyReportingBaseView):
 
-    def get(self, request):
-        context = self.get_applications_in_queue()
-        now = datetime.now()
-        now = datetime.strftime(now, "%Y%m%dT%H%M")
-        csv_columns = ['Date', 'Childminder in Queue', 'New Association in Queue',
-                       'Nanny in Queue', 'All Services in Queue']
-        pseudo_buffer = Echo()
-        writer = csv.DictWriter(pseudo_buffer,  fieldnames=csv_columns)
-        response = StreamingHttpResponse((writer.writerow(data) for data in context),
-                                         content_type="text/csv")
-        response['Content-Disposition'] = 'attachment; filename="Applications_in_Queue_{}.csv"'.format(now)
-        log.debug("Rendering applications in queue (Reporting)")
-
-        return response
+    csv_columns = ['Date', 'Childminder in Queue', 'New Association in Queue',
+                   'Nanny in Queue', 'All Services in Queue']
+    report_name = 'applications-in-queue'
+    report_filename = 'Applications_in_Queue'
 
+    def get_report_rows(self):
+        return self.get_applications_in_queue()
 
     def get_applications_in_queue(self):
         """
         function to list any application that has a status of SUBMITTED, grouped by date and by application.
-        :return: list of adult, childminder and nanny totals submitted but unassigned each day
+        :return: Generator of the header, then adult, childminder and nanny totals submitted but unassigned each day
         """
-        now = datetime.now()
-        initial_date = datetime(2020, 2, 19, 0, 0)
-        delta = timedelta(days=1)
-        adult_response = HMGatewayActions().list('adult', params={"adult_status": 'SUBMITTED'})
-        nanny_response = NannyGatewayActions().list('application', params={"application_status": 'SUBMITTED'})
-        cm_applications = list(Application.objects.filter(application_status='SUBMITTED', ))
-        apps_in_queue = [({'Date': 'Date',
-                                  'Childminder in Queue': 'Childminder in Queue',
-                                  'New Association in Queue': 'New Association in Queue',
-                                  'Nanny in Queue': 'Nanny in Queue',
-                                  'All Services in Queue':  'All Services in Queue'
-                                 })]
+        yield {'Date': 'Date',
+               'Childminder in Queue': 'Childminder in Queue',
+               'New Association in Queue': 'New Association in Queue',
+               'Nanny in Queue': 'Nanny in Queue',
+               'All Services in Queue':  'All Services in Queue'
+               }
+        initial_date, now = self.get_report_days()
+        cm_applications = []
+        adults_submitted = []
+        nannies_submitted = []
+        if 'Childminder' in self.services:
+            cm_applications = list(Application.objects.filter(application_status='SUBMITTED', ))
+        if 'Adult' in self.services:
+            adult_response = HMGatewayActions().list('adult', params={"adult_status": 'SUBMITTED'})
+            if adult_response.status_code == 200:
+                adults_submitted = adult_response.record
+        if 'Nanny' in self.services:
+            nanny_response = NannyGatewayActions().list('application', params={"application_status": 'SUBMITTED'})
+            if nanny_response.status_code == 200:
+                nannies_submitted = nanny_response.record
         cm_application_submitted_date = []
         adult_application_submitted_date = []
         nanny_application_submitted_date = []
 
+        # Submissions before the first day reported on are not counted, so that history is not fetched
+        cm_histories = self.bulk_application_history([item.application_id for item in cm_applications],
+                                                     'Childminder', since=self.start_date)
         for item in cm_applications:
             app_id = item.application_id
-            cm_submitted_history = OrderedDict(reversed(list(self.application_history(app_id, 'Childminder').items())))
+            cm_submitted_history = OrderedDict(reversed(list(cm_histories[str(app_id)].items())))
             cm_application_submitted_date.append(self.check_submission(cm_submitted_history))
 
-        if adult_response.status_code == 200:
-            adults_submitted = adult_response.record
+        if adults_submitted:
+            adult_histories = self.bulk_application_history([adult['adult_id'] for adult in adults_submitted],
+                                                            'Adult', since=self.start_date)
             for adult in adults_submitted:
                 adult_submitted_history = OrderedDict(
-                    reversed(list(self.application_history(adult['adult_id'], 'Adult').items())))
+                    reversed(list(adult_histories[str(adult['adult_id'])].items())))
                 adult_application_submitted_date.append(self.check_submission(adult_submitted_history))
 
-        if nanny_response.status_code == 200:
-            nannies_submitted = nanny_response.record
+        if nannies_submitted:
+            nanny_histories = self.bulk_application_history([nanny['application_id'] for nanny in nannies_submitted],
+                                                            'Nanny', since=self.start_date)
             for nanny in nannies_submitted:
-                nanny_submitted_history = OrderedDict(reversed(list(self.application_history(
-                    nanny['application_id'], 'Nanny').items())))
+                nanny_submitted_history = OrderedDict(reversed(list(nanny_histories[
+                    str(nanny['application_id'])].items())))
                 nanny_application_submitted_date.append(self.check_submission(nanny_submitted_history))
 
-        while initial_date <= now:
-            cm_apps = 0
-            adult_apps = 0
-            nanny_apps = 0
-            for date in cm_application_submitted_date:
-                if date.date() == initial_date.date():
-                    cm_apps += 1
-            for date in adult_application_submitted_date:
-                if date.date() == initial_date.date():
-                    adult_apps += 1
-            for date in nanny_application_submitted_date:
-                if date.date() == initial_date.date():
-                    nanny_apps += 1
-            apps_in_queue.append({'Date': datetime.strftime(initial_date, "%d %B %Y"),
-                                  'Childminder in Queue': cm_apps,
-                                  'New Association in Queue': adult_apps,
-                                  'Nanny in Queue': nanny_apps,
-                                  'All Services in Queue': (cm_apps + adult_apps + nanny_apps)
-                                 })
-            initial_date += delta
-
-        apps_in_queue.append(
-            {'Date': 'Total', 'Childminder in Queue': len(cm_applications),
-             'New Association in Queue': len(adult_response.record) if adult_response.status_code == 200 else 0,
-             'Nanny in Queue': len(nanny_response.record) if nanny_response.status_code == 200 else 0,
-             'All Services in Queue': (len(cm_applications) +
-                                       (len(adult_response.record) if adult_response.status_code == 200 else 0) +
-                                       (len(nanny_response.record) if nanny_response.status_code == 200 else 0))
-             })
-
-        return (apps_in_queue)
+        daily_counts = zip(self.count_by_day(cm_application_submitted_date, initial_date, now),
+                           self.count_by_day(adult_application_submitted_date, initial_date, now),
+                           self.count_by_day(nanny_application_submitted_date, initial_date, now))
+        for (day, cm_apps), (_, adult_apps), (_, nanny_apps) in daily_counts:
+            yield {'Date': datetime.strftime(day, "%d %B %Y"),
+                   'Childminder in Queue': cm_apps,
+                   'New Association in Queue': adult_apps,
+                   'Nanny in Queue': nanny_apps,
+                   'All Services in Queue': (cm_apps + adult_apps + nanny_apps)
+                   }
+
+        yield {'Date': 'Total', 'Childminder in Queue': len(cm_applications),
+               'New Association in Queue': len(adults_submitted),
+               'Nanny in Queue': len(nannies_submitted),
+               'All Services in Queue': len(cm_applications) + len(adults_submitted) + len(nannies_submitted)
+               }
+
+    def count_by_day(self, dates, initial_date, end_date):
+        """
+        function to count dates by day in a single pass over them, rather than one pass per day
+        :param dates: datetimes to count, in which False, for an application never submitted, is skipped
+        :return: list of (day, count) for every day from initial_date to end_date
+        """
+        counts = Counter(date.date() for date in dates if date)
+        days = (end_date.date() - initial_date.date()).days + 1
+        return [(day, counts[day.date()]) for day in (initial_date + timedelta(days=n) for n in range(days))]
 
     def check_submission(self, dictionary):
         for k1, v1 in dictionary.items():
@@ -248,160 +425,93 @@ class ApplicationsInQueueView(DailyReportingBaseView):
 
 
 @method_decorator(login_required, name='get')
+@method_decorator(login_required, name='post')
 class ApplicationsReturnedView(DailyReportingBaseView):
 
-    def get(self, request):
-        context = self.get_applications_returned()
-        now = datetime.now()
-        now = datetime.strftime(now, "%Y%m%dT%H%M")
-        csv_columns = ['Date', 'Childminder returned', 'New Association returned',
-                       'Nanny returned', 'All services returned']
-        pseudo_buffer = Echo()
-        writer = csv.DictWriter(pseudo_buffer, fieldnames=csv_columns)
-        response = StreamingHttpResponse((writer.writerow(data) for data in context),
-                                         content_type="text/csv")
-        response['Content-Disposition'] = 'attachment; filename="Applications_Returned_{}.csv"'.format(now)
-        log.debug("Rendering applications returned (Reporting)")
+    csv_columns = ['Date', 'Childminder returned', 'New Association returned',
+                   'Nanny returned', 'All services returned']
+    report_name = 'applications-returned'
+    report_filename = 'Applications_Returned'
+    run_in_background = True
 
-        return response
+    def get_report_rows(self):
+        return self.get_applications_returned()
 
     def get_applications_returned(self):
         """
         function to list the history of returned and re-returned applications on a given day.
-        :return: List of adults, childminder and nannies returned or returned by day
+        :return: Generator of the header, then adults, childminder and nannies returned or returned by day
         """
 
-        returned_apps = [({'Date': 'Date',
-                           'Childminder returned': 'Childminder returned',
-                           'New Association returned': 'New Association returned',
-                           'Nanny returned': 'Nanny returned',
-                           'All services returned': 'All services returned'})]
-        now = datetime.now()
-        initial_date = datetime(2020, 2, 19, 0, 0)
+        yield {'Date': 'Date',
+               'Childminder returned': 'Childminder returned',
+               'New Association returned': 'New Association returned',
+               'Nanny returned': 'Nanny returned',
+               'All services returned': 'All services returned'}
+        initial_date, now = self.get_report_days()
         delta = timedelta(days=1)
-        applications_history = self.get_application_histories(app_id=False)
-        app_types = ['Childminder', 'Adult', 'Nanny']
+        reporting_facts = self.get_reporting_facts()
         cm_app_total = 0
         adult_app_total = 0
         nanny_app_total = 0
         while initial_date <= now:
-            cm_apps = 0
-            adult_apps = 0
-            nanny_apps = 0
-            for app_type in app_types:
-                for app_id in applications_history[app_type]:
-                    if applications_history[app_type][app_id]['timestamp'].date() == initial_date.date() and 'returned by' == applications_history[app_type][app_id]['extra_data']['action']:
-                        if app_type == 'Childminder':
-                            cm_apps += 1
-                            cm_app_total += 1
-                        elif app_type == 'Adult':
-                            adult_apps += 1
-                            adult_app_total += 1
-                        elif app_type == 'Nanny':
-                            nanny_apps += 1
-                            nanny_app_total += 1
-            returned_apps.append({'Date': datetime.strftime(initial_date, "%d %B %Y"),
-                                  'Childminder returned': cm_apps, 'New Association returned': adult_apps,
-                                  'Nanny returned': nanny_apps,
-                                  'All services returned': (cm_apps + adult_apps + nanny_apps)
-                                  })
+            cm_apps = reporting_facts[(initial_date.date(), 'Childminder', 'returned')]
+            adult_apps = reporting_facts[(initial_date.date(), 'Adult', 'returned')]
+            nanny_apps = reporting_facts[(initial_date.date(), 'Nanny', 'returned')]
+            cm_app_total += cm_apps
+            adult_app_total += adult_apps
+            nanny_app_total += nanny_apps
+            yield {'Date': datetime.strftime(initial_date, "%d %B %Y"),
+                   'Childminder returned': cm_apps, 'New Association returned': adult_apps,
+                   'Nanny returned': nanny_apps,
+                   'All services returned': (cm_apps + adult_apps + nanny_apps)
+                   }
             initial_date += delta
 
-        returned_apps.append(
-            {'Date': 'Total', 'Childminder returned': cm_app_total, 'New Association returned': adult_app_total,
-             'Nanny returned': nanny_app_total,
-             'All services returned': (cm_app_total + adult_app_total + nanny_app_total)
-             })
-
-        return (returned_apps)
+        yield {'Date': 'Total', 'Childminder returned': cm_app_total, 'New Association returned': adult_app_total,
+               'Nanny returned': nanny_app_total,
+               'All services returned': (cm_app_total + adult_app_total + nanny_app_total)
+               }
 
 
 @method_decorator(login_required, name='get')
+@method_decorator(login_required, name='post')
 class ApplicationsProcessedView(DailyReportingBaseView):
 
-    def get(self, request):
-        context = self.get_applications_processed()
-        now = datetime.now()
-        now = datetime.strftime(now, "%Y%m%dT%H%M")
-        csv_columns = ['Date', 'Childminder Processed to Cygnum', 'Childminder Returned', 'Childminder % returned',
-                       'New Association Processed to Cygnum', 'New Association Returned', 'New Association % returned',
-                       'Nanny Processed to Cygnum', 'Nanny Returned', 'Nanny % returned',
-                       'All services Processed to Cygnum', 'All services Returned', 'All services % returned']
-        pseudo_buffer = Echo()
-        writer = csv.DictWriter(pseudo_buffer, fieldnames=csv_columns)
-        response = StreamingHttpResponse((writer.writerow(data) for data in context),
-                                         content_type="text/csv")
-        response['Content-Disposition'] = 'attachment; filename="Applications_Processed_{}.csv"'.format(now)
-        log.debug("Rendering applications processed (Reporting)")
+    csv_columns = ['Date', 'Childminder Processed to Cygnum', 'Childminder Returned', 'Childminder % returned',
+                   'New Association Processed to Cygnum', 'New Association Returned', 'New Association % returned',
+                   'Nanny Processed to Cygnum', 'Nanny Returned', 'Nanny % returned',
+                   'All services Processed to Cygnum', 'All services Returned', 'All services % returned']
+    report_name = 'applications-processed'
+    report_filename = 'Applications_Processed'
+    run_in_background = True
 
-        return response
+    def get_report_rows(self):
+        return self.get_applications_processed()
 
     def get_applications_processed(self):
         """
         Get how many applications that are submitted on a day end up being returned
-        :return: List of values representing number of returned applications by date and by application type
+        :return: Generator of the header, then values representing number of returned applications by date and by
+        application type
         """
 
-        processed_apps = [({'Date': 'Date',
-                            'Childminder Processed to Cygnum': 'Childminder Processed to Cygnum',
-                            'Childminder Returned': 'Childminder Returned',
-                            'Childminder % returned': 'Childminder % returned',
-                            'New Association Processed to Cygnum':  'New Association Processed to Cygnum',
-                            'New Association Returned': 'New Association Returned',
-                            'New Association % returned': 'New Association % returned',
-                            'Nanny Processed to Cygnum': 'Nanny Processed to Cygnum',
-                            'Nanny Returned': 'Nanny Returned',
-                            'Nanny % returned': 'Nanny % returned',
-                            'All services Processed to Cygnum': 'All services Processed to Cygnum',
-                            'All services Returned': 'All services Returned',
-                            'All services % returned': 'All services % returned'})]
-        now = datetime.now()
-        initial_date = datetime(2020, 2, 19, 0, 0)
+        yield {'Date': 'Date',
+               'Childminder Processed to Cygnum': 'Childminder Processed to Cygnum',
+               'Childminder Returned': 'Childminder Returned',
+               'Childminder % returned': 'Childminder % returned',
+               'New Association Processed to Cygnum':  'New Association Processed to Cygnum',
+               'New Association Returned': 'New Association Returned',
+               'New Association % returned': 'New Association % returned',
+               'Nanny Processed to Cygnum': 'Nanny Processed to Cygnum',
+               'Nanny Returned': 'Nanny Returned',
+               'Nanny % returned': 'Nanny % returned',
+               'All services Processed to Cygnum': 'All services Processed to Cygnum',
+               'All services Returned': 'All services Returned',
+               'All services % returned': 'All services % returned'}
+        initial_date, now = self.get_report_days()
         delta = timedelta(days=1)
-        applications_history = self.get_application_histories(app_id=False)
-        app_types = ['Childminder', 'Adult', 'Nanny']
-        while initial_date <= now:
-            cm_apps = 0
-            cm_apps_returned = 0
-            adult_apps = 0
-            adult_apps_returned = 0
-            nanny_apps = 0
-            nanny_apps_returned = 0
-            for app_type in app_types:
-                for app_id in applications_history[app_type]:
-                    if applications_history[app_type][app_id]['timestamp'].date() == initial_date.date():
-                        if applications_history[app_type][app_id]['extra_data']['action'] == 'accepted by':
-                            if app_type == 'Childminder':
-                                cm_apps += 1
-                            elif app_type == 'Adult':
-                                adult_apps += 1
-                            elif app_type == 'Nanny':
-                                nanny_apps += 1
-                        elif applications_history[app_type][app_id]['extra_data']['action'] == 'returned by':
-                            if app_type == 'Childminder':
-                                cm_apps_returned += 1
-                            elif app_type == 'Adult':
-                                adult_apps_returned += 1
-                            elif app_type == 'Nanny':
-                                nanny_apps_returned += 1
-            total_accepted = (cm_apps + adult_apps + nanny_apps)
-            total_returned = (cm_apps_returned + adult_apps_returned + nanny_apps_returned)
-            processed_apps.append({'Date': datetime.strftime(initial_date, "%d %B %Y"),
-                                   'Childminder Processed to Cygnum': cm_apps,
-                                   'Childminder Returned': cm_apps_returned,
-                                   'Childminder % returned': (cm_apps_returned / (cm_apps + cm_apps_returned)) * 100 if cm_apps_returned is not 0 else 0,
-                                   'New Association Processed to Cygnum': adult_apps,
-                                   'New Association Returned': adult_apps_returned,
-                                   'New Association % returned': (adult_apps_returned / (adult_apps + adult_apps_returned)) * 100 if adult_apps_returned is not 0 else 0,
-                                   'Nanny Processed to Cygnum': nanny_apps,
-                                   'Nanny Returned': nanny_apps_returned,
-                                   'Nanny % returned': ((nanny_apps_returned / (nanny_apps + nanny_apps_returned)) * 100) if nanny_apps_returned is not 0 else 0,
-                                   'All services Processed to Cygnum': total_accepted,
-                                   'All services Returned': total_returned,
-                                   'All services % returned': (total_returned / (total_accepted + total_returned)) * 100 if total_returned is not 0 else 0
-                                   })
-
-            initial_date += delta
+        reporting_facts = self.get_reporting_facts()
         total_cm_accepted = 0
         total_cm_returned = 0
         total_adult_accepted = 0
@@ -410,69 +520,87 @@ class ApplicationsProcessedView(DailyReportingBaseView):
         total_nanny_returned = 0
         total_all_services_accepted = 0
         total_all_services_returned = 0
-        for i in processed_apps[1:]:
-            total_cm_accepted += i['Childminder Processed to Cygnum']
-            total_cm_returned += i['Childminder Returned']
-            total_adult_accepted += i['New Association Processed to Cygnum']
-            total_adult_returned += i['New Association Returned']
-            total_nanny_accepted += i['Nanny Processed to Cygnum']
-            total_nanny_returned += i['Nanny Returned']
-            total_all_services_accepted += i['All services Processed to Cygnum']
-            total_all_services_returned += i['All services Returned']
-        processed_apps.append({'Date': 'Total',
-                               'Childminder Processed to Cygnum': total_cm_accepted,
-                               'Childminder Returned': total_cm_returned,
-                               'Childminder % returned': (total_cm_returned / (total_cm_accepted + total_cm_returned)) * 100 if total_cm_returned is not 0 else 0,
-                               'New Association Processed to Cygnum': total_adult_accepted,
-                               'New Association Returned': total_adult_returned,
-                               'New Association % returned': (total_adult_returned / (total_adult_accepted + total_adult_returned)) * 100 if total_adult_returned is not 0 else 0,
-                               'Nanny Processed to Cygnum': total_nanny_accepted,
-                               'Nanny Returned': total_nanny_returned,
-                               'Nanny % returned': (total_nanny_returned / (total_nanny_accepted + total_nanny_returned)) * 100 if total_nanny_returned is not 0 else 0,
-                               'All services Processed to Cygnum': total_all_services_accepted,
-                               'All services Returned': total_all_services_returned,
-                               'All services % returned': (total_all_services_returned / (total_all_services_accepted + total_all_services_returned)) * 100 if total_all_services_returned is not 0 else 0
-                               })
-        return processed_apps
+        while initial_date <= now:
+            cm_apps = reporting_facts[(initial_date.date(), 'Childminder', 'processed')]
+            cm_apps_returned = reporting_facts[(initial_date.date(), 'Childminder', 'returned')]
+            adult_apps = reporting_facts[(initial_date.date(), 'Adult', 'processed')]
+            adult_apps_returned = reporting_facts[(initial_date.date(), 'Adult', 'returned')]
+            nanny_apps = reporting_facts[(initial_date.date(), 'Nanny', 'processed')]
+            nanny_apps_returned = reporting_facts[(initial_date.date(), 'Nanny', 'returned')]
+            total_accepted = (cm_apps + adult_apps + nanny_apps)
+            total_returned = (cm_apps_returned + adult_apps_returned + nanny_apps_returned)
+            total_cm_accepted += cm_apps
+            total_cm_returned += cm_apps_returned
+            total_adult_accepted += adult_apps
+            total_adult_returned += adult_apps_returned
+            total_nanny_accepted += nanny_apps
+            total_nanny_returned += nanny_apps_returned
+            total_all_services_accepted += total_accepted
+            total_all_services_returned += total_returned
+            yield {'Date': datetime.strftime(initial_date, "%d %B %Y"),
+                   'Childminder Processed to Cygnum': cm_apps,
+                   'Childminder Returned': cm_apps_returned,
+                   'Childminder % returned': (cm_apps_returned / (cm_apps + cm_apps_returned)) * 100 if cm_apps_returned is not 0 else 0,
+                   'New Association Processed to Cygnum': adult_apps,
+                   'New Association Returned': adult_apps_returned,
+                   'New Association % returned': (adult_apps_returned / (adult_apps + adult_apps_returned)) * 100 if adult_apps_returned is not 0 else 0,
+                   'Nanny Processed to Cygnum': nanny_apps,
+                   'Nanny Returned': nanny_apps_returned,
+                   'Nanny % returned': ((nanny_apps_returned / (nanny_apps + nanny_apps_returned)) * 100) if nanny_apps_returned is not 0 else 0,
+                   'All services Processed to Cygnum': total_accepted,
+                   'All services Returned': total_returned,
+                   'All services % returned': (total_returned / (total_accepted + total_returned)) * 100 if total_returned is not 0 else 0
+                   }
+
+            initial_date += delta
+
+        yield {'Date': 'Total',
+               'Childminder Processed to Cygnum': total_cm_accepted,
+               'Childminder Returned': total_cm_returned,
+               'Childminder % returned': (total_cm_returned / (total_cm_accepted + total_cm_returned)) * 100 if total_cm_returned is not 0 else 0,
+               'New Association Processed to Cygnum': total_adult_accepted,
+               'New Association Returned': total_adult_returned,
+               'New Association % returned': (total_adult_returned / (total_adult_accepted + total_adult_returned)) * 100 if total_adult_returned is not 0 else 0,
+               'Nanny Processed to Cygnum': total_nanny_accepted,
+               'Nanny Returned': total_nanny_returned,
+               'Nanny % returned': (total_nanny_returned / (total_nanny_accepted + total_nanny_returned)) * 100 if total_nanny_returned is not 0 else 0,
+               'All services Processed to Cygnum': total_all_services_accepted,
+               'All services Returned': total_all_services_returned,
+               'All services % returned': (total_all_services_returned / (total_all_services_accepted + total_all_services_returned)) * 100 if total_all_services_returned is not 0 else 0
+               }
 
 
 @method_decorator(login_required, name='get')
 class ApplicationsAssignedView(DailyReportingBaseView):
 
-    def get(self, request):
-        context = self.get_applications_assigned()
-        now = datetime.now()
-        now = datetime.strftime(now, "%Y%m%dT%H%M")
-        csv_columns = ['URN', 'Caseworker', 'Type',
-                       'Action', 'Created Date/Time',
-                       'Assigned to Date/Time']
-        pseudo_buffer = Echo()
-        writer = csv.DictWriter(pseudo_buffer, fieldnames=csv_columns)
-        response = StreamingHttpResponse((writer.writerow(data) for data in context),
-                                         content_type="text/csv")
-        response['Content-Disposition'] = 'attachment; filename="Applications_Assigned_{}.csv"'.format(now)
-        log.debug("Download applications assigned (Reporting)")
+    csv_columns = ['URN', 'Caseworker', 'Type',
+                   'Action', 'Created Date/Time',
+                   'Assigned to Date/Time']
+    report_name = 'applications-assigned'
+    report_filename = 'Applications_Assigned'
 
-        return response
+    def get_report_rows(self):
+        return self.get_applications_assigned()
 
     def get_applications_assigned(self):
         """
         Snapshot in time showing all applications and who they have been most recently assigned to
-        :return: List with every URN and who the application has most recently been assigned to
+        :return: Generator of the header, then every URN and who the application has most recently been assigned to
         """
 
-        assigned_apps = [({'URN': 'URN',
-                           'Caseworker': 'Caseworker',
-                           'Type': 'Type',
-                           'Action': 'Action',
-                           'Created Date/Time': 'Created Date/Time',
-                           'Assigned to Date/Time': 'Assigned to Date/Time'})]
-        adult_response = HMGatewayActions().list('adult', params={"adult_status": 'ARC_REVIEW'})
-        nanny_response = NannyGatewayActions().list('application', params={"application_status": 'ARC_REVIEW'})
-        cm_applications = list(Application.objects.filter(application_status='ARC_REVIEW', ))
+        yield {'URN': 'URN',
+               'Caseworker': 'Caseworker',
+               'Type': 'Type',
+               'Action': 'Action',
+               'Created Date/Time': 'Created Date/Time',
+               'Assigned to Date/Time': 'Assigned to Date/Time'}
+        cm_applications = []
+        if 'Childminder' in self.services:
+            cm_applications = list(Application.objects.filter(application_status='ARC_REVIEW', ))
+        cm_histories = self.bulk_application_history([app.application_id for app in cm_applications], 'Childminder')
         for app in cm_applications:
             app_id = app.application_id
-            cm_assigned_history = self.application_history(app_id, 'Childminder')
+            cm_assigned_history = cm_histories[str(app_id)]
             urn = Application.objects.get(application_id=app_id).application_reference
             if Arc.objects.filter(application_id=app_id).exists():
                 user_id = Arc.objects.get(application_id=app_id).user_id
@@ -480,16 +608,20 @@ class ApplicationsAssignedView(DailyReportingBaseView):
                 user_id = ''
             formatted_created_date = datetime.strftime(list(cm_assigned_history)[0], "%d/%m/%y %H:%M")
             formatted_assigned_date = datetime.strftime(list(cm_assigned_history)[-1], "%d/%m/%y %H:%M")
-            assigned_apps.append({'URN': urn, 'Caseworker': self.get_user(user_id),
-                                  'Type': 'CM', 'Action': 'Assigned',
-                                  'Created Date/Time': formatted_created_date,
-                                  'Assigned to Date/Time': formatted_assigned_date})
-
-        if adult_response.status_code == 200:
+            yield {'URN': urn, 'Caseworker': self.get_user(user_id),
+                   'Type': 'CM', 'Action': 'Assigned',
+                   'Created Date/Time': formatted_created_date,
+                   'Assigned to Date/Time': formatted_assigned_date}
+
+        adult_response = HMGatewayActions().list('adult', params={"adult_status": 'ARC_REVIEW'}) \
+            if 'Adult' in self.services else None
+        if adult_response is not None and adult_response.status_code == 200:
             adults_assigned = adult_response.record
+            dpa_auth_records = HMGatewayActions().read_many('dpa-auth', [adult['token_id'] for adult in adults_assigned])
+            adult_histories = self.bulk_application_history([adult['adult_id'] for adult in adults_assigned], 'Adult')
             for adult in adults_assigned:
-                adult_assigned_history = self.application_history(adult['adult_id'], 'Adult')
-                urn = HMGatewayActions().list('dpa-auth', params={'token_id': adult['token_id']}).record[0]['URN']
+                adult_assigned_history = adult_histories[str(adult['adult_id'])]
+                urn = dpa_auth_records[str(adult['token_id'])]['URN']
                 log.debug('URN = {}, adult_id = {}'.format(urn, adult['adult_id']))
                 if Arc.objects.filter(application_id=adult['adult_id']).exists():
                     user_id = Arc.objects.get(application_id=adult['adult_id']).user_id
@@ -497,15 +629,19 @@ class ApplicationsAssignedView(DailyReportingBaseView):
                     user_id = ''
                 formatted_created_date = datetime.strftime(list(adult_assigned_history)[0], "%d/%m/%y %H:%M")
                 formatted_assigned_date = datetime.strftime(list(adult_assigned_history)[-1], "%d/%m/%y %H:%M")
-                assigned_apps.append({'URN': urn, 'Caseworker': self.get_user(user_id), 'Type': 'New Association',
-                                      'Action': 'Assigned',
-                                      'Created Date/Time': formatted_created_date,
-                                      'Assigned to Date/Time': formatted_assigned_date})
-
-        if nanny_response.status_code == 200:
+                yield {'URN': urn, 'Caseworker': self.get_user(user_id), 'Type': 'New Association',
+                       'Action': 'Assigned',
+                       'Created Date/Time': formatted_created_date,
+                       'Assigned to Date/Time': formatted_assigned_date}
+
+        nanny_response = NannyGatewayActions().list('application', params={"application_status": 'ARC_REVIEW'}) \
+            if 'Nanny' in self.services else None
+        if nanny_response is not None and nanny_response.status_code == 200:
             nannies_assigned = nanny_response.record
+            nanny_histories = self.bulk_application_history([nanny['application_id'] for nanny in nannies_assigned],
+                                                            'Nanny')
             for nanny in nannies_assigned:
-                nanny_assigned_history = self.application_history(nanny['application_id'], 'Nanny')
+                nanny_assigned_history = nanny_histories[str(nanny['application_id'])]
                 urn = nanny['application_reference']
                 if Arc.objects.filter(application_id=nanny['application_id']).exists():
                     user_id = Arc.objects.get(application_id=nanny['application_id']).user_id
@@ -513,30 +649,24 @@ class ApplicationsAssignedView(DailyReportingBaseView):
                     user_id = ''
                 formatted_created_date = datetime.strftime(list(nanny_assigned_history)[0], "%d/%m/%y %H:%M")
                 formatted_assigned_date = datetime.strftime(list(nanny_assigned_history)[-1], "%d/%m/%y %H:%M")
-                assigned_apps.append({'URN': urn, 'Caseworker': self.get_user(user_id), 'Type': 'Nanny',
-                                      'Action': 'Assigned',
-                                      'Created Date/Time': formatted_created_date,
-                                      'Assigned to Date/Time': formatted_assigned_date})
+                yield {'URN': urn, 'Caseworker': self.get_user(user_id), 'Type': 'Nanny',
+                       'Action': 'Assigned',
+                       'Created Date/Time': formatted_created_date,
+                       'Assigned to Date/Time': formatted_assigned_date}
 
-        return assigned_apps
 
 @method_decorator(login_required, name='get')
+@method_decorator(login_required, name='post')
 class ApplicationsAuditLogView(DailyReportingBaseView):
 
-    def get(self, request):
-        context = self.get_applications_audit_log()
-        now = datetime.now()
-        now = datetime.strftime(now, "%Y%m%dT%H%M")
-        csv_columns = ['URN', 'Name', 'Caseworker', 'Type',
-                       'Action', 'Date/Time']
-        pseudo_buffer = Echo()
-        writer = csv.DictWriter(pseudo_buffer, fieldnames=csv_columns)
-        response = StreamingHttpResponse((writer.writerow(data) for data in context),
-                                         content_type="text/csv")
-        response['Content-Disposition'] = 'attachment; filename="Applications_Audit_Log_{}.csv"'.format(now)
-        log.debug("Download application audit log (Reporting)")
+    csv_columns = ['URN', 'Name', 'Caseworker', 'Type',
+                   'Action', 'Date/Time']
+    report_name = 'applications-audit-log'
+    report_filename = 'Applications_Audit_Log'
+    run_in_background = True
 
-        return response
+    def get_report_rows(self):
+        return self.get_applications_audit_log()
 
     def get_user_from_username(self, user_type, user_id):
         if user_type == 'applicant':
@@ -554,117 +684,112 @@ class ApplicationsAuditLogView(DailyReportingBaseView):
 
     def get_applications_audit_log(self):
         """
-        Snapshot in time showing the history of each application
-        :return: List with every URN and who the application has most recently been assigned to
+        Snapshot in time showing the history of each application, generated a row at a time so the log is never held
+        in memory and the header can be sent before the first query
+        :return: Generator of the header, then a row for every action logged against an application
         """
 
-        audit_log = [({'URN': 'URN',
-                       'Name': 'Name',
-                       'Caseworker': 'Caseworker',
-                       'Type': 'Type',
-                       'Action': 'Action',
-                       'Date/Time': 'Date/Time',
-                       })]
-        applications_history = self.get_application_histories(app_id=False)
-
-        all_cm_applications = {}
-        for record in Application.objects.values('application_id', 'application_reference'):
-            all_cm_applications[str(record['application_id'])] = {'urn': record['application_reference']}
-        all_cm_application_names = {}
-        for record in ApplicantName.objects.values('application_id','first_name', 'last_name'):
-            all_cm_application_names[str(record['application_id'])] = {'full_name': record['first_name'] + " " + record['last_name']}
-
-        adult_application_response = HMGatewayActions().list('adult', params={})
-        if adult_application_response.status_code == 200:
-            all_adult_record_rows = adult_application_response.record
-            all_adult_records = {}
-            for record in all_adult_record_rows:
-                all_adult_records[record['adult_id']] = {'full_name': record['get_full_name'], 'token_id': record['token_id']}
-        adult_dpa_response = HMGatewayActions().list('dpa-auth', params={})
-        if adult_dpa_response.status_code == 200:
-            all_adult_dpa_record_rows = adult_dpa_response.record
-            all_adult_dpa_records = {}
-            for record in all_adult_dpa_record_rows:
-                all_adult_dpa_records[record['token_id']] = {'urn': record['URN']}
-
-        nanny_applications_response = NannyGatewayActions().list('application', params={})
-        if nanny_applications_response.status_code == 200:
-            all_nanny_record_rows = nanny_applications_response.record
-            all_nanny_records = {}
-            for record in all_nanny_record_rows:
-                all_nanny_records[record['application_id']] = {'urn': record['application_reference']}
-
-        nanny_personal_details_response = NannyGatewayActions().list('applicant-personal-details',
-                                              params={})
-        if nanny_personal_details_response.status_code == 200:
-            all_nanny_personal_details_rows = nanny_personal_details_response.record
-            all_nanny_personal_details = {}
-            for record in all_nanny_personal_details_rows:
-                all_nanny_personal_details[record['application_id']] = {'full_name': record['first_name'] + " " + record['last_name']}
-
-        for k1, v1 in applications_history.items():
-            for k2, v2 in v1.items():
-                if v2['extra_data']['action'] == 'created by':
-                    action = 'Created'
-                elif v2['extra_data']['action'] == 'submitted by':
-                    action = 'Submitted'
-                elif v2['extra_data']['action'] == 'assigned to':
-                    action = 'Assigned'
-                elif v2['extra_data']['action'] == 'returned by':
-                    action = 'Returned'
-                elif v2['extra_data']['action'] == 'resubmitted by':
-                    action = 'Resubmitted'
-                elif v2['extra_data']['action'] == 'accepted by':
-                    action = 'Processed to Cygnum'
-                elif v2['extra_data']['action'] == 'released by':
-                    action = 'Released'
-                else:
+        yield {'URN': 'URN',
+               'Name': 'Name',
+               'Caseworker': 'Caseworker',
+               'Type': 'Type',
+               'Action': 'Action',
+               'Date/Time': 'Date/Time',
+               }
+        actions = {
+            'created by': 'Created',
+            'submitted by': 'Submitted',
+            'assigned to': 'Assigned',
+            'returned by': 'Returned',
+            'resubmitted by': 'Resubmitted',
+            'accepted by': 'Processed to Cygnum',
+            'released by': 'Released',
+        }
+        caseworkers = {}
+
+        for app_type, report_type in (('Childminder', 'CM'), ('Adult', 'New Association'), ('Nanny', 'Nanny')):
+            if app_type not in self.services:
+                continue
+            applications = self.get_audit_log_applications(app_type)
+
+            for app_id, timestamp, extra_data, user in self.iter_timeline_log(app_type):
+                action = actions.get(extra_data['action'])
+                if action is None:
                     continue
-                app_id=k2.split(',')[0]
-                if k1 == 'Childminder':
-                    if app_id in all_cm_application_names:
-                        full_name = all_cm_application_names[app_id]['full_name']
-                    else:
-                        full_name = ''
-                    if app_id in all_cm_applications:
-                        urn = all_cm_applications[app_id]['urn']
-                    else:
-                        urn = ''
-                elif k1 == 'Adult':
-                    if app_id in all_adult_records:
-                        if all_adult_records[app_id]['token_id'] in all_adult_dpa_records:
-                            urn = all_adult_dpa_records[all_adult_records[app_id]['token_id']]['urn']
-                        else:
-                            urn=''
-                    else:
-                        urn = ''
-                    if app_id in all_adult_records:
-                        full_name = all_adult_records[app_id]['full_name']
-                    else:
-                        full_name = ''
-                elif k1 == 'Nanny':
-                    if app_id in all_nanny_records:
-                        urn = all_nanny_records[app_id]['urn']
-                    else:
-                        urn= ''
-                    if app_id in all_nanny_personal_details:
-                        full_name = all_nanny_personal_details[app_id]['full_name']
-                    else:
-                        full_name = ''
-                formatted_date = datetime.strftime(v2['timestamp'], "%d/%m/%y %H:%M")
-                if k1 == 'Childminder':
-                    audit_log.append({'URN': urn, 'Name': full_name,
-                                      'Caseworker': self.get_user_from_username(v2['extra_data']['user_type'],v2['user']),
-                                      'Type': 'CM', 'Action': action,
-                                      'Date/Time': formatted_date})
-                elif k1 == 'Adult':
-                    audit_log.append({'URN': urn, 'Name': full_name,
-                                      'Caseworker': self.get_user_from_username(v2['extra_data']['user_type'],v2['user']),
-                                      'Type': 'New Association',
-                                      'Action': action, 'Date/Time': formatted_date})
-                elif k1 == 'Nanny':
-                    audit_log.append({'URN': urn, 'Name': full_name,
-                                      'Caseworker': self.get_user_from_username(v2['extra_data']['user_type'],v2['user']),
-                                      'Type': 'Nanny', 'Action': action,
-                                      'Date/Time': formatted_date})
-        return audit_log
\ No newline at end of file
+                urn, full_name = applications.get(app_id, ('', ''))
+                caseworker_key = (extra_data['user_type'], user)
+                if caseworker_key not in caseworkers:
+                    caseworkers[caseworker_key] = self.get_user_from_username(extra_data['user_type'], user)
+                yield {'URN': urn, 'Name': full_name, 'Caseworker': caseworkers[caseworker_key],
+                       'Type': report_type, 'Action': action,
+                       'Date/Time': datetime.strftime(timestamp, "%d/%m/%y %H:%M")}
+
+    def get_audit_log_applications(self, app_type):
+        """
+        function to look up the URN and applicant name of every application of app_type
+        :return: Dictionary of (urn, full_name) by application id
+        """
+        applications = {}
+
+        if app_type == 'Childminder':
+            for record in Application.objects.values('application_id', 'application_reference').iterator():
+                applications[str(record['application_id'])] = (record['application_reference'], '')
+            for record in ApplicantName.objects.values('application_id', 'first_name', 'last_name').iterator():
+                app_id = str(record['application_id'])
+                applications[app_id] = (applications.get(app_id, ('', ''))[0],
+                                        record['first_name'] + " " + record['last_name'])
+
+        elif app_type == 'Adult':
+            dpa_urns = {record['token_id']: record['URN'] for record in
+                        HMGatewayActions().iter_list('dpa-auth', params={}, fields=['token_id', 'URN'])}
+            for record in HMGatewayActions().iter_list('adult', params={},
+                                                       fields=['adult_id', 'get_full_name', 'token_id']):
+                applications[record['adult_id']] = (dpa_urns.get(record['token_id'], ''), record['get_full_name'])
+
+        elif app_type == 'Nanny':
+            for record in NannyGatewayActions().iter_list('application', params={},
+                                                          fields=['application_id', 'application_reference']):
+                applications[record['application_id']] = (record['application_reference'], '')
+            for record in NannyGatewayActions().iter_list('applicant-personal-details', params={},
+                                                          fields=['application_id', 'first_name', 'last_name']):
+                app_id = record['application_id']
+                applications[app_id] = (applications.get(app_id, ('', ''))[0],
+                                        record['first_name'] + " " + record['last_name'])
+
+        return applications
+
+
+@method_decorator(login_required, name='get')
+class ReportJobView(View):
+    """
+    Page polled while a report is generated in the background, downloading the report once it has been generated.
+    Only the user who requested the report may see it.
+    """
+    template_name = 'report_job.html'
+
+    def get(self, request, job_id):
+        job = get_object_or_404(ReportJob, job_id=job_id, requested_by=request.user)
+
+        if job.status == ReportJob.COMPLETE:
+            if not os.path.exists(report_job_path(job)):
+                raise Http404('Report no longer available')
+
+            response = FileResponse(open(report_job_path(job), 'rb'), content_type="text/csv")
+            response['Content-Disposition'] = 'attachment; filename="{0}"'.format(job.file_name)
+            log.debug("Download {0} (Reporting), job {1}".format(job.report, job.job_id))
+            return response
+
+        # The retry link requests the report again for the same days and services
+        report_url = reverse(job.report)
+        report_query = report_job_query(job)
+        if report_query:
+            report_url += '?' + urlencode(report_query)
+
+        context = {'job': job, 'report_url': report_url, 'failed': job.status == ReportJob.FAILED}
+        return render(request, self.template_name, context=context)
+
+
+# Report views by report name, as generated by the run_report_jobs management command
+REPORT_VIEWS = {view.report_name: view for view in (ApplicationsInQueueView, ApplicationsReturnedView,
+                                                    ApplicationsProcessedView, ApplicationsAssignedView,
+                                                    ApplicationsAuditLogView)}
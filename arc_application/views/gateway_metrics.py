@@ -0,0 +1,23 @@
+import logging
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+
+from ..services import gateway_metrics as metrics
+from ..services.http_client import get_circuit_breaker_stats
+
+# Initiate logging
+log = logging.getLogger()
+
+
+@staff_member_required
+def gateway_metrics(request):
+    """
+    Staff-only view returning this process' gateway call metrics and circuit breaker states as JSON
+    :param request: HTTP Request
+    :return: JSON response of the metrics snapshot
+    """
+    log.debug("Rendering gateway metrics")
+    context = metrics.snapshot()
+    context['circuit_breakers'] = get_circuit_breaker_stats()
+    return JsonResponse(context)
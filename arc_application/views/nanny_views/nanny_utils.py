@@ -1,3 +1,5 @@
+from django.conf import settings
+
 from .nanny_childcare_address import NannyChildcareAddressSummary
 from .nanny_childcare_training import NannyChildcareTrainingSummary
 from .nanny_contact_details import NannyContactDetailsSummary
@@ -5,6 +7,7 @@ from .nanny_dbs_check import NannyDbsCheckSummary
 from .nanny_first_aid import NannyFirstAidTrainingSummary
 from .nanny_insurance_cover import NannyInsuranceCoverSummary
 from .nanny_personal_details import NannyPersonalDetailsSummary
+from ...services.db_gateways import IdentityGatewayActions, NannyGatewayActions, request_cache_scope
 
 
 def get_nanny_summary_functions():
@@ -28,7 +31,16 @@ def get_nanny_summary_variables(application_id):
     :param application_id: the unique identifier of the application
     """
     context_function_list = get_nanny_summary_functions()
-    context_list = [context_func(application_id) for context_func in context_function_list if context_func]
+
+    if not settings.ENABLE_GATEWAY_REQUEST_CACHE:
+        context_list = [context_func(application_id) for context_func in context_function_list if context_func]
+    else:
+        with request_cache_scope():
+            # Each section's context reads its records one at a time; fetch the records every summary reads
+            # concurrently up front so those reads are answered from the identity map. The childcare address
+            # section's other reads depend on the application record, so are left to that section.
+            _prefetch_nanny_summary_records(application_id)
+            context_list = [context_func(application_id) for context_func in context_function_list if context_func]
 
     # Remove 'Review: ' from page titles.
     # FIXME Change each view to use verbose_task_name property instead.
@@ -36,3 +48,21 @@ def get_nanny_summary_variables(application_id):
         context['title'] = context['title'][7:]
 
     return context_list
+
+
+def _prefetch_nanny_summary_records(application_id):
+    application_params = {'application_id': application_id}
+
+    NannyGatewayActions().gather([
+        (IdentityGatewayActions(), 'read', 'user', application_params),
+        ('read', 'application', application_params),
+        ('read', 'applicant-personal-details', application_params),
+        ('list', 'previous-name', application_params),
+        ('read', 'applicant-home-address', application_params),
+        ('list', 'previous-address', {'person_id': application_id, 'person_type': 'APPLICANT'}),
+        ('read', 'previous-registration-details', application_params),
+        ('read', 'first-aid', application_params),
+        ('read', 'childcare-training', application_params),
+        ('read', 'dbs-check', application_params),
+        ('read', 'insurance-cover', application_params),
+    ])
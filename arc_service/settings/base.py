@@ -27,6 +27,89 @@ ENABLE_HM = os.environ.get('ENABLE_HM') in ['true', True, 'True']
 
 HM_GATEWAY_URL = os.environ.get("APP_HM_GATEWAY_URL")
 
+# Connection pooling for outbound gateway calls. One pool is kept per target host and shared across the process.
+GATEWAY_POOL_CONNECTIONS = int(os.environ.get('GATEWAY_POOL_CONNECTIONS', 10))
+GATEWAY_POOL_MAXSIZE = int(os.environ.get('GATEWAY_POOL_MAXSIZE', 10))
+# Retries of failed connection attempts only; requests that reached the gateway are never re-sent.
+GATEWAY_MAX_RETRIES = int(os.environ.get('GATEWAY_MAX_RETRIES', 0))
+# default: True
+# if false then every gateway call opens (and closes) its own connection
+GATEWAY_KEEP_ALIVE = os.environ.get('GATEWAY_KEEP_ALIVE', 'True') in ['true', True, 'True']
+# default: False
+# if true then repeat gateway reads of the same record within one request are answered from memory, see
+# arc_application.middleware.GatewayRequestCacheMiddleware
+ENABLE_GATEWAY_REQUEST_CACHE = os.environ.get('ENABLE_GATEWAY_REQUEST_CACHE') in ['true', True, 'True']
+# Upper bound on gateway calls issued concurrently by DBGatewayActions.gather, across the whole process
+GATEWAY_GATHER_MAX_WORKERS = int(os.environ.get('GATEWAY_GATHER_MAX_WORKERS', 8))
+# default: False
+# if true then reads of the endpoints listed in each gateway client's _endpoint_cache_ttl_dict are shared across
+# requests through the cache below, and evicted by any write to the same endpoint
+ENABLE_GATEWAY_SHARED_CACHE = os.environ.get('ENABLE_GATEWAY_SHARED_CACHE') in ['true', True, 'True']
+GATEWAY_SHARED_CACHE_ALIAS = os.environ.get('GATEWAY_SHARED_CACHE_ALIAS', 'default')
+# Records fetched per call when paging through a gateway listing with DBGatewayActions.iter_list
+GATEWAY_LIST_PAGE_SIZE = int(os.environ.get('GATEWAY_LIST_PAGE_SIZE', 500))
+
+# Maximum number of results, from each source, a search may page through, see SearchService.search
+SEARCH_RESULTS_LIMIT = int(os.environ.get('SEARCH_RESULTS_LIMIT', 500))
+# Number of search results shown per page
+SEARCH_PAGE_SIZE = int(os.environ.get('SEARCH_PAGE_SIZE', 50))
+# Whether Childminder searches first index applications updated since they were last indexed, e.g. by the applicant
+# through the Childminder service, whose saves do not reach ARC's signals. Off by default: the refresh scans every
+# application and locks the rows it rebuilds, within the search request. The index is instead kept current by the
+# signals and by running the rebuild_search_index --stale-only --interval management command as a supervised service.
+# Only turn on as a stopgap where that command is not yet run.
+SEARCH_INDEX_REFRESH_ON_SEARCH = os.environ.get('SEARCH_INDEX_REFRESH_ON_SEARCH', 'False') in ['true', True, 'True']
+# Seconds an 'All' search waits for each of the Nanny and HM gateway searches before returning without them
+SEARCH_SOURCE_TIMEOUT = float(os.environ.get('SEARCH_SOURCE_TIMEOUT', 10))
+# Seconds search results are cached for repeat searches by the same group of users, or 0 not to cache them.
+# Cached searches are evicted when ARC releases an application with a new status, but only from processes using the
+# same cache: where ARC runs more than one process, SEARCH_CACHE_ALIAS should name a cache shared between them (e.g.
+# Memcached or Redis) rather than the per-process LocMemCache default, or other processes may serve stale results for
+# up to SEARCH_CACHE_TTL seconds.
+SEARCH_CACHE_TTL = int(os.environ.get('SEARCH_CACHE_TTL', 60))
+SEARCH_CACHE_ALIAS = os.environ.get('SEARCH_CACHE_ALIAS', 'default')
+
+# Whether the daily reports first count timeline events logged since their totals were last updated. Off by default,
+# as the update pages through the gateways' timeline logs within the report request. The totals are counted on
+# deployment, and kept current by running the update_reporting_facts --interval management command as a supervised
+# service. Only turn on as a stopgap where that command is not yet run.
+REPORTING_FACTS_REFRESH_ON_REPORT = os.environ.get('REPORTING_FACTS_REFRESH_ON_REPORT', 'False') in ['true', True,
+                                                                                                   'True']
+# Most application ids a daily report filters a gateway timeline log on when listing their histories; the timeline log
+# of larger batches is swept in full instead
+REPORTING_HISTORY_ID_FILTER_LIMIT = int(os.environ.get('REPORTING_HISTORY_ID_FILTER_LIMIT', 100))
+
+# Whether the larger daily reports are generated in the background by the run_report_jobs management command, for
+# users to download once finished, rather than within the request. Off by default; only turn on where the command is
+# run as a supervised service of its own.
+REPORT_JOBS_ENABLED = os.environ.get('REPORT_JOBS_ENABLED', 'False') in ['true', True, 'True']
+# Local directory the run_report_jobs management command writes generated reports to
+REPORT_STORAGE_DIR = os.environ.get('REPORT_STORAGE_DIR', '/tmp/arc-reports')
+# Seconds a requested report is reused for identical requests, instead of being generated again
+REPORT_CACHE_TTL = int(os.environ.get('REPORT_CACHE_TTL', 900))
+# Seconds a report job may run for before it is assumed lost, e.g. with a worker that was stopped, and queued again
+REPORT_JOB_TIMEOUT = int(os.environ.get('REPORT_JOB_TIMEOUT', 3600))
+# Seconds a report job, and its generated report, is kept for
+REPORT_JOB_RETENTION = int(os.environ.get('REPORT_JOB_RETENTION', 86400))
+
+# Policy for every outbound call to a backing service, see arc_application.services.http_client.request
+# (connect, read) timeouts in seconds, by service, falling back to the defaults below
+OUTBOUND_HTTP_CONNECT_TIMEOUT = float(os.environ.get('OUTBOUND_HTTP_CONNECT_TIMEOUT', 3.05))
+OUTBOUND_HTTP_READ_TIMEOUT = float(os.environ.get('OUTBOUND_HTTP_READ_TIMEOUT', 30))
+OUTBOUND_HTTP_TIMEOUTS = {
+    'addressing': (OUTBOUND_HTTP_CONNECT_TIMEOUT, 10),
+    'notify': (OUTBOUND_HTTP_CONNECT_TIMEOUT, 10),
+    'dbs-api-batch': (OUTBOUND_HTTP_CONNECT_TIMEOUT, 300),
+}
+# Retries of idempotent verbs per call, and the share of calls to a service that may be retried overall
+OUTBOUND_HTTP_MAX_RETRIES = int(os.environ.get('OUTBOUND_HTTP_MAX_RETRIES', 2))
+OUTBOUND_HTTP_RETRY_BACKOFF = float(os.environ.get('OUTBOUND_HTTP_RETRY_BACKOFF', 0.1))
+OUTBOUND_HTTP_RETRY_BUDGET_RATIO = float(os.environ.get('OUTBOUND_HTTP_RETRY_BUDGET_RATIO', 0.2))
+OUTBOUND_HTTP_RETRY_BUDGET_CAPACITY = int(os.environ.get('OUTBOUND_HTTP_RETRY_BUDGET_CAPACITY', 10))
+# Consecutive failures before a service's circuit breaker opens, and seconds before a trial call is let through
+OUTBOUND_HTTP_BREAKER_FAILURE_THRESHOLD = int(os.environ.get('OUTBOUND_HTTP_BREAKER_FAILURE_THRESHOLD', 5))
+OUTBOUND_HTTP_BREAKER_RESET_TIMEOUT = float(os.environ.get('OUTBOUND_HTTP_BREAKER_RESET_TIMEOUT', 30))
+
 # Address of Childminder application
 CHILDMINDER_EMAIL_VALIDATION_URL = os.environ.get('CHILDMINDER_EMAIL_VALIDATION_URL')
 
@@ -76,6 +159,9 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'arc_application.middleware.GatewayMetricsMiddleware',
+    'arc_application.middleware.GatewayRequestCacheMiddleware',
+    'arc_application.middleware.GatewayUnavailableMiddleware',
 ]
 
 ROOT_URLCONF = 'arc_service.urls'
@@ -165,7 +251,7 @@ STATICFILES_DIRS = (
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
 # Test outputs
-TEST_RUNNER = 'xmlrunner.extra.djangotestrunner.XMLTestRunner'
+TEST_RUNNER = 'arc_application.tests.runner.ARCTestRunner'
 TEST_OUTPUT_VERBOSE = True
 TEST_OUTPUT_DESCRIPTIONS = True
 TEST_OUTPUT_DIR = 'xmlrunner'
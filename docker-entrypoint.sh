@@ -8,6 +8,14 @@ python manage.py makemigrations
 echo "Apply database migrations"
 python manage.py migrate --fake-initial --settings=$PROJECT_SETTINGS
 
+# Index any Childminder applications not yet in the search index, e.g. on first deployment
+echo "Populating search index"
+python manage.py rebuild_search_index --stale-only --settings=$PROJECT_SETTINGS
+
+# Count the timeline events logged since the daily reporting totals were last updated, e.g. every event on first deployment
+echo "Updating reporting totals"
+python manage.py update_reporting_facts --settings=$PROJECT_SETTINGS
+
 #Collect static resources
 echo "Collecting static assets"
 mkdir -p static